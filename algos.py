@@ -1,236 +1,50 @@
-import networkx as nx
-import heapq
-import matplotlib.pyplot as plt
-
-
-def load_data():
-    installations = [200, 200, 300, 700, 1000, 200]
-    frais_approvisionnement = 2000 
-    cout_stockage = 2
-    
-    return installations, frais_approvisionnement, cout_stockage
-
-# --- initialisation graphe ---
-def init_graphe(installations, frais_approvisionnement, cout_stockage):
-    # grace a la bibliotheque networkx
-    G = nx.DiGraph()
-    # ajouter noeud par mois
-    n_mois = len(installations) 
-    for i in range(n_mois + 1):
-        G.add_node(i)
-    # arcs avec les couts d'approvisionnement + stockage
-    for i in range(n_mois):
-        for j in range(i + 1, n_mois + 1):
-            cout = frais_approvisionnement
-            cout_cabines = sum(installations[i:j])
-            cout_stockage_total = 0
-            for k in range(i, j-1):
-                # calcul des cabines en attente chaque mois
-                cabines_en_attente = sum(installations[k+1:j])
-                cout_stockage_total += cabines_en_attente * cout_stockage
-            cout_total = cout + cout_cabines + cout_stockage_total
-            G.add_edge(i, j, weight=cout_total)
-    
-    return G, n_mois
-
-# --- détection des cycles  ---
-def detect_cycle(graphe):
-    visites = set()  # sommets visités
-    pile = set()  # pile de récursion pour détecter les cycles
-
-    def dfs(v): #on va definir l'algo dfs vu en cours ici (comme il est recusrsif)
-        visites.add(v)
-        pile.add(v)
-
-        for voisin in graphe[v]:
-            if voisin not in visites:
-                if dfs(voisin):
-                    return True
-            elif voisin in pile:
-                return True  # cycle détecté
-
-        pile.remove(v)
-        return False
-    
-    # et on va l'utiliser ici
-    for noeud in graphe:
-        if noeud not in visites:
-            if dfs(noeud):
-                return True # si cycle détecté
-
-    return False  # sinon
-
-# --- Dijkstra pour trouver le chemin optimal ---
-def dijkstra(graphe, deb, fin):
-    # couts pour tous les sommets
-    # on utilise un tas binaire minimal pour la gestion des sommets à explorer
-    tas_bin_min = [(0, deb)]  # (coût, sommet)
-    distances = {deb: 0}
-    precedents = {deb: None}  
-    # prédécesseurs dans un dictionnaire (car faudra reconstruire le chemin après)
-
-    while tas_bin_min:
-        dist_actuelle, noeud_actuel = heapq.heappop(tas_bin_min)
-        # arret si on est a la fin
-        if noeud_actuel == fin:
-            break
-
-        # Si sommet déjà exploré avec coût plus bas on le saute
-        if dist_actuelle > distances.get(noeud_actuel, float('inf')):
-            continue
-        
-        # voir les voisins
-        for voisin in graphe[noeud_actuel]:
-            cout_arete = graphe[noeud_actuel][voisin]['weight']
-            distance = dist_actuelle + cout_arete
-            if distance < distances.get(voisin, float('inf')):
-                distances[voisin] = distance
-                precedents[voisin] = noeud_actuel  # suivre ce chemin
-                heapq.heappush(tas_bin_min, (distance, voisin))
-
-    return distances, precedents
-
-
-# --- reconstruction du chemin optimal ---
-def reconstruct_chemin_graphe(precedents, deb, fin):
-    if fin not in precedents and fin != deb:
-        return []  # pas de chemin trouvé
-        
-    chemin = []
-    noeud_actuel = fin
-    while noeud_actuel is not None:
-        chemin.append(noeud_actuel)
-        noeud_actuel = precedents.get(noeud_actuel)
-    chemin.reverse()  # on inverse le chemin pour qu'il soit bien du début à la fin
-    return chemin
-
-# --- Calcul des coûts pour les différentes stratégies ---
-
-# fonction auxiliere définie ici car ce calcul est refait ailleurs 
-# (fonction et non variables globales car appelée aussi d'interface.py)
-# donne la liste de tous les couts suivant le nb de mois
-def calcul_couts_de_base(installations, frais_approvisionnement, cout_stockage):
-    n_mois = len(installations)
-    total_cabines = sum(installations)
-
-    # strat 1 : tout au début
-    cout_une_fois = [0] * (n_mois + 1)
-    cout_total = frais_approvisionnement + total_cabines
-    cout_une_fois[1] = cout_total
-    stock = total_cabines
-    for i in range(n_mois):
-        stock -= installations[i]
-        cout_total += stock * cout_stockage
-        cout_une_fois[i + 1] = cout_total
-
-    # strat 2 : achats mensuels
-    cout_mensuel = [0] * (n_mois + 1)
-    stock = 0
-    cout_total = 0
-    for i in range(n_mois):
-        cout_total += frais_approvisionnement + installations[i]
-        # installation dans le mois
-        stock += installations[i] - installations[i]
-        cout_total += stock * cout_stockage
-        cout_mensuel[i + 1] = cout_total
-
-    return cout_une_fois, cout_mensuel
-
-# --- fonction principale ---
-# donne uniquement les couts finaux
-def calcul_couts_strategies(installations, frais_approvisionnement, cout_stockage):
-    cout_une_fois, cout_mensuel = calcul_couts_de_base( installations, frais_approvisionnement, cout_stockage)
-
-    total_directeur_achats = cout_une_fois[-1]  # achat au mois 1
-    cout_directeur_financier = cout_mensuel[-1]  # achat chaque mois
-
-    return {
-        "directeur_achats": total_directeur_achats,
-        "directeur_financier": cout_directeur_financier,
-    }
-
+import math
+import random
+import time
+
+# le solveur lui-même est dans noyau.py (sans networkx ni matplotlib) ; ces deux bibliothèques
+# ne sont importées que par les fonctions qui en ont besoin (tracés, tests sur un graphe networkx)
+from noyau import (
+    load_data, VERSION_SOLVEUR, sommes_prefixes, quantite_commande, cout_arc, init_graphe,
+    GrapheAvant, est_graphe_avant, ordre_topologique, detect_cycle, dijkstra, plus_court_chemin_dag,
+    wagner_whitin, PlanificateurIncremental, planification_glissante, wagner_whitin_enveloppe,
+    couts_restants, TableHorizons, MAX_MOIS_PRECALCUL, EnumerateurPlans, k_meilleurs_plans,
+    couts_variables, vecteur_par_mois, paliers_remises, CoutsVariables, wagner_whitin_variable,
+    METHODES, resoudre, reconstruct_chemin_graphe, calcul_couts_de_base, calcul_couts_strategies,
+)
+from instrumentation import instrumentation_par_defaut, resume
 
 # --- Visualisation des résultats de deux façons : évoltion des coûts par mois par strat et achats optimaux à faire ---
 
-def tracer_graphique(installations, frais_approvisionnement, cout_stockage, precedents, n_mois):
-    chemin_optimal = reconstruct_chemin_graphe(precedents, 0, n_mois)
-    mois = list(range(n_mois + 1))  # de 0 à 6 mois donc 7 éléments
-
-    # --- couts des deux stratégies de base ---
-    cout_une_fois, cout_mensuel = calcul_couts_de_base(
-        installations, frais_approvisionnement, cout_stockage
-    )
-
-    # strat 3 : optimale, obtenue par l'algo
-    cout_optimale = [0] * (n_mois + 1)
-    achats_optimal = [0] * n_mois  # pour le graphique des barres
-    
-    cout_actuel = 0
-    stock = 0
-    next_supply_index = 1  # index dans chemin_optimal
-    
-    for i in range(n_mois):
-        # vérifier si c'est un mois d'approvisionnement
-        if next_supply_index < len(chemin_optimal) and i == chemin_optimal[next_supply_index-1]:
-            mois_debut = chemin_optimal[next_supply_index-1]
-            mois_fin = chemin_optimal[next_supply_index]
-            
-            # quantité achetée
-            achats_optimal[i] = sum(installations[mois_debut:mois_fin])
-            
-            # calculer le coût de l'approvisionnement
-            cout_actuel += frais_approvisionnement + achats_optimal[i]
-            stock += achats_optimal[i]
-            next_supply_index += 1
-        
-        # installations du mois
-        stock -= installations[i]
-        
-        # stockage des cabines restantes
-        cout_stockage_mois = stock * cout_stockage
-        cout_actuel += cout_stockage_mois
-        
-        cout_optimale[i+1] = cout_actuel
-
-    # création des graphiques
-    fig, ax = plt.subplots(2, 1, figsize=(12, 12))
-    
-    # graphique 1: comparaison des évolutions des coûts
-    ax[0].plot(mois, cout_mensuel, label="Achats mensuels", color='blue', marker='o')
-    ax[0].plot(mois, cout_une_fois, label="Achat en une fois", color='red', linestyle='--', marker='x')
-    ax[0].plot(mois, cout_optimale, label="Méthode optimale", color='green', marker='s')
-    
-    ax[0].set_xlabel('Mois')
-    ax[0].set_ylabel('Coût total (€)')
-    ax[0].set_title("Comparaison des stratégies d'approvisionnement")
-    ax[0].legend()
-    ax[0].grid(True)
-    
-    # graphique 2: achats optimaux (distribués sur les 6 mois)
-    mois_labels = [f"Mois {i+1}" for i in range(n_mois)]
-    ax[1].bar(mois_labels, achats_optimal, color='lightgreen')
-    ax[1].set_xlabel('Mois')
-    ax[1].set_ylabel('Nombre de cabines')
-    ax[1].set_title('Stratégie optimale: Quantités commandées par mois')
-    for i, v in enumerate(achats_optimal):
-        if v > 0:
-            ax[1].text(i, v + 20, str(v), ha='center', va='bottom', fontsize=10)
-    
-    plt.tight_layout()
-    return fig, ax     # pour modifier ensuite dans l'interface     
-             
-
+# fig : figure vide à remplir (par défaut une nouvelle figure pyplot) ; les graphiques de l'interface
+# passent directement par graphiques.GraphiquesResultats, réutilisé d'une analyse à l'autre
+def tracer_graphique(installations, frais_approvisionnement, cout_stockage, precedents, n_mois, fig=None):
+    from graphiques import GraphiquesResultats, preparer_donnees
+    if fig is None:
+        import matplotlib.pyplot as plt
+        fig = plt.figure(figsize=(12, 12))
+    graphiques = GraphiquesResultats(fig)
+    graphiques.mettre_a_jour(preparer_donnees(installations, frais_approvisionnement, cout_stockage, precedents, n_mois))
+    fig.tight_layout()
+    return fig, [graphiques.ax_couts, graphiques.ax_commandes]     # pour modifier ensuite si besoin
 
 
 def visualize_graph(installations, frais_approvisionnement, cout_stockage, precedents, n_mois):
     fig, _ = tracer_graphique(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
+    return afficher_graphique(fig)
+
+# enregistre puis affiche une figure déjà tracée (plt.show() bloque jusqu'à la fermeture de la fenêtre)
+def afficher_graphique(fig):
     fig.savefig('comparaison_strategies.png')
+    import matplotlib.pyplot as plt
     plt.show()
     return True
 
 
 
 def tests_algos():
+    import networkx as nx
+
     print("=== Tests des algorithmes ===")
 
     print("Test de detect_cycle:")
@@ -250,6 +64,27 @@ def tests_algos():
     else:
         print("Fonction detect_cycle incorrectement implémentée")
 
+    print("\nTest de ordre_topologique:")
+    # longue chaîne : l'ancienne version récursive dépassait la limite de récursion
+    chaine = {k: [k + 1] for k in range(100_000)}
+    ordre_chaine = ordre_topologique(chaine)
+    # voisin absent des clés + arc transverse
+    graphe_dict = {"a": ["b", "c"], "b": ["c", "d"], "c": ["d"]}
+    ordre_dict = ordre_topologique(graphe_dict)
+    position = {v: k for k, v in enumerate(ordre_dict)} if ordre_dict else {}
+    respecte = ordre_dict is not None and all(position[v] < position[w] for v in graphe_dict for w in graphe_dict[v])
+    resultats = [
+        ordre_chaine == list(range(100_001)),
+        respecte and len(ordre_dict) == 4,
+        ordre_topologique(graph_with_cycle) is None,
+        ordre_topologique(GrapheAvant(5)) == [0, 1, 2, 3, 4, 5],
+    ]
+    print(f"Devrait afficher : [True, True, True, True]\nAffiche : {resultats}")
+    if all(resultats):
+        print("Fonction ordre_topologique bien implémentée")
+    else:
+        print("Fonction ordre_topologique incorrectement implémentée")
+
     print("\nTest de la fonction dijkstra:")
     # Nouveau graphe pour le test
     G = nx.DiGraph()
@@ -263,6 +98,15 @@ def tests_algos():
     else:
         print("Fonction dijkstra incorrectement implémentée")
 
+    print("\nTest de la fonction plus_court_chemin_dag:")
+    distances_dag, precedents_dag = plus_court_chemin_dag(G, 0, 4)
+    print(f"Devrait afficher : {distances}")
+    print(f"Affiche : {distances_dag}")
+    if distances_dag == distances:
+        print("Fonction plus_court_chemin_dag bien implémentée")
+    else:
+        print("Fonction plus_court_chemin_dag incorrectement implémentée")
+
     print("\nTest de la fonction reconstruct_chemin_graphe:")
     chemin = reconstruct_chemin_graphe(_, 0, 4)
     print(f"Chemin optimal : {chemin}")
@@ -272,9 +116,309 @@ def tests_algos():
     else:
         print("Fonction reconstruct_chemin_graphe incorrectement implémentée")
 
+    print("\nTest du moteur de coûts (sommes préfixes):")
+    # ancienne version en O(n^4) gardée comme référence
+    def poids_naifs(installations, frais_approvisionnement, cout_stockage):
+        poids = {}
+        n_mois = len(installations)
+        for i in range(n_mois):
+            for j in range(i + 1, n_mois + 1):
+                cout_cabines = sum(installations[i:j])
+                cout_stockage_total = 0
+                for k in range(i, j-1):
+                    cabines_en_attente = sum(installations[k+1:j])
+                    cout_stockage_total += cabines_en_attente * cout_stockage
+                poids[(i, j)] = frais_approvisionnement + cout_cabines + cout_stockage_total
+        return poids
+
+    installations, frais_approvisionnement, cout_stockage = load_data()
+    attendus = poids_naifs(installations, frais_approvisionnement, cout_stockage)
+    G, _ = init_graphe(installations, frais_approvisionnement, cout_stockage)
+    obtenus = {(i, j): G[i][j]['weight'] for i, j in G.edges}
+    identiques = obtenus == attendus and all(type(obtenus[a]) is type(attendus[a]) for a in attendus)
+    print(f"Poids identiques à l'ancienne version sur load_data() : {identiques}")
+    if identiques:
+        print("Fonction cout_arc bien implémentée")
+    else:
+        print("Fonction cout_arc incorrectement implémentée")
+
+    print("\nTest de wagner_whitin (comparaison avec dijkstra):")
+    distances_dp, precedents_dp = wagner_whitin(installations, frais_approvisionnement, cout_stockage)
+    distances_dij, precedents_dij = dijkstra(G, 0, len(installations))
+    n_mois = len(installations)
+    print(f"Devrait afficher : {distances_dij[n_mois]} {reconstruct_chemin_graphe(precedents_dij, 0, n_mois)}")
+    print(f"Affiche : {distances_dp[n_mois]} {reconstruct_chemin_graphe(precedents_dp, 0, n_mois)}")
+    if distances_dp[n_mois] == distances_dij[n_mois]:
+        print("Fonction wagner_whitin bien implémentée")
+    else:
+        print("Fonction wagner_whitin incorrectement implémentée")
+
+    print("\nTest de PlanificateurIncremental (modifications successives, comparaison avec un calcul complet):")
+    generateur = random.Random(1)
+    besoins = [generateur.randint(0, 1000) for _ in range(40)]
+    planificateur = PlanificateurIncremental(besoins, 2000, 2)
+    planificateur.solve()
+    erreurs = 0
+    for essai in range(50):
+        if essai % 10 == 9:
+            planificateur.update_costs(generateur.randint(0, 5000), generateur.randint(0, 5))
+        else:
+            m = generateur.randrange(len(besoins))
+            besoins[m] = generateur.randint(0, 1000)
+            planificateur.update_demand(m, besoins[m])
+        distances_inc, precedents_inc, n_mois = planificateur.solve()
+        distances_ref, precedents_ref = wagner_whitin(besoins, planificateur.frais_approvisionnement, planificateur.cout_stockage)
+        if distances_inc != distances_ref or precedents_inc != precedents_ref:
+            erreurs += 1
+    print(f"Devrait afficher : 0 écart sur 50 modifications\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Classe PlanificateurIncremental bien implémentée")
+    else:
+        print("Classe PlanificateurIncremental incorrectement implémentée")
+
+    print("\nTest de planification_glissante (flux mois par mois, comparaison avec wagner_whitin):")
+    generateur = random.Random(3)
+    erreurs = 0
+    for essai in range(200):
+        n_mois = generateur.randint(1, 60)
+        besoins = [generateur.choice([0, generateur.randint(0, 1000)]) for _ in range(n_mois)]
+        frais = generateur.choice([0, generateur.randint(1, 5000), generateur.uniform(0, 5000)])
+        stockage = generateur.choice([0, generateur.randint(1, 10), generateur.uniform(0, 10)])
+        distances, _ = wagner_whitin(besoins, frais, stockage)
+        commandes = list(planification_glissante(iter(besoins), frais, stockage))
+        contigu = [c["mois_debut"] for c in commandes] + [n_mois] == [0] + [c["mois_fin"] for c in commandes]
+        cout_total = sum(c["cout"] for c in commandes)
+        if not contigu or not math.isclose(cout_total, distances[n_mois], rel_tol=1e-9, abs_tol=1e-6):
+            erreurs += 1
+    print(f"Devrait afficher : 0 écart sur 200 instances\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction planification_glissante bien implémentée")
+    else:
+        print("Fonction planification_glissante incorrectement implémentée")
+
+    print("\nTest de planification_glissante hors hypothèses (besoin négatif, stockage négatif):")
+    refus = []
+    for besoins, frais, stockage in (([264, 266, 111, 279, 263, 252, 258, -32, 59, 64], 500, 2), ([10, 20], 500, -1)):
+        try:
+            list(planification_glissante(iter(besoins), frais, stockage))
+            refus.append(False)
+        except ValueError:
+            refus.append(True)
+    print(f"Devrait afficher : [True, True] (ValueError plutôt qu'un plan non optimal)\nAffiche : {refus}")
+    if refus == [True, True]:
+        print("Contrôle des hypothèses de planification_glissante bien implémenté")
+    else:
+        print("Contrôle des hypothèses de planification_glissante incorrectement implémenté")
+
+    print("\nTest de wagner_whitin_enveloppe (instances aléatoires, comparaison avec dijkstra):")
+    generateur = random.Random(0)
+    erreurs = 0
+    for essai in range(200):
+        n_mois = generateur.randint(1, 25)
+        besoins = [generateur.choice([0, generateur.randint(0, 1000)]) for _ in range(n_mois)]
+        frais = generateur.choice([0, generateur.randint(1, 5000), generateur.uniform(0, 5000)])
+        stockage = generateur.choice([0, generateur.randint(1, 10), generateur.uniform(0, 10)])
+        distances_dij, _, _ = resoudre(besoins, frais, stockage, methode="dijkstra")
+        distances_env, precedents_env, _ = resoudre(besoins, frais, stockage, methode="enveloppe")
+        chemin = reconstruct_chemin_graphe(precedents_env, 0, n_mois)
+        prefixes = sommes_prefixes(besoins)
+        cout_chemin = sum(cout_arc(prefixes, chemin[k], chemin[k+1], frais, stockage) for k in range(len(chemin) - 1))
+        if not (math.isclose(distances_env[n_mois], distances_dij[n_mois], rel_tol=1e-9, abs_tol=1e-6)
+                and math.isclose(cout_chemin, distances_env[n_mois], rel_tol=1e-9, abs_tol=1e-6)):
+            erreurs += 1
+            print(f"Écart : {besoins}, {frais}, {stockage} -> {distances_env[n_mois]} au lieu de {distances_dij[n_mois]}")
+    print(f"Devrait afficher : 0 écart sur 200 instances\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction wagner_whitin_enveloppe bien implémentée")
+    else:
+        print("Fonction wagner_whitin_enveloppe incorrectement implémentée")
+
+    print("\nTest de TableHorizons (tous les couples (début, fin), comparaison avec une résolution par sous-horizon):")
+    erreurs = 0
+    for essai in range(60):
+        n_mois = generateur.randint(1, 15)
+        besoins = [generateur.choice([0, generateur.randint(0, 1000)]) for _ in range(n_mois)]
+        if essai % 10 == 0:
+            besoins[generateur.randrange(n_mois)] = -100  # besoins négatifs : repli quadratique
+        frais = generateur.choice([0, generateur.randint(1, 5000), generateur.uniform(0, 5000)])
+        stockage = generateur.choice([0, generateur.randint(1, 10), generateur.uniform(0, 10)])
+        table = TableHorizons(besoins, frais, stockage)
+        distances_dij, _ = dijkstra(init_graphe(besoins, frais, stockage)[0], 0)  # sans arrêt : toutes les fins
+        for fin in range(n_mois + 1):
+            if not math.isclose(table.cout(0, fin), distances_dij[fin], rel_tol=1e-9, abs_tol=1e-6):
+                erreurs += 1
+            for debut in range(fin + 1):
+                attendu = resoudre(besoins[debut:fin], frais, stockage)[0][fin - debut]
+                chemin = table.plan(debut, fin)
+                cout_chemin = sum(c["cout"] for c in table.commandes(debut, fin))
+                if not (chemin[0] == debut and chemin[-1] == fin
+                        and math.isclose(table.cout(debut, fin), attendu, rel_tol=1e-9, abs_tol=1e-6)
+                        and math.isclose(cout_chemin, attendu, rel_tol=1e-9, abs_tol=1e-6)):
+                    erreurs += 1
+                    print(f"Écart : {besoins}, {frais}, {stockage}, ({debut}, {fin}) -> {table.cout(debut, fin)} au lieu de {attendu}")
+    print(f"Devrait afficher : 0 écart sur 60 instances\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Classe TableHorizons bien implémentée")
+    else:
+        print("Classe TableHorizons incorrectement implémentée")
+
+    print("\nTest de TableHorizons.precalculer (lignes compactes, limite de MAX_MOIS_PRECALCUL mois):")
+    table = TableHorizons([generateur.randint(0, 1000) for _ in range(50)], 2000, 2)
+    table.precalculer()
+    compactes = len(table._lignes) == 49 and all(len(table._lignes[debut][1]) == 51 - debut for debut in table._lignes)
+    try:
+        TableHorizons([100] * (MAX_MOIS_PRECALCUL + 1), 2000, 2).precalculer()
+        limite = False
+    except ValueError:
+        limite = True
+    print(f"Devrait afficher : [True, True]\nAffiche : {[compactes, limite]}")
+    if compactes and limite:
+        print("Méthode precalculer bien implémentée")
+    else:
+        print("Méthode precalculer incorrectement implémentée")
+
+    print("\nTest de k_meilleurs_plans (comparaison avec l'énumération de tous les plans):")
+    erreurs = 0
+    for essai in range(40):
+        n_mois = generateur.randint(1, 10)
+        besoins = [generateur.choice([0, generateur.randint(0, 1000)]) for _ in range(n_mois)]
+        frais = generateur.choice([0, generateur.randint(1, 5000), generateur.uniform(0, 5000)])
+        stockage = generateur.choice([0, generateur.randint(1, 10), generateur.uniform(0, 10)])
+        prefixes = sommes_prefixes(besoins)
+        # force brute : un plan = un sous-ensemble des mois 1..n-1 où l'on commande (le mois 0 toujours)
+        tous = []
+        for masque in range(2 ** (n_mois - 1)):
+            chemin = [0] + [m for m in range(1, n_mois) if masque >> (m - 1) & 1] + [n_mois]
+            tous.append(sum(cout_arc(prefixes, a, b, frais, stockage) for a, b in zip(chemin, chemin[1:])))
+        tous.sort()
+        k = generateur.choice([1, 5, 20, 2 ** n_mois])  # parfois plus que le nombre de plans
+        plans = k_meilleurs_plans(besoins, frais, stockage, k)
+        couts_recalcules = [sum(cout_arc(prefixes, a, b, frais, stockage) for a, b in zip(chemin, chemin[1:])) for _, chemin in plans]
+        if not (len(plans) == min(k, len(tous))
+                and len({tuple(chemin) for _, chemin in plans}) == len(plans)
+                and all(chemin[0] == 0 and chemin[-1] == n_mois for _, chemin in plans)
+                and all(math.isclose(c, a, rel_tol=1e-9, abs_tol=1e-6) for (c, _), a in zip(plans, tous))
+                and all(math.isclose(c, r, rel_tol=1e-9, abs_tol=1e-6) for (c, _), r in zip(plans, couts_recalcules))):
+            erreurs += 1
+            print(f"Écart : {besoins}, {frais}, {stockage}, k={k}")
+    print(f"Devrait afficher : 0 écart sur 40 instances\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction k_meilleurs_plans bien implémentée")
+    else:
+        print("Fonction k_meilleurs_plans incorrectement implémentée")
+
+    print("\nTest de rapidité de k_meilleurs_plans (k = 1000 sur 500 mois):")
+    besoins = [generateur.randint(0, 1000) for _ in range(500)]
+    debut = time.perf_counter()
+    plans = k_meilleurs_plans(besoins, 2000, 2, 1000)
+    duree = time.perf_counter() - debut
+    croissant = all(a[0] <= b[0] for a, b in zip(plans, plans[1:]))
+    print(f"Devrait afficher : 1000 plans par coût croissant en moins de 5 s\nAffiche : {len(plans)} plans, croissant {croissant}, en {duree:.2f} s")
+    if len(plans) == 1000 and croissant and duree < 5:
+        print("Énumération paresseuse bien implémentée")
+    else:
+        print("Énumération paresseuse incorrectement implémentée")
+
+    print("\nTest de wagner_whitin_variable (frais et stockage par mois, remises, comparaison avec l'énumération de tous les plans):")
+    erreurs = 0
+    for essai in range(300):
+        n_mois = generateur.randint(1, 9)
+        besoins = [generateur.choice([0, generateur.randint(0, 300)]) for _ in range(n_mois)]
+        if essai % 10 == 0:
+            besoins[generateur.randrange(n_mois)] = -50  # besoins négatifs : palier qui recule
+        frais = [generateur.choice([0, generateur.randint(0, 3000)]) for _ in range(n_mois)]
+        stockage = [generateur.choice([0, generateur.randint(0, 5), generateur.uniform(0, 4)]) for _ in range(n_mois)]
+        remises = generateur.choice([None, [(0, 1.5)], [(0, 3), (200, 2.5), (500, 2)], [(300, 5), (0, 10), (1000, 1), (100, 6)]])
+        seuils, prix = paliers_remises(remises)
+
+        # coût d'un arc recalculé sans sommes préfixes ni pointeur
+        def cout_naif(i, j):
+            quantite = sum(besoins[i:j])
+            prix_unitaire = [p for s, p in zip(seuils, prix) if quantite >= s][-1] if quantite >= 0 else prix[0]
+            return frais[i] + prix_unitaire * quantite + sum(besoins[k] * sum(stockage[i:k]) for k in range(i, j))
+
+        meilleur = min(sum(cout_naif(a, b) for a, b in zip(chemin, chemin[1:]))
+                       for chemin in ([0] + [m for m in range(1, n_mois) if masque >> (m - 1) & 1] + [n_mois]
+                                      for masque in range(2 ** (n_mois - 1))))
+        distances, precedents, _ = resoudre(besoins, frais, stockage, remises=remises)
+        chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
+        cout_chemin = CoutsVariables(besoins, frais, stockage, remises).cout_plan(chemin)
+        if not (math.isclose(distances[n_mois], meilleur, rel_tol=1e-9, abs_tol=1e-6)
+                and math.isclose(cout_chemin, meilleur, rel_tol=1e-9, abs_tol=1e-6)):
+            erreurs += 1
+            print(f"Écart : {besoins}, {frais}, {stockage}, {remises} -> {distances[n_mois]} au lieu de {meilleur}")
+    # coûts constants donnés par mois : exactement le résultat du modèle scalaire
+    for essai in range(100):
+        n_mois = generateur.randint(0, 30)
+        besoins = [generateur.randint(0, 1000) for _ in range(n_mois)]
+        frais, stockage = generateur.randint(0, 5000), generateur.randint(0, 10)
+        if wagner_whitin_variable(besoins, [frais] * n_mois, stockage, [(0, 1)]) != wagner_whitin(besoins, frais, stockage):
+            erreurs += 1
+    print(f"Devrait afficher : 0 écart sur 400 instances\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction wagner_whitin_variable bien implémentée")
+    else:
+        print("Fonction wagner_whitin_variable incorrectement implémentée")
+
+    print("\nTest de rapidité de wagner_whitin_variable (1000 mois avec remises, 10^5 mois sans):")
+    besoins = [generateur.randint(0, 1000) for _ in range(10**5)]
+    frais = [generateur.randint(1000, 3000) for _ in range(10**5)]
+    stockage = [generateur.uniform(1, 3) for _ in range(10**5)]
+    debut = time.perf_counter()
+    wagner_whitin_variable(besoins[:1000], frais[:1000], stockage[:1000], [(0, 3), (1000, 2.8), (5000, 2.5), (20000, 2.2)])
+    duree_remises = time.perf_counter() - debut
+    debut = time.perf_counter()
+    wagner_whitin_variable(besoins, frais, stockage)
+    duree_enveloppe = time.perf_counter() - debut
+    print(f"Devrait afficher : moins de 1 s chacun\nAffiche : {duree_remises:.2f} s avec remises, {duree_enveloppe:.2f} s sans")
+    if duree_remises < 1 and duree_enveloppe < 1:
+        print("Coût des arcs en O(1) amorti bien implémenté")
+    else:
+        print("Coût des arcs en O(1) amorti incorrectement implémenté")
+
+
+# --- mesure du passage à l'échelle des solveurs ---
+# la version quadratique n'est mesurée que jusqu'à limite_dp mois (au-delà elle prend des minutes)
+def benchmark_enveloppe(tailles=(10**3, 10**4, 10**5, 10**6), limite_dp=10**4, graine=0):
+    print("=== Passage à l'échelle : wagner_whitin vs wagner_whitin_enveloppe ===")
+    generateur = random.Random(graine)
+    resultats = []
+    for n_mois in tailles:
+        besoins = [generateur.randint(0, 1000) for _ in range(n_mois)]
+        debut = time.perf_counter()
+        distances, _ = wagner_whitin_enveloppe(besoins, 2000, 2)
+        duree_env = time.perf_counter() - debut
+        duree_dp = None
+        if n_mois <= limite_dp:
+            debut = time.perf_counter()
+            distances_dp, _ = wagner_whitin(besoins, 2000, 2)
+            duree_dp = time.perf_counter() - debut
+            if distances_dp[n_mois] != distances[n_mois]:
+                print(f"ERREUR: coûts différents à {n_mois} mois")
+        texte_dp = f"{duree_dp:.3f} s" if duree_dp is not None else "non mesuré"
+        print(f"- {n_mois} mois : enveloppe {duree_env:.3f} s ({n_mois / duree_env:,.0f} mois/s), dp {texte_dp}")
+        resultats.append((n_mois, duree_env, duree_dp))
+    return resultats
+
+# objectif de débit de planification_glissante (mois traités par seconde, besoins aléatoires)
+OBJECTIF_GLISSANTE = 50_000
+
+def benchmark_glissante(n_mois=10**6, graine=0):
+    print("=== Débit de planification_glissante ===")
+    generateur = random.Random(graine)
+    besoins = [generateur.randint(0, 1000) for _ in range(n_mois)]
+    debut = time.perf_counter()
+    n_commandes = sum(1 for _ in planification_glissante(iter(besoins), 2000, 2))
+    duree = time.perf_counter() - debut
+    debit = n_mois / duree
+    print(f"- {n_mois} mois, {n_commandes} commandes en {duree:.2f} s : {debit:,.0f} mois/s (objectif {OBJECTIF_GLISSANTE:,} mois/s)")
+    if debit < OBJECTIF_GLISSANTE:
+        print("ATTENTION: débit sous l'objectif")
+    return debit
+
 
 # --- Main: Fonction principale ---
-def main():
+def main(methode="dp"):
     tests_algos()
 
     print("\n\n=== CostGraph : Système d'optimisation des approvisionnements de cabines téléphoniques ===\n")
@@ -285,28 +429,52 @@ def main():
     print(f"- Frais fixes d'approvisionnement: {frais_approvisionnement} €")
     print(f"- Coût de stockage par cabine par mois: {cout_stockage} €\n")
     
-    # Création du graphe
-    G, n_mois = init_graphe(installations, frais_approvisionnement, cout_stockage)
+    # chaque étape est mesurée (temps, CPU, taille du graphe) ; résumé affiché à la fin
+    with instrumentation_par_defaut.resolution(source="algos", methode=methode) as resolution:
+        if methode == "dijkstra":
+            # mode explication : on construit explicitement le graphe networkx
+            with resolution.etape("construction_graphe"):
+                G, n_mois = init_graphe(installations, frais_approvisionnement, cout_stockage)
+            resolution.noter(mois=n_mois, noeuds=G.number_of_nodes(), arcs=G.number_of_edges())
+            print(f"Graphe : {G.number_of_nodes()} noeuds, {G.number_of_edges()} arcs")
     
-    # Vérification d'acyclicité
-    if detect_cycle(G):
-        print("ERREUR: Le graphe contient des cycles, ce qui ne devrait pas être le cas.")
-        return
-    else:
-        print("Vérification d'acyclicité : OK - Le graphe ne contient pas de cycles.\n")
+            # Vérification d'acyclicité
+            with resolution.etape("detection_cycles"):
+                cycle = detect_cycle(G)
+            if cycle:
+                print("ERREUR: Le graphe contient des cycles, ce qui ne devrait pas être le cas.")
+                resolution.statut = "erreur"
+                return
+            else:
+                print("Vérification d'acyclicité : OK - Le graphe ne contient pas de cycles.\n")
     
-    # Recherche du plus court chemin (stratégie optimale)
-    distances, precedents = dijkstra(G, 0, n_mois)
-    if n_mois not in distances:
-        print("ERREUR: Aucun chemin trouvé du mois 0 au mois final.")
-        return
+            # Recherche du plus court chemin (stratégie optimale)
+            with resolution.etape("plus_court_chemin"):
+                distances, precedents = dijkstra(G, 0, n_mois)
+        else:
+            # programmation dynamique directe, sans graphe (import local : cache.py charge sqlite3, l'import d'algos reste léger)
+            from cache import cache_par_defaut
+            with resolution.etape("plus_court_chemin"):
+                distances, precedents, n_mois = cache_par_defaut.resoudre(installations, frais_approvisionnement, cout_stockage, methode)
+            # graphe implicite : mêmes noeuds et arcs, sans les stocker
+            resolution.noter(mois=n_mois, noeuds=n_mois + 1, arcs=n_mois * (n_mois + 1) // 2)
+        if n_mois not in distances:
+            print("ERREUR: Aucun chemin trouvé du mois 0 au mois final.")
+            resolution.statut = "erreur"
+            return
     
-    # Reconstruire le chemin optimal
-    chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
-    cout_optimal = distances[n_mois]
+        # Reconstruire le chemin optimal
+        with resolution.etape("reconstruction_chemin"):
+            chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
+        cout_optimal = distances[n_mois]
     
-    # Calculer les coûts des autres stratégies
-    autres_couts = calcul_couts_strategies(installations, frais_approvisionnement, cout_stockage)
+        # Calculer les coûts des autres stratégies
+        with resolution.etape("strategies_base"):
+            autres_couts = calcul_couts_strategies(installations, frais_approvisionnement, cout_stockage)
+
+        # seule la construction de la figure est mesurée : plt.show() attend la fermeture de la fenêtre
+        with resolution.etape("graphiques"):
+            fig, _ = tracer_graphique(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
     
     # Afficher les résultats
     print("=== Résultats de l'analyse ===\n")
@@ -314,11 +482,12 @@ def main():
     print(f"   Coût total: {cout_optimal:.2f} €")
     print("   Politique d'approvisionnement:")
     
+    prefixes = sommes_prefixes(installations)
     for i in range(1, len(chemin)):
         mois_debut = chemin[i-1]
         mois_fin = chemin[i]
-        cabines = sum(installations[mois_debut:mois_fin])
-        cout_appro = G[mois_debut][mois_fin]['weight']
+        cabines = quantite_commande(prefixes, mois_debut, mois_fin)
+        cout_appro = cout_arc(prefixes, mois_debut, mois_fin, frais_approvisionnement, cout_stockage)
         print(f"   - Au début du mois {mois_debut+1}, approvisionner {cabines} cabines pour les mois {mois_debut+1} à {mois_fin}")
         print(f"     Coût: {cout_appro:.2f} €")
     
@@ -332,8 +501,11 @@ def main():
     print(f"\n3. Économies réalisées avec la stratégie optimale:")
     print(f"   Par rapport à la stratégie du directeur des achats: {economie_vs_achats:.2f} € ({economie_vs_achats/autres_couts['directeur_achats']*100:.2f}%)")
     print(f"   Par rapport à la stratégie du directeur financier: {economie_vs_financier:.2f} € ({economie_vs_financier/autres_couts['directeur_financier']*100:.2f}%)")
-    
-    visualize_graph(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
+
+    print("\n=== Profil de l'analyse ===\n")
+    print(resume(instrumentation_par_defaut.derniere()))
+
+    afficher_graphique(fig)
     
     # résumé pour les directeurs (il faut montrer ce qui peut etre économisé grâce à la strat optimale)
     print("\n=== Résumé pour la présentation aux directeurs ===\n")
@@ -0,0 +1,194 @@
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from noyau import sommes_prefixes, cout_arc, dijkstra, detect_cycle, plus_court_chemin_dag
+
+
+# --- stockage compact des coûts d'arcs : triangle supérieur "tassé" dans un seul tableau float64 ---
+# le graphe networkx de init_graphe garde un dict {'weight': ...} par arc (n(n+1)/2 arcs : plusieurs Go
+# à 5000 mois) ; ici 8 octets par arc, éventuellement dans un fichier numpy.memmap.
+# la ligne i (arcs i -> i+1..n_mois) commence à debut_ligne(i) = i*n_mois - i*(i-1)/2, l'arc (i, j) est
+# à debut_ligne(i) + j - i - 1 : accès en O(1)
+
+def nombre_arcs(n_mois):
+    return n_mois * (n_mois + 1) // 2
+
+
+class _Voisins:
+    __slots__ = ("i", "ligne")
+
+    def __init__(self, i, ligne):
+        self.i = i
+        self.ligne = ligne
+
+    def __iter__(self):
+        return iter(range(self.i + 1, self.i + 1 + len(self.ligne)))
+
+    def __len__(self):
+        return len(self.ligne)
+
+    def __contains__(self, j):
+        return self.i < j <= self.i + len(self.ligne)
+
+    # même forme que networkx : G[i][j]['weight']
+    def __getitem__(self, j):
+        if j not in self:
+            raise KeyError(j)
+        return {'weight': float(self.ligne[j - self.i - 1])}
+
+
+class CoutsArcs:
+    avant = True  # arcs i -> j avec i < j uniquement (cf. est_graphe_avant)
+
+    # couts : tableau de nombre_arcs(n_mois) valeurs, en mémoire ou memmap
+    def __init__(self, n_mois, couts):
+        if len(couts) != nombre_arcs(n_mois):
+            raise ValueError(f"{len(couts)} coûts pour {nombre_arcs(n_mois)} arcs attendus")
+        self.n_mois = n_mois
+        self.couts = couts
+
+    # chemin : fichier où placer le tableau (numpy.memmap) au lieu de la mémoire
+    @classmethod
+    def construire(cls, installations, frais_approvisionnement, cout_stockage, chemin=None):
+        n_mois = len(installations)
+        if chemin is None:
+            couts = np.empty(nombre_arcs(n_mois), dtype=np.float64)
+        else:
+            couts = np.memmap(chemin, dtype=np.float64, mode="w+", shape=(max(nombre_arcs(n_mois), 1),))[:nombre_arcs(n_mois)]
+        cumul, cumul_pondere = (np.array(p, dtype=np.float64) for p in sommes_prefixes(installations))
+        # une ligne à la fois (cf. cout_arc) : jamais plus de n_mois valeurs temporaires
+        debut = 0
+        for i in range(n_mois):
+            cabines = cumul[i + 1:] - cumul[i]
+            ligne = couts[debut:debut + n_mois - i]
+            np.subtract(cumul_pondere[i + 1:], cumul_pondere[i], out=ligne)
+            ligne -= i * cabines
+            ligne *= cout_stockage
+            ligne += cabines
+            ligne += frais_approvisionnement
+            debut += n_mois - i
+        if chemin is not None:
+            couts.flush()
+        return cls(n_mois, couts)
+
+    # relit un stockage écrit par construire(..., chemin=...) sans le recalculer ni le charger en mémoire
+    @classmethod
+    def ouvrir(cls, chemin, n_mois):
+        couts = np.memmap(chemin, dtype=np.float64, mode="r")[:nombre_arcs(n_mois)]
+        return cls(n_mois, couts)
+
+    def debut_ligne(self, i):
+        return i * self.n_mois - i * (i - 1) // 2
+
+    def poids(self, i, j):
+        if not 0 <= i < j <= self.n_mois:
+            raise KeyError((i, j))
+        return float(self.couts[self.debut_ligne(i) + j - i - 1])
+
+    # coûts des arcs i -> i+1..n_mois (vue sur le tableau, sans copie)
+    def ligne(self, i):
+        debut = self.debut_ligne(i)
+        return self.couts[debut:debut + self.n_mois - i]
+
+    # --- interface d'adjacence utilisée par dijkstra, detect_cycle, plus_court_chemin_dag ---
+    def __iter__(self):
+        return iter(range(self.n_mois + 1))
+
+    def __len__(self):
+        return self.n_mois + 1
+
+    def __contains__(self, i):
+        return 0 <= i <= self.n_mois
+
+    def __getitem__(self, i):
+        if i not in self:
+            raise KeyError(i)
+        return _Voisins(i, self.ligne(i))
+
+    def number_of_nodes(self):
+        return self.n_mois + 1
+
+    def number_of_edges(self):
+        return nombre_arcs(self.n_mois)
+
+    def taille_octets(self):
+        return self.couts.nbytes
+
+
+# même signature et même retour que init_graphe, sans networkx
+def init_graphe_compact(installations, frais_approvisionnement, cout_stockage, chemin=None):
+    G = CoutsArcs.construire(installations, frais_approvisionnement, cout_stockage, chemin)
+    return G, G.n_mois
+
+
+def tests_arcs():
+    print("=== Tests du stockage compact des arcs ===")
+    from noyau import load_data, init_graphe
+
+    print("Test des poids (comparaison avec cout_arc et le graphe networkx):")
+    generateur = random.Random(0)
+    jeux = [load_data(), ([generateur.randint(0, 1000) for _ in range(80)], 2000, 2), ([0, 5, 0], 0, 1.5), ([], 2000, 2)]
+    ecarts = 0
+    for installations, frais_approvisionnement, cout_stockage in jeux:
+        prefixes = sommes_prefixes(installations)
+        G, n_mois = init_graphe_compact(installations, frais_approvisionnement, cout_stockage)
+        G_nx, _ = init_graphe(installations, frais_approvisionnement, cout_stockage)
+        for i in range(n_mois):
+            for j in range(i + 1, n_mois + 1):
+                attendu = cout_arc(prefixes, i, j, frais_approvisionnement, cout_stockage)
+                if not (G[i][j]['weight'] == G.poids(i, j) == G_nx[i][j]['weight'] == attendu):
+                    ecarts += 1
+        if list(G) != list(G_nx) or any(list(G[i]) != sorted(G_nx[i]) for i in G) or G.number_of_edges() != G_nx.number_of_edges():
+            ecarts += 1
+    print(f"Devrait afficher : 0 écart\nAffiche : {ecarts} écart(s)")
+    if ecarts == 0:
+        print("Classe CoutsArcs bien implémentée")
+    else:
+        print("Classe CoutsArcs incorrectement implémentée")
+
+    print("\nTest de dijkstra, detect_cycle et plus_court_chemin_dag sur le stockage compact:")
+    installations, frais_approvisionnement, cout_stockage = jeux[1]
+    G, n_mois = init_graphe_compact(installations, frais_approvisionnement, cout_stockage)
+    G_nx, _ = init_graphe(installations, frais_approvisionnement, cout_stockage)
+    attendu = dijkstra(G_nx, 0, n_mois)
+    obtenus = [dijkstra(G, 0, n_mois), plus_court_chemin_dag(G, 0, n_mois)]
+    identiques = not detect_cycle(G) and all(d[n_mois] == attendu[0][n_mois] for d, _ in obtenus) and obtenus[0][1] == attendu[1]
+    print(f"Devrait afficher : True\nAffiche : {identiques}")
+    if identiques:
+        print("Interface d'adjacence bien implémentée")
+    else:
+        print("Interface d'adjacence incorrectement implémentée")
+
+    print("\nTest du stockage sur disque (numpy.memmap):")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "arcs.bin")
+        G_disque, _ = init_graphe_compact(installations, frais_approvisionnement, cout_stockage, chemin=chemin)
+        taille_fichier = os.path.getsize(chemin)
+        relu = CoutsArcs.ouvrir(chemin, n_mois)
+        identiques = isinstance(relu.couts, np.memmap) and np.array_equal(relu.couts, G.couts) and dijkstra(relu, 0, n_mois) == obtenus[0]
+        del G_disque, relu  # libère les fichiers avant la suppression du dossier
+    print(f"Devrait afficher : True, {8 * nombre_arcs(n_mois)} octets\nAffiche : {identiques}, {taille_fichier} octets")
+    if identiques and taille_fichier == 8 * nombre_arcs(n_mois):
+        print("Stockage memmap bien implémenté")
+    else:
+        print("Stockage memmap incorrectement implémenté")
+
+    print("\nTest de taille et de rapidité sur 5000 mois:")
+    installations = [generateur.randint(0, 1000) for _ in range(5000)]
+    debut = time.perf_counter()
+    G, n_mois = init_graphe_compact(installations, 2000, 2)
+    duree = time.perf_counter() - debut
+    print(f"Devrait afficher : {nombre_arcs(5000)} arcs, 100 Mo au plus, moins de 1 s\n"
+          f"Affiche : {G.number_of_edges()} arcs, {G.taille_octets() / 1e6:.0f} Mo, {duree:.2f} s")
+    if G.number_of_edges() == nombre_arcs(5000) and G.taille_octets() <= 100_040_000 and duree < 1:
+        print("Fonction init_graphe_compact bien implémentée")
+    else:
+        print("Fonction init_graphe_compact incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_arcs()
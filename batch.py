@@ -0,0 +1,227 @@
+import time
+
+import numpy as np
+
+from noyau import resoudre, reconstruct_chemin_graphe, calcul_couts_de_base, calcul_couts_strategies
+
+
+# --- mise en forme des données : séries de longueurs différentes -> matrice complétée par des zéros ---
+def empiler(series):
+    longueurs = np.array([len(serie) for serie in series], dtype=np.int64)
+    n_mois = int(longueurs.max()) if len(series) else 0
+    besoins = np.zeros((len(series), n_mois), dtype=np.float64)
+    for k, serie in enumerate(series):
+        besoins[k, :len(serie)] = serie
+    return besoins, longueurs
+
+
+# --- coûts cumulés des trois stratégies, en un passage de sommes cumulées ---
+# besoins : un vecteur de mois, ou une matrice articles x mois (le calcul se fait sur le dernier axe)
+# commandes : masque de même forme, True aux mois où la stratégie optimale commande
+# frais_approvisionnement, cout_stockage : un scalaire ou un vecteur par article
+# renvoie des tableaux : "une_fois", "mensuel", "optimale" (coût cumulé après k mois, k = 0..n_mois),
+# "quantites" (commandes de la stratégie optimale) et "stock" (stock de fin de mois de la stratégie optimale)
+def courbes_couts(besoins, frais_approvisionnement, cout_stockage, commandes):
+    besoins = np.asarray(besoins, dtype=np.float64)
+    commandes = np.asarray(commandes, dtype=bool)
+    frais = np.asarray(frais_approvisionnement, dtype=np.float64)[..., None]
+    stockage = np.asarray(cout_stockage, dtype=np.float64)[..., None]
+    n_mois = besoins.shape[-1]
+    forme = besoins.shape[:-1] + (n_mois + 1,)
+
+    # cumul[..., t] = besoins des mois 0..t-1 (cf. sommes_prefixes)
+    cumul = np.zeros(forme)
+    np.cumsum(besoins, axis=-1, out=cumul[..., 1:])
+    total = cumul[..., -1:]
+
+    # mois suivant la commande qui couvre le mois t : prochaine commande après t, ou fin de l'horizon
+    indices = np.broadcast_to(np.arange(n_mois), commandes.shape)
+    prochaine = np.full(forme, n_mois)
+    prochaine[..., :-1] = np.where(commandes, indices, n_mois)
+    prochaine = np.flip(np.minimum.accumulate(np.flip(prochaine, axis=-1), axis=-1), axis=-1)[..., 1:]
+    couvert = np.take_along_axis(cumul, prochaine, axis=-1)  # cabines achetées à la fin du mois t
+
+    quantites = np.where(commandes, couvert - cumul[..., :-1], 0.0)
+    stock = couvert - cumul[..., 1:]
+
+    courbes = {nom: np.zeros(forme) for nom in ("une_fois", "mensuel", "optimale")}
+    # strat 1 : tout au début, puis le stock restant paie le stockage chaque mois
+    np.cumsum((total - cumul[..., 1:]) * stockage, axis=-1, out=courbes["une_fois"][..., 1:])
+    courbes["une_fois"][..., 1:] += frais + total
+    # strat 2 : achats mensuels, jamais de stock
+    courbes["mensuel"][...] = frais * np.arange(n_mois + 1) + cumul
+    # strat 3 : optimale
+    np.cumsum(commandes * frais + quantites + stock * stockage, axis=-1, out=courbes["optimale"][..., 1:])
+
+    courbes["quantites"] = quantites
+    courbes["stock"] = stock
+    return courbes
+
+
+# --- résolution d'un bloc d'articles : même récurrence que wagner_whitin, vectorisée sur les articles ---
+def _resoudre_bloc(besoins, frais, stockage, longueurs):
+    n_articles, n_mois = besoins.shape
+    # sommes préfixes par article (cf. sommes_prefixes)
+    cumul = np.zeros((n_articles, n_mois + 1))
+    cumul_pondere = np.zeros((n_articles, n_mois + 1))
+    np.cumsum(besoins, axis=1, out=cumul[:, 1:])
+    np.cumsum(besoins * np.arange(n_mois), axis=1, out=cumul_pondere[:, 1:])
+
+    frais = frais[:, None]
+    stockage = stockage[:, None]
+    meilleurs = np.zeros((n_articles, n_mois + 1))
+    precedents = np.zeros((n_articles, n_mois + 1), dtype=np.int64)
+    indices = np.arange(n_mois)
+
+    for j in range(1, n_mois + 1):
+        # coût de tous les arcs (i, j), i < j, pour tous les articles à la fois (cf. cout_arc)
+        cout_cabines = cumul[:, j:j + 1] - cumul[:, :j]
+        attente = (cumul_pondere[:, j:j + 1] - cumul_pondere[:, :j]) - indices[:j] * cout_cabines
+        distances = meilleurs[:, :j] + (frais + cout_cabines + attente * stockage)
+        # argmin garde le premier minimum, comme l'inégalité stricte de wagner_whitin
+        meilleur_i = np.argmin(distances, axis=1)
+        precedents[:, j] = meilleur_i
+        meilleurs[:, j] = distances[np.arange(n_articles), meilleur_i]
+
+    lignes = np.arange(n_articles)
+    cout_optimal = meilleurs[lignes, longueurs]
+
+    # reconstruction des chemins de tous les articles en parallèle, depuis leur propre fin d'horizon
+    commandes = np.zeros((n_articles, n_mois), dtype=bool)
+    noeud = longueurs.copy()
+    actifs = noeud > 0
+    while actifs.any():
+        debut = precedents[lignes[actifs], noeud[actifs]]
+        commandes[lignes[actifs], debut] = True
+        noeud[actifs] = debut
+        actifs = noeud > 0
+
+    # stratégies de base, lues à la fin de l'horizon de chaque article (les mois complétés par des zéros
+    # ne coûtent rien en stockage, mais ajouteraient des frais d'approvisionnement aux achats mensuels)
+    courbes = courbes_couts(besoins, frais[:, 0], stockage[:, 0], commandes)
+    directeur_achats = courbes["une_fois"][lignes, longueurs]
+    directeur_financier = courbes["mensuel"][lignes, longueurs]
+
+    return cout_optimal, commandes, directeur_achats, directeur_financier
+
+
+# --- point d'entrée : des milliers d'articles en un appel ---
+# besoins : matrice articles x mois (complétée par des zéros pour les horizons plus courts)
+# frais_approvisionnement, cout_stockage : un scalaire ou un vecteur par article
+# longueurs : horizon de chaque article (par défaut toute la largeur de la matrice)
+# taille_bloc : nombre d'articles traités ensemble, pour borner la mémoire des tableaux intermédiaires
+def resoudre_batch(besoins, frais_approvisionnement, cout_stockage, longueurs=None, taille_bloc=4096):
+    besoins = np.asarray(besoins, dtype=np.float64)
+    if besoins.ndim != 2:
+        raise ValueError("besoins doit être une matrice articles x mois")
+    n_articles, n_mois = besoins.shape
+    frais = np.broadcast_to(np.asarray(frais_approvisionnement, dtype=np.float64), (n_articles,))
+    stockage = np.broadcast_to(np.asarray(cout_stockage, dtype=np.float64), (n_articles,))
+    if longueurs is None:
+        longueurs = np.full(n_articles, n_mois, dtype=np.int64)
+    else:
+        longueurs = np.asarray(longueurs, dtype=np.int64)
+        if longueurs.shape != (n_articles,) or (longueurs < 1).any() or (longueurs > n_mois).any():
+            raise ValueError("longueurs doit donner, pour chaque article, un horizon entre 1 et le nombre de colonnes")
+        # les mois hors horizon ne doivent rien coûter
+        besoins = np.where(np.arange(n_mois) < longueurs[:, None], besoins, 0.0)
+
+    resultats = {
+        "cout_optimal": np.empty(n_articles),
+        "commandes": np.zeros((n_articles, n_mois), dtype=bool),
+        "directeur_achats": np.empty(n_articles),
+        "directeur_financier": np.empty(n_articles),
+    }
+    for debut in range(0, n_articles, taille_bloc):
+        fin = min(debut + taille_bloc, n_articles)
+        bloc = _resoudre_bloc(besoins[debut:fin], frais[debut:fin], stockage[debut:fin], longueurs[debut:fin])
+        resultats["cout_optimal"][debut:fin] = bloc[0]
+        resultats["commandes"][debut:fin] = bloc[1]
+        resultats["directeur_achats"][debut:fin] = bloc[2]
+        resultats["directeur_financier"][debut:fin] = bloc[3]
+    return resultats
+
+
+def tests_batch():
+    print("=== Tests du solveur par lots ===")
+
+    print("Test de resoudre_batch (horizons irréguliers, comparaison avec resoudre article par article):")
+    generateur = np.random.default_rng(0)
+    series = [list(generateur.integers(0, 1000, generateur.integers(1, 30))) for _ in range(300)]
+    frais = generateur.integers(0, 5000, len(series)).astype(float)
+    stockage = generateur.integers(0, 10, len(series)).astype(float)
+    besoins, longueurs = empiler(series)
+    resultats = resoudre_batch(besoins, frais, stockage, longueurs, taille_bloc=64)
+
+    erreurs = 0
+    for k, serie in enumerate(series):
+        distances, precedents, n_mois = resoudre(serie, frais[k], stockage[k])
+        chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
+        autres_couts = calcul_couts_strategies(serie, frais[k], stockage[k])
+        mois_commandes = list(np.flatnonzero(resultats["commandes"][k]))
+        if (resultats["cout_optimal"][k] != distances[n_mois]
+                or mois_commandes != chemin[:-1]
+                or resultats["directeur_achats"][k] != autres_couts["directeur_achats"]
+                or resultats["directeur_financier"][k] != autres_couts["directeur_financier"]):
+            erreurs += 1
+    print(f"Devrait afficher : 0 écart sur {len(series)} articles\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction resoudre_batch bien implémentée")
+    else:
+        print("Fonction resoudre_batch incorrectement implémentée")
+
+    print("\nTest de courbes_couts (comparaison avec le parcours mois par mois, vecteur et matrice):")
+    # ancien calcul de tracer_graphique : on rejoue la stratégie optimale mois par mois
+    def courbe_optimale_naive(installations, frais, stockage, chemin):
+        cout_optimale, quantites, stocks = [0], [], []
+        cout_actuel = stock = 0
+        for i in range(len(installations)):
+            quantite = 0
+            if i in chemin[:-1]:
+                quantite = sum(installations[i:chemin[chemin.index(i) + 1]])
+                cout_actuel += frais + quantite
+            stock += quantite - installations[i]
+            cout_actuel += stock * stockage
+            cout_optimale.append(cout_actuel)
+            quantites.append(quantite)
+            stocks.append(stock)
+        return cout_optimale, quantites, stocks
+
+    erreurs = 0
+    masque = np.zeros(besoins.shape, dtype=bool)
+    for k, serie in enumerate(series[:100]):
+        _, precedents, n_mois = resoudre(serie, frais[k], stockage[k])
+        chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
+        masque[k, chemin[:-1]] = True
+        courbes = courbes_couts(serie, frais[k], stockage[k], masque[k, :n_mois])
+        cout_une_fois, cout_mensuel = calcul_couts_de_base(serie, frais[k], stockage[k])
+        cout_optimale, quantites, stocks = courbe_optimale_naive(serie, frais[k], stockage[k], chemin)
+        if (list(courbes["une_fois"]) != cout_une_fois or list(courbes["mensuel"]) != cout_mensuel
+                or list(courbes["optimale"]) != cout_optimale or list(courbes["quantites"]) != quantites
+                or list(courbes["stock"]) != stocks):
+            erreurs += 1
+    # même calcul sur toute la matrice d'un coup
+    courbes = courbes_couts(besoins[:100], frais[:100], stockage[:100], masque[:100])
+    lignes = np.arange(100)
+    if not np.array_equal(courbes["optimale"][lignes, longueurs[:100]], resultats["cout_optimal"][:100]):
+        erreurs += 1
+    print(f"Devrait afficher : 0 écart sur 100 articles\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction courbes_couts bien implémentée")
+    else:
+        print("Fonction courbes_couts incorrectement implémentée")
+
+    print("\nTest de rapidité de courbes_couts sur 10^6 mois:")
+    besoins_longs = generateur.integers(0, 1000, 1_000_000)
+    debut = time.perf_counter()
+    courbes = courbes_couts(besoins_longs, 2000, 2, np.arange(1_000_000) % 3 == 0)
+    duree = time.perf_counter() - debut
+    print(f"Devrait afficher : moins de 1 s\nAffiche : {duree:.2f} s")
+    if duree < 1:
+        print("Calcul vectorisé bien implémenté")
+    else:
+        print("Calcul vectorisé incorrectement implémenté")
+
+
+if __name__ == "__main__":
+    tests_batch()
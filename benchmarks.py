@@ -0,0 +1,317 @@
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")  # tracer_graphique sans fenêtre
+
+import algos
+
+
+# --- distributions de besoins (reproductibles grâce à la graine) ---
+def besoins_plats(n_mois, generateur):
+    return [500] * n_mois
+
+def besoins_pics(n_mois, generateur):
+    return [5000 if generateur.random() < 0.05 else 100 for _ in range(n_mois)]
+
+def besoins_zeros(n_mois, generateur):
+    return [0 if generateur.random() < 0.7 else generateur.randint(1, 1000) for _ in range(n_mois)]
+
+def besoins_aleatoires(n_mois, generateur):
+    return [generateur.randint(0, 1000) for _ in range(n_mois)]
+
+DISTRIBUTIONS = {
+    "plat": besoins_plats,
+    "pics": besoins_pics,
+    "zeros": besoins_zeros,
+    "aleatoire": besoins_aleatoires,
+}
+
+HORIZONS = (6, 24, 120, 1000, 10000)
+
+# au-delà de ces horizons une étape prend des minutes ou des Go (graphe networkx en n²/2 arcs,
+# boucle quadratique sous tracemalloc) : elle est marquée "ignore" dans le JSON plutôt que mesurée
+LIMITES = {
+    "init_graphe": 1000,
+    "detect_cycle": 1000,
+    "detect_cycle_kahn": 1000,
+    "dijkstra": 1000,
+    "wagner_whitin": 1000,
+    "init_graphe_compact": 5000,  # 8 octets par arc : 100 Mo à 5000 mois
+    "dijkstra_compact": 1000,
+}
+
+# --grands-horizons : les étapes quadratiques en temps mais linéaires en mémoire sont mesurées jusqu'à
+# 10 000 mois, sous un budget de temps par mesure (cf. _mesurer). Restent limitées, par la mémoire cette fois :
+# - le graphe networkx : environ 170 Mio à 1000 mois, en n² (1,5 Go à 3000, 6 Go à 6000, 17 Go à 10 000) ;
+#   aux grands horizons, init_graphe_compact et dijkstra_compact mesurent la même construction et le même Dijkstra
+# - dijkstra_compact : le tas reçoit de l'ordre de n²/2 entrées (500 Mio à 3000 mois, 2 Go à 6000, 5,5 Go à 10 000)
+HORIZONS_ETENDUS = (6, 24, 120, 1000, 6000, 10000)
+LIMITES_ETENDUES = {
+    "init_graphe": 3000,
+    "detect_cycle": 3000,
+    "detect_cycle_kahn": 3000,
+    "dijkstra": 3000,
+    "dijkstra_compact": 6000,
+}
+BUDGET_ETENDU = 120.0  # secondes par mesure (répétitions comprises) ; environ 16 s par wagner_whitin à 10 000 mois
+
+FRAIS_APPROVISIONNEMENT = 2000
+COUT_STOCKAGE = 2
+
+
+# --- les étapes du pipeline : chacune reçoit le contexte (besoins, graphe, précédents...) ---
+def _etape_init_graphe(ctx):
+    ctx["G"], _ = algos.init_graphe(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE)
+
+# graphe d'init_graphe, marqué avant=True : chemin rapide d'ordre_topologique (ce que fait le pipeline)
+def _etape_detect_cycle(ctx):
+    algos.detect_cycle(ctx["G"])
+
+# même graphe sans la marque : parcours de Kahn complet sur les n²/2 arcs (graphes quelconques)
+def _etape_detect_cycle_kahn(ctx):
+    G = ctx["G"]
+    G.graph["avant"] = False
+    try:
+        algos.detect_cycle(G)
+    finally:
+        G.graph["avant"] = True
+
+def _etape_dijkstra(ctx):
+    _, ctx["precedents"] = algos.dijkstra(ctx["G"], 0, ctx["n_mois"])
+
+def _etape_init_graphe_compact(ctx):
+    from arcs import init_graphe_compact
+    ctx["G_compact"], _ = init_graphe_compact(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE)
+
+def _etape_dijkstra_compact(ctx):
+    _, ctx["precedents"] = algos.dijkstra(ctx["G_compact"], 0, ctx["n_mois"])
+
+def _etape_wagner_whitin(ctx):
+    _, ctx["precedents"] = algos.wagner_whitin(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE)
+
+def _etape_wagner_whitin_enveloppe(ctx):
+    _, ctx["precedents"] = algos.wagner_whitin_enveloppe(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE)
+
+def _etape_reconstruct_chemin_graphe(ctx):
+    algos.reconstruct_chemin_graphe(ctx["precedents"], 0, ctx["n_mois"])
+
+def _etape_calcul_couts_de_base(ctx):
+    algos.calcul_couts_de_base(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE)
+
+def _etape_courbes_couts(ctx):
+    from batch import courbes_couts
+    from graphiques import masque_commandes
+    courbes_couts(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE, masque_commandes(ctx["precedents"], ctx["n_mois"]))
+
+def _etape_tracer_graphique(ctx):
+    fig, _ = algos.tracer_graphique(ctx["besoins"], FRAIS_APPROVISIONNEMENT, COUT_STOCKAGE, ctx["precedents"], ctx["n_mois"])
+    import matplotlib.pyplot as plt
+    plt.close(fig)
+
+# dans l'ordre du pipeline : les étapes suivantes réutilisent ce que les précédentes ont mis dans le contexte
+ETAPES = {
+    "init_graphe": _etape_init_graphe,
+    "detect_cycle": _etape_detect_cycle,
+    "detect_cycle_kahn": _etape_detect_cycle_kahn,
+    "dijkstra": _etape_dijkstra,
+    "init_graphe_compact": _etape_init_graphe_compact,
+    "dijkstra_compact": _etape_dijkstra_compact,
+    "wagner_whitin": _etape_wagner_whitin,
+    "wagner_whitin_enveloppe": _etape_wagner_whitin_enveloppe,
+    "reconstruct_chemin_graphe": _etape_reconstruct_chemin_graphe,
+    "calcul_couts_de_base": _etape_calcul_couts_de_base,
+    "courbes_couts": _etape_courbes_couts,
+    "tracer_graphique": _etape_tracer_graphique,
+}
+
+
+# meilleur temps sur plusieurs répétitions, puis pic mémoire sur une exécution séparée
+# (tracemalloc ralentit beaucoup le code, on ne le laisse pas actif pendant la mesure du temps)
+# budget : les répétitions s'arrêtent dès que le temps cumulé le dépasse (au moins une exécution), et le pic
+# mémoire n'est alors pas mesuré (memoire_pic None : tracemalloc multiplierait encore la durée)
+def _mesurer(etape, ctx, repetitions, budget=None):
+    temps = []
+    for _ in range(repetitions):
+        debut = time.perf_counter()
+        etape(ctx)
+        temps.append(time.perf_counter() - debut)
+        if budget is not None and sum(temps) >= budget:
+            break
+    pic = None
+    if budget is None or sum(temps) < budget:
+        tracemalloc.start()
+        etape(ctx)
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"temps_min": min(temps), "temps_median": sorted(temps)[len(temps) // 2], "memoire_pic": pic, "repetitions": len(temps)}
+
+
+# budget (secondes) : une étape dont une seule exécution dépasse le budget n'est plus mesurée aux horizons
+# supérieurs de la même distribution (marquée "ignore", raison "budget")
+def lancer_benchmarks(horizons=HORIZONS, distributions=tuple(DISTRIBUTIONS), etapes=tuple(ETAPES),
+                      repetitions=5, graine=0, limites=LIMITES, verbeux=True, budget=None):
+    resultats = []
+    for nom_distribution in distributions:
+        hors_budget = {}  # étape -> horizon où une exécution a dépassé le budget
+        for n_mois in sorted(horizons):
+            generateur = random.Random(f"{graine}-{nom_distribution}-{n_mois}")
+            ctx = {"besoins": DISTRIBUTIONS[nom_distribution](n_mois, generateur), "n_mois": n_mois}
+            for nom_etape in etapes:
+                if nom_etape not in ETAPES:
+                    raise ValueError(f"Étape inconnue : {nom_etape}")
+                if n_mois > limites.get(nom_etape, float("inf")):
+                    mesure = {"ignore": True, "raison": "limite"}
+                elif n_mois > hors_budget.get(nom_etape, float("inf")):
+                    mesure = {"ignore": True, "raison": "budget"}
+                elif nom_etape in ("detect_cycle", "detect_cycle_kahn", "dijkstra") and "G" not in ctx:
+                    mesure = {"ignore": True, "raison": "graphe absent"}  # le graphe n'a pas été construit
+                elif nom_etape == "dijkstra_compact" and "G_compact" not in ctx:
+                    mesure = {"ignore": True, "raison": "graphe absent"}
+                else:
+                    if nom_etape in ("reconstruct_chemin_graphe", "courbes_couts", "tracer_graphique") and "precedents" not in ctx:
+                        _etape_wagner_whitin_enveloppe(ctx)  # précédents nécessaires, non mesurés
+                    mesure = _mesurer(ETAPES[nom_etape], ctx, repetitions, budget)
+                    if budget is not None and mesure["temps_min"] > budget:
+                        hors_budget[nom_etape] = n_mois
+                mesure.update({"etape": nom_etape, "distribution": nom_distribution, "n_mois": n_mois})
+                resultats.append(mesure)
+                if verbeux and not mesure.get("ignore"):
+                    memoire = "non mesurée" if mesure["memoire_pic"] is None else f"{mesure['memoire_pic'] / 1024:.1f} Kio"
+                    print(f"{nom_distribution:>9} {n_mois:>6} mois  {nom_etape:<26} {mesure['temps_min'] * 1000:10.2f} ms  {memoire:>14}")
+            ctx.clear()  # libère le graphe avant l'horizon suivant
+    return {
+        "environnement": {
+            "python": platform.python_version(),
+            "plateforme": platform.platform(),
+            "version_solveur": algos.VERSION_SOLVEUR,
+        },
+        "parametres": {"repetitions": repetitions, "graine": graine, "budget": budget, "frais_approvisionnement": FRAIS_APPROVISIONNEMENT, "cout_stockage": COUT_STOCKAGE},
+        "resultats": resultats,
+    }
+
+
+# --- comparaison de deux exécutions ---
+# une mesure régresse si le nouveau temps (ou la nouvelle mémoire) dépasse l'ancien de plus de seuil ;
+# en dessous de plancher secondes, le bruit de mesure domine et le temps n'est pas comparé
+def comparer(ancien, nouveau, seuil=0.20, plancher=1e-3):
+    index = {(r["etape"], r["distribution"], r["n_mois"]): r for r in ancien["resultats"] if not r.get("ignore")}
+    comparaisons = []
+    for r in nouveau["resultats"]:
+        cle = (r["etape"], r["distribution"], r["n_mois"])
+        if r.get("ignore") or cle not in index:
+            continue
+        a = index[cle]
+        ratio_temps = r["temps_min"] / a["temps_min"] if a["temps_min"] > 0 else 1.0
+        # pic mémoire non mesuré (budget dépassé) d'un côté ou de l'autre : seul le temps est comparé
+        ratio_memoire = r["memoire_pic"] / a["memoire_pic"] if r["memoire_pic"] is not None and a["memoire_pic"] else 1.0
+        regression_temps = ratio_temps > 1 + seuil and r["temps_min"] > plancher
+        regression_memoire = ratio_memoire > 1 + seuil
+        comparaisons.append({
+            "etape": r["etape"], "distribution": r["distribution"], "n_mois": r["n_mois"],
+            "ratio_temps": ratio_temps, "ratio_memoire": ratio_memoire,
+            "regression": regression_temps or regression_memoire,
+        })
+    return comparaisons
+
+
+def afficher_comparaison(comparaisons):
+    for c in comparaisons:
+        marque = "REGRESSION" if c["regression"] else ""
+        print(f"{c['distribution']:>9} {c['n_mois']:>6} mois  {c['etape']:<26} temps x{c['ratio_temps']:.2f}  mémoire x{c['ratio_memoire']:.2f}  {marque}")
+    n_regressions = sum(c["regression"] for c in comparaisons)
+    print(f"\n{n_regressions} régression(s) sur {len(comparaisons)} mesures comparées")
+    return n_regressions
+
+
+# --- temps d'import et mémoire du noyau (garde-fou : il doit rester léger) ---
+# mesuré dans un processus neuf pour ne pas profiter des modules déjà chargés
+SEUILS_IMPORT = {"temps": 0.05, "rss": 8 * 2**20}
+MODULES_LOURDS = ("networkx", "matplotlib", "numpy", "tkinter")
+
+_CODE_MESURE_IMPORT = """
+import json, os, sys, time
+def rss():
+    try:  # mémoire résidente courante (Linux)
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:  # pic de mémoire résidente (autres Unix)
+            import resource
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:  # Windows
+            return 0
+avant = rss()
+debut = time.perf_counter()
+import {module}
+duree = time.perf_counter() - debut
+print(json.dumps({{"temps": duree, "rss": rss() - avant, "modules": sorted(sys.modules)}}))
+"""
+
+def mesurer_import(module="noyau"):
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    sortie = subprocess.run([sys.executable, "-c", _CODE_MESURE_IMPORT.format(module=module)],
+                            cwd=dossier, capture_output=True, text=True, check=True).stdout
+    mesure = json.loads(sortie)
+    modules = mesure.pop("modules")
+    mesure["lourds"] = [m for m in MODULES_LOURDS if m in modules]
+    return mesure
+
+def verifier_import(module="noyau", seuils=SEUILS_IMPORT):
+    mesure = mesurer_import(module)
+    ok = mesure["temps"] <= seuils["temps"] and mesure["rss"] <= seuils["rss"] and not mesure["lourds"]
+    print(f"import {module} : {mesure['temps'] * 1000:.1f} ms, +{mesure['rss'] / 2**20:.1f} Mio, modules lourds chargés : {mesure['lourds'] or 'aucun'}"
+          f" -> {'OK' if ok else 'TROP LOURD'} (seuils {seuils['temps'] * 1000:.0f} ms, {seuils['rss'] / 2**20:.0f} Mio)")
+    return ok
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks des étapes de algos.py")
+    parser.add_argument("--sortie", help="fichier JSON où écrire les résultats")
+    parser.add_argument("--horizons", type=int, nargs="+", default=None,
+                        help=f"par défaut {' '.join(map(str, HORIZONS))} ({' '.join(map(str, HORIZONS_ETENDUS))} avec --grands-horizons)")
+    parser.add_argument("--distributions", nargs="+", default=list(DISTRIBUTIONS), choices=list(DISTRIBUTIONS))
+    parser.add_argument("--etapes", nargs="+", default=list(ETAPES), choices=list(ETAPES))
+    parser.add_argument("--repetitions", type=int, default=5)
+    parser.add_argument("--graine", type=int, default=0)
+    parser.add_argument("--comparer", nargs=2, metavar=("ANCIEN", "NOUVEAU"), help="compare deux fichiers JSON de résultats")
+    parser.add_argument("--import", dest="import_", action="store_true", help="vérifie le temps d'import et la mémoire de noyau.py")
+    parser.add_argument("--grands-horizons", action="store_true",
+                        help="mesure aussi les étapes quadratiques jusqu'à 10 000 mois (graphe networkx : 3000, dijkstra_compact : 6000), sous --budget")
+    parser.add_argument("--budget", type=float, default=None,
+                        help=f"secondes par mesure ; au-delà, l'étape n'est plus mesurée aux horizons supérieurs ({BUDGET_ETENDU:.0f} avec --grands-horizons)")
+    parser.add_argument("--seuil", type=float, default=0.20, help="ralentissement relatif toléré (0.20 = 20 %%)")
+    args = parser.parse_args(arguments)
+
+    if args.import_:
+        ok = all([verifier_import("noyau"), verifier_import("algos")])
+        return 0 if ok else 1
+
+    if args.comparer:
+        with open(args.comparer[0]) as f:
+            ancien = json.load(f)
+        with open(args.comparer[1]) as f:
+            nouveau = json.load(f)
+        return 1 if afficher_comparaison(comparer(ancien, nouveau, args.seuil)) else 0
+
+    if args.grands_horizons:
+        horizons, limites, budget = HORIZONS_ETENDUS, LIMITES_ETENDUES, BUDGET_ETENDU
+    else:
+        horizons, limites, budget = HORIZONS, LIMITES, None
+    rapport = lancer_benchmarks(args.horizons or horizons, args.distributions, args.etapes, args.repetitions, args.graine,
+                                limites, budget=args.budget if args.budget is not None else budget)
+    if args.sortie:
+        with open(args.sortie, "w") as f:
+            json.dump(rapport, f, indent=2)
+        print(f"\nRésultats écrits dans {args.sortie}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
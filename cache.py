@@ -0,0 +1,248 @@
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+import noyau
+
+
+# --- empreinte du modèle de coûts ---
+# version déclarée du solveur + code des fonctions qui définissent les coûts :
+# modifier l'une ou l'autre change toutes les clés, les anciennes entrées ne sont plus jamais lues
+# coûts par mois et remises : leur modèle (coût d'arc de CoutsVariables, paliers, les deux DP) en fait partie
+FONCTIONS_MODELE = (
+    noyau.sommes_prefixes, noyau.cout_arc, noyau.calcul_couts_de_base,
+    noyau.couts_variables, noyau.paliers_remises, noyau.CoutsVariables,
+    noyau._dp_variable, noyau._enveloppe_variable, noyau.wagner_whitin_variable,
+)
+
+
+def empreinte_modele(fonctions=FONCTIONS_MODELE):
+    empreinte = hashlib.sha256(f"version={noyau.VERSION_SOLVEUR}".encode())
+    for fonction in fonctions:
+        try:
+            empreinte.update(inspect.getsource(fonction).encode())
+        except (OSError, TypeError):
+            empreinte.update(fonction.__name__.encode())
+    return empreinte.hexdigest()[:16]
+
+
+# clé stable : même entrée -> même clé, d'un processus à l'autre
+# frais et stockage peuvent être des listes (un coût par mois) ; sans remises, la clé est la même qu'avant leur ajout
+def cle_resultat(installations, frais_approvisionnement, cout_stockage, methode, modele, remises=None):
+    entree = [list(installations), frais_approvisionnement, cout_stockage, methode, modele]
+    if remises is not None:
+        entree.append([list(palier) for palier in remises])
+    contenu = json.dumps(entree, separators=(",", ":"))
+    return hashlib.sha256(contenu.encode()).hexdigest()
+
+
+# résultats stockés sous forme de listes [[noeud, valeur], ...] (les clés JSON ne peuvent pas être des entiers)
+def _encoder(distances, precedents, n_mois):
+    return json.dumps([sorted(distances.items()), sorted(precedents.items()), n_mois], separators=(",", ":"))
+
+
+def _decoder(texte):
+    distances, precedents, n_mois = json.loads(texte)
+    return dict(distances), dict(precedents), n_mois
+
+
+# --- cache de résultats : LRU en mémoire + stockage sqlite optionnel ---
+# capacite : nombre d'entrées gardées en mémoire
+# chemin_disque : fichier sqlite (None = mémoire seulement)
+# taille_max_disque : au-delà (en octets de résultats), les entrées les moins récemment lues sont supprimées
+class CacheResultats:
+    def __init__(self, capacite=256, chemin_disque=None, taille_max_disque=64 * 2**20, modele=None):
+        self.capacite = capacite
+        self.taille_max_disque = taille_max_disque
+        self.modele = modele or empreinte_modele()
+        self.memoire = OrderedDict()
+        self.verrou = threading.Lock()
+        self.stats = {"hits_memoire": 0, "hits_disque": 0, "misses": 0, "evictions_memoire": 0, "evictions_disque": 0}
+        self.connexion = None
+        if chemin_disque is not None:
+            self.connexion = sqlite3.connect(chemin_disque, check_same_thread=False)
+            self.connexion.execute(
+                "CREATE TABLE IF NOT EXISTS resultats (cle TEXT PRIMARY KEY, modele TEXT, valeur TEXT, taille INTEGER, acces REAL)"
+            )
+            # entrées d'un autre modèle de coûts : inutilisables, on les supprime à l'ouverture
+            self.connexion.execute("DELETE FROM resultats WHERE modele != ?", (self.modele,))
+            self.connexion.commit()
+
+    def _lire(self, cle):
+        if cle in self.memoire:
+            self.memoire.move_to_end(cle)
+            self.stats["hits_memoire"] += 1
+            return self.memoire[cle]
+        if self.connexion is not None:
+            ligne = self.connexion.execute("SELECT valeur FROM resultats WHERE cle = ?", (cle,)).fetchone()
+            if ligne is not None:
+                self.connexion.execute("UPDATE resultats SET acces = ? WHERE cle = ?", (time.time(), cle))
+                self.connexion.commit()
+                self.stats["hits_disque"] += 1
+                self._garder_en_memoire(cle, ligne[0])
+                return ligne[0]
+        self.stats["misses"] += 1
+        return None
+
+    def _garder_en_memoire(self, cle, valeur):
+        self.memoire[cle] = valeur
+        self.memoire.move_to_end(cle)
+        while len(self.memoire) > self.capacite:
+            self.memoire.popitem(last=False)
+            self.stats["evictions_memoire"] += 1
+
+    def _ecrire(self, cle, valeur):
+        self._garder_en_memoire(cle, valeur)
+        if self.connexion is None:
+            return
+        self.connexion.execute("INSERT OR REPLACE INTO resultats VALUES (?, ?, ?, ?, ?)",
+                               (cle, self.modele, valeur, len(valeur), time.time()))
+        total = self.connexion.execute("SELECT COALESCE(SUM(taille), 0) FROM resultats").fetchone()[0]
+        if total > self.taille_max_disque:
+            for cle_ancienne, taille in self.connexion.execute("SELECT cle, taille FROM resultats ORDER BY acces").fetchall():
+                if total <= self.taille_max_disque:
+                    break
+                self.connexion.execute("DELETE FROM resultats WHERE cle = ?", (cle_ancienne,))
+                total -= taille
+                self.stats["evictions_disque"] += 1
+        self.connexion.commit()
+
+    # même signature et même retour que noyau.resoudre ; solveur permet de brancher un autre
+    # calcul en cas de miss (ex. le PlanificateurIncremental de l'interface)
+    def resoudre(self, installations, frais_approvisionnement, cout_stockage, methode="dp", solveur=None, remises=None):
+        cle = cle_resultat(installations, frais_approvisionnement, cout_stockage, methode, self.modele, remises)
+        with self.verrou:
+            valeur = self._lire(cle)
+        if valeur is not None:
+            return _decoder(valeur)
+
+        if solveur is None:
+            distances, precedents, n_mois = noyau.resoudre(installations, frais_approvisionnement, cout_stockage, methode, remises)
+        else:
+            distances, precedents, n_mois = solveur()
+        with self.verrou:
+            self._ecrire(cle, _encoder(distances, precedents, n_mois))
+        return distances, precedents, n_mois
+
+    def statistiques(self):
+        with self.verrou:
+            stats = dict(self.stats)
+            stats["entrees_memoire"] = len(self.memoire)
+            if self.connexion is not None:
+                n, taille = self.connexion.execute("SELECT COUNT(*), COALESCE(SUM(taille), 0) FROM resultats").fetchone()
+                stats["entrees_disque"] = n
+                stats["taille_disque"] = taille
+        hits = stats["hits_memoire"] + stats["hits_disque"]
+        total = hits + stats["misses"]
+        stats["taux_hits"] = hits / total if total else 0.0
+        return stats
+
+    def vider(self):
+        with self.verrou:
+            self.memoire.clear()
+            if self.connexion is not None:
+                self.connexion.execute("DELETE FROM resultats")
+                self.connexion.commit()
+
+    def fermer(self):
+        if self.connexion is not None:
+            self.connexion.close()
+            self.connexion = None
+
+
+# cache partagé par algos.main() et l'interface (en mémoire seulement)
+cache_par_defaut = CacheResultats()
+
+
+def tests_cache():
+    print("=== Tests du cache de résultats ===")
+    installations, frais_approvisionnement, cout_stockage = noyau.load_data()
+
+    print("Test des hits / misses:")
+    cache = CacheResultats(capacite=2)
+    attendu = noyau.resoudre(installations, frais_approvisionnement, cout_stockage)
+    premier = cache.resoudre(installations, frais_approvisionnement, cout_stockage)
+    second = cache.resoudre(installations, frais_approvisionnement, cout_stockage)
+    stats = cache.statistiques()
+    print(f"Devrait afficher : 1 miss, 1 hit, résultats identiques\nAffiche : {stats['misses']} miss, {stats['hits_memoire']} hit, résultats identiques {premier == second == attendu}")
+    if stats["misses"] == 1 and stats["hits_memoire"] == 1 and premier == second == attendu:
+        print("Cache mémoire bien implémenté")
+    else:
+        print("Cache mémoire incorrectement implémenté")
+
+    print("\nTest de l'éviction LRU:")
+    cache.resoudre(installations, frais_approvisionnement + 1, cout_stockage)
+    cache.resoudre(installations, frais_approvisionnement + 2, cout_stockage)  # évince la plus ancienne
+    stats = cache.statistiques()
+    print(f"Devrait afficher : 2 entrées, 1 éviction\nAffiche : {stats['entrees_memoire']} entrées, {stats['evictions_memoire']} éviction")
+    if stats["entrees_memoire"] == 2 and stats["evictions_memoire"] == 1:
+        print("Éviction LRU bien implémentée")
+    else:
+        print("Éviction LRU incorrectement implémentée")
+
+    print("\nTest des coûts par mois et des remises (clés distinctes, résultats de noyau.resoudre):")
+    cache = CacheResultats()
+    frais_par_mois = [frais_approvisionnement * (1 + m % 2) for m in range(len(installations))]
+    remises = [[0, 1.0], [300, 0.9]]
+    variantes = [(frais_approvisionnement, None), (frais_par_mois, None), (frais_approvisionnement, remises), (frais_par_mois, remises)]
+    identiques = all(cache.resoudre(installations, frais, cout_stockage, remises=r) == noyau.resoudre(installations, frais, cout_stockage, remises=r)
+                     for frais, r in variantes)
+    relus = [cache.resoudre(installations, frais, cout_stockage, remises=r) for frais, r in variantes]
+    differents = len({str(resultat) for resultat in relus}) == len(variantes)
+    stats = cache.statistiques()
+    print(f"Devrait afficher : 4 miss, 4 hits, [True, True]\nAffiche : {stats['misses']} miss, {stats['hits_memoire']} hits, {[identiques, differents]}")
+    if stats["misses"] == 4 and stats["hits_memoire"] == 4 and identiques and differents:
+        print("Cache avec remises bien implémenté")
+    else:
+        print("Cache avec remises incorrectement implémenté")
+
+    print("\nTest de l'empreinte du modèle (coûts par mois et remises compris):")
+    sans_variables = empreinte_modele(FONCTIONS_MODELE[:3])
+    resultat = [empreinte_modele() == empreinte_modele(), empreinte_modele() != sans_variables,
+                noyau.CoutsVariables in FONCTIONS_MODELE and noyau.paliers_remises in FONCTIONS_MODELE]
+    print(f"Devrait afficher : [True, True, True]\nAffiche : {resultat}")
+    if all(resultat):
+        print("Fonction empreinte_modele bien implémentée")
+    else:
+        print("Fonction empreinte_modele incorrectement implémentée")
+
+    print("\nTest du stockage disque (persistance, taille maximale, changement de modèle):")
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "cache.sqlite")
+        cache = CacheResultats(chemin_disque=chemin)
+        cache.resoudre(installations, frais_approvisionnement, cout_stockage)
+        cache.fermer()
+
+        cache = CacheResultats(chemin_disque=chemin)
+        relu = cache.resoudre(installations, frais_approvisionnement, cout_stockage)
+        persiste = cache.statistiques()["hits_disque"] == 1 and relu == attendu
+        taille_une_entree = cache.statistiques()["taille_disque"]
+        cache.fermer()
+
+        cache = CacheResultats(chemin_disque=chemin, taille_max_disque=2 * taille_une_entree)
+        for k in range(5):
+            cache.resoudre(installations, frais_approvisionnement + k, cout_stockage)
+        borne = cache.statistiques()["entrees_disque"] == 2
+        cache.fermer()
+
+        cache = CacheResultats(chemin_disque=chemin, modele="autre modele")
+        invalide = cache.statistiques()["entrees_disque"] == 0
+        cache.resoudre(installations, frais_approvisionnement, cout_stockage)
+        invalide = invalide and cache.statistiques()["misses"] == 1
+        cache.fermer()
+
+    print(f"Devrait afficher : [True, True, True]\nAffiche : {[persiste, borne, invalide]}")
+    if persiste and borne and invalide:
+        print("Stockage disque bien implémenté")
+    else:
+        print("Stockage disque incorrectement implémenté")
+
+
+if __name__ == "__main__":
+    tests_cache()
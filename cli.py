@@ -0,0 +1,334 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from itertools import islice
+
+import noyau
+from batch import resoudre_batch, empiler
+
+
+# --- lecture par blocs : chaque ligne est une série {id, installations, frais_approvisionnement, cout_stockage} ---
+# format "large" (CSV, Parquet) : une colonne id, des colonnes frais_approvisionnement / cout_stockage
+# optionnelles, toutes les autres colonnes sont les mois dans l'ordre (cellules vides en fin = horizon plus court)
+# JSONL : {"id": ..., "installations": [...], "frais_approvisionnement": ..., "cout_stockage": ...}
+#   frais_approvisionnement / cout_stockage peuvent y être des listes (une valeur par mois), et "remises"
+#   une liste de paliers [[quantité minimale, prix unitaire], ...] (cf. noyau.CoutsVariables)
+# une ligne illisible ne coupe pas la lecture : elle devient une série vide portant "erreur" (cf. _serie_erreur),
+# écrite en sortie comme une ligne d'erreur
+COLONNES_PARAMETRES = ("id", "frais_approvisionnement", "cout_stockage")
+
+
+def _nombre(texte):
+    try:
+        valeur = float(texte)
+    except ValueError:
+        raise ValueError(f"valeur non numérique : {texte!r}") from None
+    return int(valeur) if valeur.is_integer() else valeur
+
+
+def _serie_erreur(identifiant, message):
+    return {"id": identifiant, "installations": [], "erreur": message}
+
+
+def _serie_large(numero, ligne, colonnes_mois):
+    besoins = [ligne[c] for c in colonnes_mois]
+    while besoins and besoins[-1] in ("", None):
+        besoins.pop()
+    if any(b in ("", None) for b in besoins):
+        raise ValueError("mois vide au milieu de la série")
+    return {
+        "id": ligne.get("id", numero),
+        "installations": [_nombre(b) if isinstance(b, str) else b for b in besoins],
+        "frais_approvisionnement": ligne.get("frais_approvisionnement"),
+        "cout_stockage": ligne.get("cout_stockage"),
+    }
+
+
+def lire_csv(chemin):
+    with open(chemin, newline="") as f:
+        lecteur = csv.DictReader(f)
+        if lecteur.fieldnames is None:
+            return  # fichier vide : aucune série
+        colonnes_mois = [c for c in lecteur.fieldnames if c not in COLONNES_PARAMETRES]
+        for numero, ligne in enumerate(lecteur, start=1):
+            try:
+                serie = _serie_large(numero, ligne, colonnes_mois)
+                for cle in ("frais_approvisionnement", "cout_stockage"):
+                    if serie[cle] not in ("", None):
+                        serie[cle] = _nombre(serie[cle])
+                    else:
+                        serie[cle] = None
+            except ValueError as erreur:
+                serie = _serie_erreur(ligne.get("id") or numero, f"Ligne {numero} : {erreur}")
+            yield serie
+
+
+def lire_jsonl(chemin):
+    with open(chemin) as f:
+        for numero, ligne in enumerate(f, start=1):
+            if ligne.strip():
+                try:
+                    serie = json.loads(ligne)
+                except ValueError as erreur:
+                    yield _serie_erreur(numero, f"Ligne {numero} : JSON invalide ({erreur})")
+                    continue
+                if not isinstance(serie, dict):
+                    yield _serie_erreur(numero, f"Ligne {numero} : objet JSON attendu")
+                    continue
+                serie.setdefault("id", numero)
+                yield serie
+
+
+def lire_parquet(chemin, taille_bloc):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("La lecture des fichiers Parquet nécessite pyarrow (pip install pyarrow)")
+    fichier = pq.ParquetFile(chemin)
+    colonnes = fichier.schema_arrow.names
+    colonnes_mois = [c for c in colonnes if c not in COLONNES_PARAMETRES]
+    numero = 0
+    for lot in fichier.iter_batches(batch_size=taille_bloc):
+        for ligne in lot.to_pylist():
+            numero += 1
+            if "installations" in ligne:  # colonne liste
+                ligne.setdefault("id", numero)
+                yield ligne
+            else:
+                try:
+                    yield _serie_large(numero, ligne, colonnes_mois)
+                except ValueError as erreur:
+                    yield _serie_erreur(ligne.get("id") or numero, f"Ligne {numero} : {erreur}")
+
+
+def lire_series(chemin, taille_bloc):
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension == ".csv":
+        return lire_csv(chemin)
+    if extension in (".jsonl", ".ndjson"):
+        return lire_jsonl(chemin)
+    if extension in (".parquet", ".pq"):
+        return lire_parquet(chemin, taille_bloc)
+    raise SystemExit(f"Format d'entrée non reconnu : {extension} (attendu : .csv, .jsonl, .parquet)")
+
+
+# --- résolution d'un bloc de séries ---
+def resoudre_bloc(series, frais_defaut, stockage_defaut, methode):
+    frais = [s["frais_approvisionnement"] if s.get("frais_approvisionnement") is not None else frais_defaut for s in series]
+    stockage = [s["cout_stockage"] if s.get("cout_stockage") is not None else stockage_defaut for s in series]
+    remises = [s.get("remises") for s in series]
+    for s in series:
+        if not s["installations"]:
+            raise ValueError(f"Série {s['id']} : aucun mois")
+    # le solveur par lots ne connaît que des frais et un stockage scalaires : bloc résolu série par série sinon
+    if methode == "batch" and any(noyau.couts_variables(f, h, r) for f, h, r in zip(frais, stockage, remises)):
+        methode = "dp"
+
+    if methode == "batch":
+        besoins, longueurs = empiler([s["installations"] for s in series])
+        r = resoudre_batch(besoins, frais, stockage, longueurs)
+        for k, s in enumerate(series):
+            yield s["id"], r["cout_optimal"][k], [int(m) for m in r["commandes"][k].nonzero()[0]], r["directeur_achats"][k], r["directeur_financier"][k]
+    else:
+        for k, s in enumerate(series):
+            distances, precedents, n_mois = noyau.resoudre(s["installations"], frais[k], stockage[k], methode, remises[k])
+            chemin = noyau.reconstruct_chemin_graphe(precedents, 0, n_mois)
+            autres_couts = noyau.calcul_couts_strategies(s["installations"], frais[k], stockage[k], remises[k])
+            yield s["id"], distances[n_mois], chemin[:-1], autres_couts["directeur_achats"], autres_couts["directeur_financier"]
+
+
+CHAMPS_SORTIE = ("id", "cout_optimal", "mois_commandes", "directeur_achats", "directeur_financier",
+                 "economie_vs_achats", "economie_vs_financier", "erreur")
+
+
+def ligne_sortie(identifiant, cout_optimal, mois_commandes, directeur_achats, directeur_financier):
+    return {
+        "id": identifiant,
+        "cout_optimal": float(cout_optimal),
+        "mois_commandes": [m + 1 for m in mois_commandes],  # numérotés à partir de 1, comme dans les rapports
+        "directeur_achats": float(directeur_achats),
+        "directeur_financier": float(directeur_financier),
+        "economie_vs_achats": float(directeur_achats - cout_optimal),
+        "economie_vs_financier": float(directeur_financier - cout_optimal),
+    }
+
+
+def ligne_erreur(identifiant, message):
+    return {"id": identifiant, "erreur": message}
+
+
+# erreurs dues aux données d'une série (valeurs non numériques, listes de mauvaise longueur, méthode
+# incompatible...) : elles donnent une ligne d'erreur au lieu d'arrêter tout le traitement
+ERREURS_SERIE = (ValueError, TypeError, KeyError)
+
+
+# comme resoudre_bloc, mais renvoie les lignes de sortie dans l'ordre des séries, avec une ligne d'erreur
+# pour chaque série invalide (les autres séries du bloc sont résolues normalement)
+def lignes_bloc(series, frais_defaut, stockage_defaut, methode):
+    erreurs = {}
+    for position, serie in enumerate(series):
+        if serie.get("erreur") is not None:
+            erreurs[position] = serie["erreur"]
+        elif not serie.get("installations"):
+            erreurs[position] = f"Série {serie.get('id')} : aucun mois"
+    valides = [serie for position, serie in enumerate(series) if position not in erreurs]
+    try:
+        resultats = list(resoudre_bloc(valides, frais_defaut, stockage_defaut, methode))
+    except ERREURS_SERIE:
+        # au moins une série invalide dans le bloc : on reprend série par série pour ne perdre qu'elle
+        resultats = []
+        for serie in valides:
+            try:
+                resultats.extend(resoudre_bloc([serie], frais_defaut, stockage_defaut, methode))
+            except ERREURS_SERIE as erreur:
+                resultats.append(f"Série {serie['id']} : {erreur}")
+    resultats = iter(resultats)
+    for position, serie in enumerate(series):
+        if position in erreurs:
+            yield ligne_erreur(serie.get("id"), erreurs[position])
+            continue
+        resultat = next(resultats)
+        yield ligne_erreur(serie["id"], resultat) if isinstance(resultat, str) else ligne_sortie(*resultat)
+
+
+# --- boucle principale : lecture, résolution et écriture bloc par bloc (mémoire bornée par taille_bloc) ---
+def traiter(entree, sortie, frais_defaut=2000, stockage_defaut=2, methode="batch", taille_bloc=10_000,
+            journal=sys.stderr, intervalle_journal=5.0):
+    extension = os.path.splitext(sortie)[1].lower()
+    if extension not in (".csv", ".jsonl", ".ndjson"):
+        raise SystemExit(f"Format de sortie non reconnu : {extension} (attendu : .csv, .jsonl)")
+    series = lire_series(entree, taille_bloc)
+    debut = time.perf_counter()
+    dernier_journal = debut
+    n_lignes = 0
+    n_erreurs = 0
+
+    with open(sortie, "w", newline="") as f:
+        ecrivain = None
+        if extension == ".csv":
+            ecrivain = csv.DictWriter(f, fieldnames=CHAMPS_SORTIE)
+            ecrivain.writeheader()
+        while True:
+            bloc = list(islice(series, taille_bloc))
+            if not bloc:
+                break
+            for ligne in lignes_bloc(bloc, frais_defaut, stockage_defaut, methode):
+                if "erreur" in ligne:
+                    n_erreurs += 1
+                    if journal is not None:
+                        print(f"Erreur : {ligne['erreur']}", file=journal)
+                if ecrivain is not None:
+                    if "mois_commandes" in ligne:
+                        ligne["mois_commandes"] = ";".join(str(m) for m in ligne["mois_commandes"])
+                    ecrivain.writerow(ligne)
+                else:
+                    f.write(json.dumps(ligne) + "\n")
+            n_lignes += len(bloc)
+            f.flush()
+            maintenant = time.perf_counter()
+            if journal is not None and maintenant - dernier_journal >= intervalle_journal:
+                print(f"{n_lignes} lignes, {n_lignes / (maintenant - debut):,.0f} lignes/s", file=journal)
+                dernier_journal = maintenant
+
+    duree = time.perf_counter() - debut
+    debit = n_lignes / duree if duree > 0 else 0.0
+    if journal is not None:
+        print(f"Terminé : {n_lignes} lignes en {duree:.2f} s ({debit:,.0f} lignes/s), {n_erreurs} en erreur", file=journal)
+    return n_lignes, debit
+
+
+def tests_cli():
+    print("=== Tests de la ligne de commande ===")
+    with tempfile.TemporaryDirectory() as dossier:
+        entree_csv = os.path.join(dossier, "series.csv")
+        with open(entree_csv, "w") as f:
+            f.write("id,frais_approvisionnement,cout_stockage,m1,m2,m3,m4\n"
+                    "A,,,200,200,300,700\n"   # frais et stockage par défaut
+                    "B,500,1,10,0,500,20\n"
+                    "C,,,1000,,,\n"           # horizon plus court (cellules vides en fin)
+                    "D,,,5,6\n"               # ligne plus courte que l'en-tête
+                    "E,,,100,,300,\n"         # mois vide au milieu : ligne d'erreur
+                    "F,,,abc,1,2,3\n"         # valeur non numérique : ligne d'erreur
+                    "G,3000,2,1,2,3,4\n")
+        series = [([200, 200, 300, 700], 2000, 2), ([10, 0, 500, 20], 500, 1), ([1000], 2000, 2), ([5, 6], 2000, 2),
+                  None, None, ([1, 2, 3, 4], 3000, 2)]
+        attendus = []
+        for serie in series:
+            if serie is None:
+                attendus.append(None)
+                continue
+            distances, precedents, n_mois = noyau.resoudre(*serie)
+            attendus.append((distances[n_mois], [m + 1 for m in noyau.reconstruct_chemin_graphe(precedents, 0, n_mois)[:-1]]))
+
+        print("Test de traiter (CSV -> CSV, frais et stockage par défaut, lignes irrégulières, lignes d'erreur):")
+        sortie_csv = os.path.join(dossier, "resultats.csv")
+        n_lignes, _ = traiter(entree_csv, sortie_csv, methode="batch", taille_bloc=3, journal=None)
+        with open(sortie_csv, newline="") as f:
+            lignes = list(csv.DictReader(f))
+        obtenus = [None if l["erreur"] else (float(l["cout_optimal"]), [int(m) for m in l["mois_commandes"].split(";")]) for l in lignes]
+        identifiants = [l["id"] for l in lignes]
+        print(f"Devrait afficher : {attendus}, 7 lignes\nAffiche : {obtenus}, {n_lignes} lignes")
+        if obtenus == attendus and identifiants == list("ABCDEFG") and n_lignes == 7:
+            print("Fonction traiter (CSV) bien implémentée")
+        else:
+            print("Fonction traiter (CSV) incorrectement implémentée")
+
+        print("\nTest de traiter (JSONL -> JSONL, série vide, JSON invalide, méthodes batch et dp identiques):")
+        entree_jsonl = os.path.join(dossier, "series.jsonl")
+        with open(entree_jsonl, "w") as f:
+            for identifiant, serie in zip("ABCDEFG", series):
+                if serie is None:
+                    f.write(json.dumps({"id": identifiant, "installations": []}) + "\n" if identifiant == "E" else "{pas du json\n")
+                else:
+                    installations, frais, stockage = serie
+                    f.write(json.dumps({"id": identifiant, "installations": installations, "frais_approvisionnement": frais,
+                                        "cout_stockage": stockage}) + "\n")
+        resultats = {}
+        for methode in ("batch", "dp"):
+            sortie_jsonl = os.path.join(dossier, f"resultats_{methode}.jsonl")
+            traiter(entree_jsonl, sortie_jsonl, methode=methode, taille_bloc=4, journal=None)
+            with open(sortie_jsonl) as f:
+                resultats[methode] = [json.loads(l) for l in f]
+        obtenus = [None if "erreur" in l else (l["cout_optimal"], l["mois_commandes"]) for l in resultats["batch"]]
+        print(f"Devrait afficher : {attendus}, batch = dp\nAffiche : {obtenus}, batch = dp {resultats['batch'] == resultats['dp']}")
+        if obtenus == attendus and resultats["batch"] == resultats["dp"] and resultats["batch"][5]["id"] == 6:
+            print("Fonction traiter (JSONL) bien implémentée")
+        else:
+            print("Fonction traiter (JSONL) incorrectement implémentée")
+
+        print("\nTest d'un fichier CSV vide:")
+        vide = os.path.join(dossier, "vide.csv")
+        open(vide, "w").close()
+        n_lignes, _ = traiter(vide, os.path.join(dossier, "vide_resultats.csv"), journal=None)
+        print(f"Devrait afficher : 0 ligne\nAffiche : {n_lignes} ligne(s)")
+        if n_lignes == 0:
+            print("Lecture d'un fichier vide bien implémentée")
+        else:
+            print("Lecture d'un fichier vide incorrectement implémentée")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="CostGraph sans interface : résout des séries de besoins en masse")
+    parser.add_argument("entree", nargs="?", help="fichier .csv, .jsonl ou .parquet (une série par ligne)")
+    parser.add_argument("sortie", nargs="?", help="fichier .csv ou .jsonl de résultats")
+    parser.add_argument("--frais", type=float, default=2000, help="frais d'approvisionnement si la colonne est absente")
+    parser.add_argument("--stockage", type=float, default=2, help="coût de stockage si la colonne est absente")
+    parser.add_argument("--methode", default="batch", choices=("batch",) + noyau.METHODES)
+    parser.add_argument("--taille-bloc", type=int, default=10_000, help="nombre de séries lues et résolues à la fois")
+    parser.add_argument("--tests", action="store_true", help="lance les tests du module")
+    args = parser.parse_args(arguments)
+    if args.tests:
+        tests_cli()
+        return 0
+    if args.entree is None or args.sortie is None:
+        parser.error("entree et sortie sont obligatoires")
+    traiter(args.entree, args.sortie, args.frais, args.stockage, args.methode, args.taille_bloc)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from batch import courbes_couts
+from noyau import reconstruct_chemin_graphe
+
+
+COULEUR_BASE = '#c9c1bc'
+COULEUR_OPTIMALE = '#ef7645'
+POINTS_MAX = 2000  # points gardés par courbe de coûts cumulés
+ETIQUETTES_MAX = 40  # au-delà, les quantités ne sont plus écrites au-dessus des commandes
+MARQUEURS_MAX = 60  # au-delà, les courbes sont tracées sans marqueurs
+
+COURBES = (
+    ("mensuel", "Achats mensuels", "o", "-"),
+    ("une_fois", "Achat en une fois", "x", "--"),
+    ("optimale", "Méthode optimale", "s", "-"),
+)
+
+
+# sous-échantillonnage min/max : par paquet de points, on garde le premier, le dernier, le minimum et
+# le maximum, ce qui conserve l'allure de la courbe (sauts compris) avec au plus points_max points
+def reduire_courbe(x, y, points_max=POINTS_MAX):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) <= points_max:
+        return x, y
+    n_paquets = max(1, points_max // 4)
+    bornes = np.linspace(0, len(y), n_paquets + 1).astype(np.int64)
+    debuts, fins = bornes[:-1], bornes[1:] - 1
+    minimums = np.array([d + np.argmin(y[d:f + 1]) for d, f in zip(debuts, fins)])
+    maximums = np.array([d + np.argmax(y[d:f + 1]) for d, f in zip(debuts, fins)])
+    indices = np.unique(np.concatenate([debuts, fins, minimums, maximums]))
+    return x[indices], y[indices]
+
+
+# masque des mois de commande du chemin optimal (format de courbes_couts et de resoudre_batch)
+def masque_commandes(precedents, n_mois):
+    commandes = np.zeros(n_mois, dtype=bool)
+    commandes[reconstruct_chemin_graphe(precedents, 0, n_mois)[:-1]] = True
+    return commandes
+
+
+# calcul de tout ce qu'il faut afficher (peut tourner hors du thread Tk : aucun objet matplotlib ici)
+def preparer_donnees(installations, frais_approvisionnement, cout_stockage, precedents, n_mois, points_max=POINTS_MAX):
+    commandes = masque_commandes(precedents, n_mois)
+    courbes = courbes_couts(installations[:n_mois], frais_approvisionnement, cout_stockage, commandes)
+    mois = np.arange(n_mois + 1)
+    mois_commandes = np.flatnonzero(commandes)
+    return {
+        "n_mois": n_mois,
+        "courbes": {nom: reduire_courbe(mois, courbes[nom], points_max) for nom in ("mensuel", "une_fois", "optimale")},
+        "cout_max": max(float(courbes[nom].max()) for nom in ("mensuel", "une_fois", "optimale")),
+        "mois_commandes": mois_commandes + 1,  # mois numérotés à partir de 1, comme dans les rapports
+        "quantites": courbes["quantites"][mois_commandes],
+    }
+
+
+# borne "ronde" (1, 1.2, 1.5, 2, 2.5, ... x 10^k) au-dessus de valeur : tant que les coûts restent dans
+# la même tranche, les limites des axes ne bougent pas et on peut redessiner par blitting
+def _limite_ronde(valeur):
+    if valeur <= 0:
+        return 1.0
+    puissance = 10 ** math.floor(math.log10(valeur))
+    for facteur in (1, 1.2, 1.5, 2, 2.5, 3, 4, 5, 6, 8, 10):
+        if valeur <= facteur * puissance:
+            return float(facteur * puissance)
+
+
+# --- composant graphique réutilisable ---
+# les axes et les artistes sont créés une seule fois ; chaque analyse ne fait que changer leurs données.
+# blit=True (interface) : les artistes qui changent sont "animés" ; si un fond a déjà été mémorisé pour les
+# limites des axes (et la taille de la figure), on le restaure et on ne redessine qu'eux (canvas.blit), sinon
+# on redessine tout. fonds_max : nombre de fonds gardés (un par jeu de limites, le plus ancien est oublié).
+class GraphiquesResultats:
+    def __init__(self, fig=None, blit=False, fonds_max=1):
+        if fig is None:
+            from matplotlib.figure import Figure
+            fig = Figure(figsize=(12, 12))
+        self.fig = fig
+        self.blit = blit
+        self.fonds = {}
+        self.fonds_max = fonds_max
+        self.limites = None
+        self.ax_couts, self.ax_commandes = fig.subplots(2, 1)
+
+        # graphique 1: comparaison des évolutions des coûts
+        self.courbes = {}
+        for cle, label, marqueur, style in COURBES:
+            couleur = COULEUR_OPTIMALE if cle == "optimale" else COULEUR_BASE
+            self.courbes[cle], = self.ax_couts.plot([], [], label=label, color=couleur, linestyle=style,
+                                                    marker=marqueur, animated=blit)
+        self.marqueurs = {cle: marqueur for cle, _, marqueur, _ in COURBES}
+        self.ax_couts.set_xlabel('Mois')
+        self.ax_couts.set_ylabel('Coût total (€)')
+        self.ax_couts.set_title("Comparaison des stratégies d'approvisionnement")
+        self.ax_couts.legend(loc='upper left')
+        self.ax_couts.grid(True)
+
+        # graphique 2: achats optimaux, un trait vertical par commande
+        self.commandes = self.ax_commandes.vlines([], [], [], color=COULEUR_OPTIMALE, label='Commandes optimales',
+                                                  animated=blit)
+        self.etiquettes = []  # réserve de textes, réutilisés d'une analyse à l'autre
+        self.supplementaires = []  # artistes ajoutés par l'appelant (titre d'un rapport...), redessinés avec les autres
+        self.ax_commandes.set_xlabel('Mois')
+        self.ax_commandes.set_ylabel('Nombre de cabines')
+        self.ax_commandes.set_title('Stratégie optimale: Quantités commandées par mois')
+        self.ax_commandes.legend(loc='upper right')
+        self.ax_commandes.grid(True, axis='y')
+        for ax in (self.ax_couts, self.ax_commandes):
+            ax.set_autoscale_on(False)
+            ax.xaxis.get_major_locator().set_params(integer=True)
+
+        if blit:
+            self.fig.canvas.mpl_connect("draw_event", self._sur_dessin)
+
+    def artistes(self):
+        return list(self.courbes.values()) + [self.commandes] + self.etiquettes + self.supplementaires
+
+    # artiste dont l'appelant change le contenu à chaque analyse : animé comme les autres en mode blit
+    def ajouter_artiste(self, artiste):
+        artiste.set_animated(self.blit)
+        self.supplementaires.append(artiste)
+        return artiste
+
+    # après chaque dessin complet : mémoriser le fond (sans les artistes animés), puis les dessiner par-dessus
+    def _sur_dessin(self, event):
+        cle = (self.limites, tuple(self.fig.bbox.size))
+        self.fonds.pop(cle, None)
+        self.fonds[cle] = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        while len(self.fonds) > self.fonds_max:
+            del self.fonds[next(iter(self.fonds))]
+        self._dessiner_artistes()
+
+    def _dessiner_artistes(self):
+        for artiste in self.artistes():
+            if artiste.get_visible():
+                self.fig.draw_artist(artiste)
+
+    # met à jour les données ; renvoie True si les limites des axes ont changé (dessin complet nécessaire)
+    def mettre_a_jour(self, donnees):
+        n_mois = donnees["n_mois"]
+        for cle, (x, y) in donnees["courbes"].items():
+            self.courbes[cle].set_data(x, y)
+            self.courbes[cle].set_marker(self.marqueurs[cle] if n_mois <= MARQUEURS_MAX else "None")
+
+        mois_commandes, quantites = donnees["mois_commandes"], donnees["quantites"]
+        self.commandes.set_segments([[(m, 0), (m, q)] for m, q in zip(mois_commandes, quantites)])
+        # épaisseur des traits : environ 80 % de la largeur d'un mois, en points
+        largeur_axe = self.ax_commandes.get_window_extent().width * 72 / self.fig.dpi
+        self.commandes.set_linewidth(min(40.0, max(1.0, 0.8 * largeur_axe / max(n_mois, 1))))
+
+        quantite_max = float(quantites.max()) if len(quantites) else 0.0
+        avec_etiquettes = len(quantites) <= ETIQUETTES_MAX
+        while avec_etiquettes and len(self.etiquettes) < len(quantites):
+            self.etiquettes.append(self.ax_commandes.text(0, 0, "", ha='center', va='bottom', fontsize=10,
+                                                          animated=self.blit))
+        for k, etiquette in enumerate(self.etiquettes):
+            visible = avec_etiquettes and k < len(quantites)
+            etiquette.set_visible(visible)
+            if visible:
+                etiquette.set_position((mois_commandes[k], quantites[k] + 0.02 * quantite_max))
+                etiquette.set_text(f"{quantites[k]:g}")
+
+        limites = (n_mois, _limite_ronde(donnees["cout_max"]), _limite_ronde(quantite_max * 1.1))
+        changees = limites != self.limites
+        if changees:
+            self.limites = limites
+            self.ax_couts.set_xlim(0, max(n_mois, 1))
+            self.ax_couts.set_ylim(0, limites[1])
+            self.ax_commandes.set_xlim(0.5, max(n_mois, 1) + 0.5)
+            self.ax_commandes.set_ylim(0, limites[2])
+        return changees
+
+    # mise à jour + rendu : blitting si un fond est mémorisé pour ces limites, sinon dessin complet
+    def afficher(self, donnees):
+        self.mettre_a_jour(donnees)
+        canvas = self.fig.canvas
+        fond = self.fonds.get((self.limites, tuple(self.fig.bbox.size)))
+        if not self.blit or fond is None:
+            canvas.draw_idle()
+            return "complet"
+        canvas.restore_region(fond)
+        self._dessiner_artistes()
+        canvas.blit(self.fig.bbox)
+        return "blit"
+
+
+def tests_graphiques():
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from noyau import load_data, resoudre
+    print("=== Tests des graphiques ===")
+    installations, frais_approvisionnement, cout_stockage = load_data()
+
+    print("Test de preparer_donnees (coût final = coût optimal, commandes du chemin optimal):")
+    distances, precedents, n_mois = resoudre(installations, frais_approvisionnement, cout_stockage)
+    donnees = preparer_donnees(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
+    chemin = reconstruct_chemin_graphe(precedents, 0, n_mois)
+    resultat = [float(donnees["courbes"]["optimale"][1][-1]), float(donnees["quantites"].sum()), [int(m) - 1 for m in donnees["mois_commandes"]]]
+    attendu = [distances[n_mois], sum(installations), chemin[:-1]]
+    print(f"Devrait afficher : {attendu}\nAffiche : {resultat}")
+    if resultat == attendu:
+        print("Fonction preparer_donnees bien implémentée")
+    else:
+        print("Fonction preparer_donnees incorrectement implémentée")
+
+    print("\nTest de reduire_courbe (taille, extrémités, minimum et maximum conservés):")
+    generateur = np.random.default_rng(0)
+    y = np.cumsum(generateur.integers(-5, 10, 10_000))
+    x_reduit, y_reduit = reduire_courbe(np.arange(len(y)), y, 400)
+    resultat = [bool(len(y_reduit) <= 400), bool(x_reduit[0] == 0), bool(x_reduit[-1] == len(y) - 1),
+                bool(y_reduit.min() == y.min()), bool(y_reduit.max() == y.max())]
+    print(f"Devrait afficher : [True, True, True, True, True]\nAffiche : {resultat}")
+    if all(resultat):
+        print("Fonction reduire_courbe bien implémentée")
+    else:
+        print("Fonction reduire_courbe incorrectement implémentée")
+
+    print("\nTest de GraphiquesResultats (blitting, mémoire stable sur 300 analyses, 10 000 mois):")
+    graphiques = GraphiquesResultats(blit=True)
+    FigureCanvasAgg(graphiques.fig)  # les callbacks (draw_event) sont portés par la figure : ils suivent le canvas
+    donnees = preparer_donnees(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
+    modes = [graphiques.afficher(donnees)]
+    graphiques.fig.canvas.draw()
+    # mêmes limites (petite variation des besoins) : pas de dessin complet
+    installations_bis = list(installations)
+    installations_bis[0] += 1
+    _, precedents_bis, _ = resoudre(installations_bis, frais_approvisionnement, cout_stockage)
+    modes.append(graphiques.afficher(preparer_donnees(installations_bis, frais_approvisionnement, cout_stockage, precedents_bis, n_mois)))
+
+    # les artistes sont réutilisés : ni leur nombre ni la mémoire ne grandissent avec les analyses
+    series = [list(generateur.integers(0, 1000, generateur.integers(1, 120))) for _ in range(300)]
+    donnees_series = []
+    for serie in series:
+        _, precedents_serie, n_serie = resoudre(serie, frais_approvisionnement, cout_stockage)
+        donnees_series.append(preparer_donnees(serie, frais_approvisionnement, cout_stockage, precedents_serie, n_serie))
+    tracemalloc.start()
+    for k, donnees_serie in enumerate(donnees_series):
+        graphiques.mettre_a_jour(donnees_serie)
+        if k == 49:
+            memoire_debut = tracemalloc.get_traced_memory()[0]
+    croissance = tracemalloc.get_traced_memory()[0] - memoire_debut
+    tracemalloc.stop()
+    n_artistes = len(graphiques.fig.get_children()) + sum(len(ax.get_children()) for ax in graphiques.fig.axes)
+
+    grand = list(generateur.integers(0, 1000, 10_000))
+    _, precedents_grand, n_grand = resoudre(grand, frais_approvisionnement, cout_stockage, "enveloppe")
+    debut = time.perf_counter()
+    graphiques.afficher(preparer_donnees(grand, frais_approvisionnement, cout_stockage, precedents_grand, n_grand))
+    graphiques.fig.canvas.draw()
+    duree = time.perf_counter() - debut
+    n_artistes_apres = len(graphiques.fig.get_children()) + sum(len(ax.get_children()) for ax in graphiques.fig.axes)
+
+    print(f"Devrait afficher : ['complet', 'blit'], croissance mémoire < 0.1 Mio, artistes constants, 10 000 mois en moins de 2 s")
+    print(f"Affiche : {modes}, croissance mémoire {croissance / 2**20:.2f} Mio, artistes {n_artistes} -> {n_artistes_apres}, 10 000 mois en {duree:.2f} s")
+    if modes == ["complet", "blit"] and croissance < 0.1 * 2**20 and n_artistes_apres <= n_artistes and duree < 2:
+        print("Classe GraphiquesResultats bien implémentée")
+    else:
+        print("Classe GraphiquesResultats incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_graphiques()
@@ -0,0 +1,313 @@
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+# --- instrumentation des étapes d'une résolution ---
+# une Resolution regroupe les étapes d'un calcul (construction du graphe, détection de cycles, plus court
+# chemin, reconstruction, stratégies de base, graphiques...) ; pour chaque étape : temps réel, temps CPU du
+# thread qui l'exécute et, si tracemalloc est actif, pic d'allocations. Coût : quelques microsecondes par
+# étape sans tracemalloc, on peut la laisser active en permanence.
+# Une Resolution n'est pas liée à un thread : l'interface la crée dans le thread Tk, le calcul remplit
+# ses étapes dans le thread de la tâche, puis le thread Tk ajoute l'affichage et la termine.
+
+# json et tracemalloc ne sont importés qu'au besoin (environ 15 ms à l'import, cf. benchmarks.py --import) ;
+# tracemalloc ne peut être actif que s'il a été importé, ou démarré par PYTHONTRACEMALLOC / -X tracemalloc
+def _tracemalloc_actif():
+    module = sys.modules.get("tracemalloc")
+    if module is None and (os.environ.get("PYTHONTRACEMALLOC") or "tracemalloc" in sys._xoptions):
+        import tracemalloc as module
+    return module if module is not None and module.is_tracing() else None
+
+
+class Resolution:
+    def __init__(self, instrumentation, etiquettes):
+        self.instrumentation = instrumentation
+        self.etiquettes = etiquettes
+        self.etapes = []
+        self.infos = {}  # ex. taille du graphe (noeuds, arcs)
+        self.statut = None  # à remplir pour une sortie anticipée sans exception (ex. "erreur" sur un graphe invalide)
+        self.debut = time.time()
+        self.debut_chrono = time.perf_counter()
+
+    @contextmanager
+    def etape(self, nom, **infos):
+        tracemalloc = _tracemalloc_actif()
+        if tracemalloc is not None:
+            memoire_debut = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()  # pic global : les étapes concurrentes de plusieurs threads se mélangent
+        debut_cpu = time.thread_time()
+        debut = time.perf_counter()
+        try:
+            yield self
+        finally:
+            mesure = {"etape": nom, "temps": time.perf_counter() - debut, "cpu": time.thread_time() - debut_cpu}
+            if tracemalloc is not None:
+                mesure["memoire_pic"] = max(0, tracemalloc.get_traced_memory()[1] - memoire_debut)
+            mesure.update(infos)
+            self.etapes.append(mesure)
+
+    def noter(self, **infos):
+        self.infos.update(infos)
+
+    def en_dict(self):
+        return {
+            "debut": self.debut,
+            "duree": self.duree,
+            "etiquettes": dict(self.etiquettes),
+            "infos": dict(self.infos),
+            "etapes": list(self.etapes),
+        }
+
+
+def _echapper(valeur):
+    return str(valeur).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Instrumentation:
+    # historique : nombre de résolutions détaillées gardées ; les totaux par étape, eux, portent sur tout
+    # memoire=True démarre tracemalloc (sinon la mémoire n'est mesurée que s'il est déjà actif,
+    # ex. PYTHONTRACEMALLOC=1) : il ralentit nettement les calculs, à réserver au diagnostic
+    def __init__(self, historique=256, memoire=False, prefixe="costgraph"):
+        self.historique = deque(maxlen=historique)
+        self.prefixe = prefixe
+        self.hooks = []
+        self.verrou = threading.Lock()
+        self.totaux = {}
+        self.resolutions = {}
+        self.infos_recentes = {}  # dernière valeur observée de chaque info (taille du graphe, nombre de mois)
+        self.locale = threading.local()
+        if memoire:
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    # --- API ---
+    def demarrer(self, **etiquettes):
+        return Resolution(self, etiquettes)
+
+    # statut : "termine", "annule" ou "erreur" (compté à part dans les totaux)
+    def terminer(self, resolution, statut="termine"):
+        resolution.duree = time.perf_counter() - resolution.debut_chrono
+        resolution.etiquettes.setdefault("statut", statut)
+        enregistrement = resolution.en_dict()
+        with self.verrou:
+            self.historique.append(enregistrement)
+            self.resolutions[statut] = self.resolutions.get(statut, 0) + 1
+            self.infos_recentes.update(enregistrement["infos"])
+            for mesure in enregistrement["etapes"]:
+                total = self.totaux.setdefault(mesure["etape"], {"appels": 0, "temps": 0.0, "cpu": 0.0, "memoire_pic": 0})
+                total["appels"] += 1
+                total["temps"] += mesure["temps"]
+                total["cpu"] += mesure["cpu"]
+                total["memoire_pic"] = max(total["memoire_pic"], mesure.get("memoire_pic", 0))
+            hooks = list(self.hooks)
+        for hook in hooks:
+            hook(enregistrement)
+        return enregistrement
+
+    # with instrumentation.resolution(methode="dp") as r: with r.etape("plus_court_chemin"): ...
+    @contextmanager
+    def resolution(self, **etiquettes):
+        resolution = self.demarrer(**etiquettes)
+        precedente = getattr(self.locale, "courante", None)
+        self.locale.courante = resolution
+        statut = "termine"
+        try:
+            yield resolution
+        except BaseException:
+            statut = "erreur"
+            raise
+        finally:
+            self.locale.courante = precedente
+            self.terminer(resolution, statut if statut == "erreur" else resolution.statut or statut)
+
+    # étape de la résolution en cours dans ce thread ; hors résolution, l'étape est enregistrée seule
+    @contextmanager
+    def etape(self, nom, **infos):
+        resolution = getattr(self.locale, "courante", None)
+        if resolution is not None:
+            with resolution.etape(nom, **infos):
+                yield resolution
+        else:
+            with self.resolution() as resolution:
+                with resolution.etape(nom, **infos):
+                    yield resolution
+
+    # hook(enregistrement) est appelé à la fin de chaque résolution (hors verrou)
+    def ajouter_hook(self, hook):
+        with self.verrou:
+            self.hooks.append(hook)
+
+    def retirer_hook(self, hook):
+        with self.verrou:
+            self.hooks.remove(hook)
+
+    def derniere(self):
+        with self.verrou:
+            return self.historique[-1] if self.historique else None
+
+    def vider(self):
+        with self.verrou:
+            self.historique.clear()
+            self.totaux.clear()
+            self.resolutions.clear()
+            self.infos_recentes.clear()
+
+    # --- exports ---
+    def exporter_json(self, indent=None):
+        import json
+        with self.verrou:
+            contenu = {
+                "resolutions": dict(self.resolutions),
+                "totaux": {nom: dict(total) for nom, total in self.totaux.items()},
+                "historique": list(self.historique),
+            }
+        return json.dumps(contenu, indent=indent, ensure_ascii=False)
+
+    # format texte de Prometheus (exposition) : compteurs cumulés par étape + dernière taille de graphe observée
+    def exporter_prometheus(self):
+        p = self.prefixe
+        with self.verrou:
+            totaux = {nom: dict(total) for nom, total in self.totaux.items()}
+            resolutions = dict(self.resolutions)
+            infos = dict(self.infos_recentes)
+
+        lignes = [
+            f"# HELP {p}_resolutions_total Nombre de résolutions terminées, par statut.",
+            f"# TYPE {p}_resolutions_total counter",
+        ]
+        lignes += [f'{p}_resolutions_total{{statut="{_echapper(statut)}"}} {n}' for statut, n in sorted(resolutions.items())]
+        metriques = (
+            ("etape_appels_total", "counter", "appels", "Nombre d'exécutions de l'étape."),
+            ("etape_secondes_total", "counter", "temps", "Temps réel cumulé passé dans l'étape."),
+            ("etape_cpu_secondes_total", "counter", "cpu", "Temps CPU cumulé (thread de l'étape)."),
+            ("etape_memoire_pic_octets", "gauge", "memoire_pic", "Plus grand pic d'allocations observé (tracemalloc)."),
+        )
+        for nom, type_metrique, cle, aide in metriques:
+            lignes += [f"# HELP {p}_{nom} {aide}", f"# TYPE {p}_{nom} {type_metrique}"]
+            lignes += [f'{p}_{nom}{{etape="{_echapper(etape)}"}} {total[cle]!r}' for etape, total in sorted(totaux.items())]
+        for cle in ("noeuds", "arcs", "mois"):
+            if cle in infos:
+                lignes += [f"# HELP {p}_derniere_{cle} Dernière valeur observée ({cle}).",
+                           f"# TYPE {p}_derniere_{cle} gauge",
+                           f"{p}_derniere_{cle} {infos[cle]}"]
+        return "\n".join(lignes) + "\n"
+
+
+# instance partagée par l'interface et algos.main()
+instrumentation_par_defaut = Instrumentation()
+
+
+# résumé lisible d'un enregistrement (console, superposition de l'interface)
+def resume(enregistrement):
+    lignes = []
+    for mesure in enregistrement["etapes"]:
+        ligne = f"{mesure['etape']:<28} {mesure['temps'] * 1000:9.2f} ms  CPU {mesure['cpu'] * 1000:9.2f} ms"
+        if "memoire_pic" in mesure:
+            ligne += f"  pic {mesure['memoire_pic'] / 1024:9.1f} Kio"
+        lignes.append(ligne)
+    infos = ", ".join(f"{cle}={valeur}" for cle, valeur in enregistrement["infos"].items())
+    lignes.append(f"{'total':<28} {enregistrement['duree'] * 1000:9.2f} ms" + (f"  ({infos})" if infos else ""))
+    return "\n".join(lignes)
+
+
+def tests_instrumentation():
+    import json
+    import tracemalloc
+    print("=== Tests de l'instrumentation ===")
+
+    print("Test des étapes, des hooks et des totaux:")
+    instrumentation = Instrumentation()
+    recus = []
+    instrumentation.ajouter_hook(recus.append)
+    for _ in range(2):
+        with instrumentation.resolution(methode="dp") as resolution:
+            with instrumentation.etape("construction"):
+                sum(range(10_000))
+            with resolution.etape("plus_court_chemin"):
+                resolution.noter(noeuds=7, arcs=21)
+    try:
+        with instrumentation.resolution():
+            with instrumentation.etape("construction"):
+                raise ValueError("erreur de test")
+    except ValueError:
+        pass
+    with instrumentation.resolution() as resolution:
+        resolution.statut = "erreur"  # abandon sans exception
+    totaux = json.loads(instrumentation.exporter_json())
+    resultat = [len(recus), [m["etape"] for m in recus[0]["etapes"]], recus[0]["infos"], totaux["resolutions"], totaux["totaux"]["construction"]["appels"]]
+    attendu = [4, ["construction", "plus_court_chemin"], {"noeuds": 7, "arcs": 21}, {"termine": 2, "erreur": 2}, 3]
+    print(f"Devrait afficher : {attendu}\nAffiche : {resultat}")
+    if resultat == attendu:
+        print("Classe Instrumentation bien implémentée")
+    else:
+        print("Classe Instrumentation incorrectement implémentée")
+
+    print("\nTest d'une résolution partagée entre deux threads:")
+    resolution = instrumentation.demarrer(source="interface")
+    def calcul():
+        with resolution.etape("calcul"):
+            sum(range(10_000))
+    thread = threading.Thread(target=calcul)
+    thread.start()
+    thread.join()
+    with resolution.etape("affichage"):
+        pass
+    enregistrement = instrumentation.terminer(resolution)
+    resultat = [m["etape"] for m in enregistrement["etapes"]] + [enregistrement["etiquettes"]["statut"]]
+    print(f"Devrait afficher : ['calcul', 'affichage', 'termine']\nAffiche : {resultat}")
+    if resultat == ["calcul", "affichage", "termine"]:
+        print("Méthodes demarrer / terminer bien implémentées")
+    else:
+        print("Méthodes demarrer / terminer incorrectement implémentées")
+
+    print("\nTest de l'export Prometheus:")
+    texte = instrumentation.exporter_prometheus()
+    attendues = ['costgraph_resolutions_total{statut="termine"} 3', 'costgraph_etape_appels_total{etape="construction"} 3',
+                 "costgraph_derniere_arcs 21"]
+    presentes = [ligne in texte.splitlines() for ligne in attendues]
+    # format d'exposition : chaque ligne est un commentaire ou "nom{etiquettes} valeur"
+    valides = all(ligne.startswith("#") or len(ligne.rsplit(" ", 1)) == 2 and float(ligne.rsplit(" ", 1)[1]) >= 0
+                  for ligne in texte.splitlines())
+    print(f"Devrait afficher : [True, True, True] True\nAffiche : {presentes} {valides}")
+    if all(presentes) and valides:
+        print("Export Prometheus bien implémenté")
+    else:
+        print("Export Prometheus incorrectement implémenté")
+
+    print("\nTest du pic mémoire (tracemalloc):")
+    tracemalloc.start()
+    with instrumentation.etape("allocation") as resolution:
+        bloc = bytearray(4 * 2**20)
+        del bloc
+    tracemalloc.stop()
+    pic = resolution.etapes[-1].get("memoire_pic", 0)
+    print(f"Devrait afficher : pic d'au moins 4 Mio\nAffiche : pic de {pic / 2**20:.2f} Mio")
+    if pic >= 4 * 2**20:
+        print("Mesure de la mémoire bien implémentée")
+    else:
+        print("Mesure de la mémoire incorrectement implémentée")
+
+    print("\nTest du surcoût (sans tracemalloc):")
+    instrumentation = Instrumentation(historique=16)
+    n = 20_000
+    debut = time.perf_counter()
+    for _ in range(n // 4):
+        with instrumentation.resolution() as resolution:
+            for nom in ("graphe", "cycles", "chemin", "strategies"):
+                with resolution.etape(nom):
+                    pass
+    par_etape = (time.perf_counter() - debut) / n
+    print(f"Devrait afficher : moins de 20 µs par étape\nAffiche : {par_etape * 1e6:.1f} µs par étape")
+    if par_etape < 20e-6:
+        print("Surcoût de l'instrumentation correct")
+    else:
+        print("Surcoût de l'instrumentation trop élevé")
+
+
+if __name__ == "__main__":
+    tests_instrumentation()
@@ -1,13 +1,21 @@
 import tkinter as tk
 from pathlib import Path 
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from ttkthemes import ThemedTk
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 from PIL import Image, ImageTk
 
+from cache import cache_par_defaut
+from sensibilite import tracer_sensibilite, tables_par_nombre_commandes
+from taches import TacheDeFond
+from graphiques import GraphiquesResultats, preparer_donnees
+from instrumentation import instrumentation_par_defaut, resume
+from arcs import init_graphe_compact
+from saisie import lire_valeurs, lire_fichier_besoins, valider_besoins, valeurs_par_defaut
 
-from algos import detect_cycle, dijkstra, reconstruct_chemin_graphe, init_graphe, calcul_couts_strategies, tracer_graphique
+
+from algos import detect_cycle, dijkstra, PlanificateurIncremental, reconstruct_chemin_graphe, init_graphe, calcul_couts_strategies, sommes_prefixes, quantite_commande, cout_arc
 
 # --- Fonctions de navigation ---
 
@@ -60,6 +68,150 @@ def create_scrollable_frame(parent):
 
     return scrollable_frame, canvas
 
+# --- Grille de saisie virtualisée ---
+# seules les lignes visibles existent (Label + Entry) : au défilement, on recopie dans ces widgets
+# les valeurs des mois affichés. Les valeurs saisies sont gardées dans la liste valeurs (une chaîne
+# par mois), partagée avec l'appelant ; sur_taille(n) est appelé quand un collage allonge l'horizon.
+class GrilleBesoins(ttk.Frame):
+    def __init__(self, parent, valeurs, lignes_visibles=10, sur_taille=None):
+        super().__init__(parent)
+        self.valeurs = valeurs
+        self.lignes_visibles = lignes_visibles
+        self.sur_taille = sur_taille
+        self.premiere = 0  # mois affiché sur la première ligne
+        self.invalides = set()
+        self.en_remplissage = False  # vrai pendant la recopie : les modifications ne viennent pas de l'utilisateur
+
+        self.lignes = []
+        for k in range(lignes_visibles):
+            label = ttk.Label(self, width=12, anchor=tk.E)
+            label.grid(row=k, column=0, padx=(0, 5), pady=2, sticky=tk.E)
+            variable = tk.StringVar()
+            entry = ttk.Entry(self, textvariable=variable, width=10)
+            entry.grid(row=k, column=1, pady=2)
+            variable.trace_add("write", lambda *_, k=k: self._modifier(k))
+            entry.bind("<<Paste>>", lambda e, k=k: self._coller(k))
+            entry.bind("<Down>", lambda e, k=k: self._deplacer(k, 1))
+            entry.bind("<Return>", lambda e, k=k: self._deplacer(k, 1))
+            entry.bind("<Up>", lambda e, k=k: self._deplacer(k, -1))
+            entry.bind("<Next>", lambda e, k=k: self._deplacer(k, lignes_visibles))
+            entry.bind("<Prior>", lambda e, k=k: self._deplacer(k, -lignes_visibles))
+            self.lignes.append((label, variable, entry))
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._defiler)
+        self.scrollbar.grid(row=0, column=2, rowspan=lignes_visibles, sticky="ns", padx=(5, 0))
+        # nombre de widgets fixe : les liaisons de la molette ne dépendent pas de l'horizon
+        gestionnaire_scroll(self, self._molette)
+        self.rafraichir()
+
+    # recopie les valeurs des mois visibles dans les widgets
+    def rafraichir(self):
+        n_mois = len(self.valeurs)
+        self.premiere = max(0, min(self.premiere, n_mois - self.lignes_visibles))
+        self.en_remplissage = True
+        for k, (label, variable, entry) in enumerate(self.lignes):
+            m = self.premiere + k
+            if m < n_mois:
+                label.config(text=f"Mois {m+1}:")
+                entry.config(state="normal", foreground="red" if m in self.invalides else "")
+                variable.set(self.valeurs[m])
+            else:
+                label.config(text="")
+                variable.set("")
+                entry.config(state="disabled")
+        self.en_remplissage = False
+        if n_mois:
+            self.scrollbar.set(self.premiere / n_mois, min(1.0, (self.premiere + self.lignes_visibles) / n_mois))
+
+    def _modifier(self, k):
+        m = self.premiere + k
+        if self.en_remplissage or m >= len(self.valeurs):
+            return
+        self.valeurs[m] = self.lignes[k][1].get()
+        if m in self.invalides:
+            self.invalides.discard(m)
+            self.lignes[k][2].config(foreground="")
+
+    def _defiler(self, action, quantite, unite=None):
+        if action == "moveto":
+            self.premiere = int(float(quantite) * len(self.valeurs))
+        elif unite == "pages":
+            self.premiere += int(quantite) * self.lignes_visibles
+        else:
+            self.premiere += int(quantite)
+        self.rafraichir()
+
+    def _molette(self, event):
+        if event.num == 5 or event.delta < 0:
+            self._defiler("scroll", 3)
+        elif event.num == 4 or event.delta > 0:
+            self._defiler("scroll", -3)
+        return "break"
+
+    # flèches / Entrée / pages : le focus reste sur le même mois, la grille défile si besoin
+    def _deplacer(self, k, pas):
+        self.aller_a(self.premiere + k + pas)
+        return "break"
+
+    def aller_a(self, m):
+        m = max(0, min(m, len(self.valeurs) - 1))
+        if not self.premiere <= m < self.premiere + self.lignes_visibles:
+            self.premiere = m if m < self.premiere else m - self.lignes_visibles + 1
+            self.rafraichir()
+        entry = self.lignes[m - self.premiere][2]
+        entry.focus_set()
+        entry.icursor(tk.END)
+
+    # collage de plusieurs valeurs (colonne ou ligne de tableur) : remplit les mois à partir de celui-ci
+    def _coller(self, k):
+        try:
+            texte = self.clipboard_get()
+        except tk.TclError:
+            return None
+        valeurs = lire_valeurs(texte)
+        if len(valeurs) <= 1:
+            return None  # collage ordinaire dans le champ
+        self.remplacer(self.premiere + k, valeurs)
+        return "break"
+
+    def remplacer(self, debut, valeurs):
+        fin = debut + len(valeurs)
+        if fin > len(self.valeurs):
+            self.valeurs.extend([""] * (fin - len(self.valeurs)))
+            if self.sur_taille is not None:
+                self.sur_taille(len(self.valeurs))
+        self.valeurs[debut:fin] = valeurs
+        self.invalides.difference_update(range(debut, fin))
+        self.rafraichir()
+
+    def marquer_invalides(self, invalides):
+        self.invalides = set(invalides)
+        self.rafraichir()
+
+# --- Analyse en arrière-plan ---
+
+# étapes affichées dans la barre de progression
+ETAPES_EXPLICATION = ("Construction du graphe", "Détection de cycles", "Plus court chemin (Dijkstra)", "Stratégies de base", "Graphiques")
+ETAPES_RAPIDES = ("Optimisation", "Stratégies de base", "Graphiques")
+INTERVALLE_SUIVI_MS = 50
+MAX_MOIS = 10_000
+# au-delà, le graphe networkx devient trop gros (environ 200 Mo à 1000 mois) : le mode explication
+# passe au stockage compact des arcs (arcs.py, 8 octets par arc)
+SEUIL_GRAPHE_COMPACT = 1000
+# même compact, Dijkstra en Python reste quadratique (environ 15 s à 3000 mois)
+MAX_MOIS_EXPLICATION = 3000
+# au-delà, le solveur en temps linéaire remplace le planificateur incrémental (quadratique)
+SEUIL_ENVELOPPE = 1000
+# l'analyse de sensibilité garde des tables (mois x mois) : environ 16 Mo à 1000 mois
+MAX_MOIS_SENSIBILITE = 1000
+TEXTE_SENSIBILITE = "Analyse de sensibilité (frais / stockage)"
+ETAPE_SENSIBILITE = "Tables de sensibilité"
+
+
+# erreur à montrer telle quelle à l'utilisateur (cycle, pas de chemin...)
+class ErreurAnalyse(Exception):
+    pass
+
 # --- Classe principale ---
 
 class CostGraph:
@@ -75,9 +227,22 @@ class CostGraph:
         self.root.iconphoto(False, self.logo_img)
 
         self.installations = []
+        # valeurs saisies à l'étape 2 (chaînes), gardées d'un passage à l'autre
+        self.valeurs_saisies = []
         self.frais_approvisionnement = tk.DoubleVar(value=2000)
         self.cout_stockage = tk.DoubleVar(value=2)
         self.nb_mois = tk.IntVar(value=6)
+        # mode explication : passe par le graphe networkx + dijkstra (plus lent)
+        self.mode_explication = tk.BooleanVar(value=False)
+        # profil de l'analyse (temps par étape) affiché dans l'onglet Résultats
+        self.afficher_profil = tk.BooleanVar(value=False)
+        # tables du dernier calcul, réutilisées si seuls quelques mois changent
+        self.planificateur = None
+        # analyse en cours dans un thread (une seule à la fois)
+        self.tache = None
+        # tables de sensibilité en cours de calcul dans un thread, et le bouton qui les lance ou les annule
+        self.tache_sensibilite = None
+        self.bouton_sensibilite = None
 
         style = ttk.Style()
         self.default_bg = style.lookup('TFrame', 'background')
@@ -96,6 +261,19 @@ class CostGraph:
         self.notebook.add(self.tab_results, text="Résultats")
         self.scrollable_results_frame, self.results_canvas = create_scrollable_frame(self.tab_results)
 
+        # zones de l'onglet Résultats : le texte et les boutons sont reconstruits à chaque analyse, les
+        # graphiques sont créés une seule fois puis mis à jour (mémoire stable sur une longue session)
+        self.resultats_texte_frame = ttk.Frame(self.scrollable_results_frame)
+        self.resultats_texte_frame.pack(fill=tk.BOTH, expand=True)
+        self.graphiques_frame = ttk.LabelFrame(self.scrollable_results_frame, text="Graphiques")
+        self.sensibilite_frame = ttk.LabelFrame(self.scrollable_results_frame, text="Sensibilité du coût optimal")
+        self.profil_frame = ttk.LabelFrame(self.scrollable_results_frame, text="Profil de l'analyse")
+        self.profil_texte = None
+        self.resultats_boutons_frame = ttk.Frame(self.scrollable_results_frame)
+        self.resultats_boutons_frame.pack(fill=tk.X)
+        self.graphiques = None
+        self.figure_sensibilite = None
+
         self.frame_step1_content = None
         self.frame_step2_content = None
 
@@ -107,9 +285,14 @@ class CostGraph:
         self.frame_step2_content = None
 
     def vider_resultats_tab(self):
-        if hasattr(self, 'scrollable_results_frame') and self.scrollable_results_frame:
-             for widget in self.scrollable_results_frame.winfo_children():
-                 widget.destroy()
+        for frame in (self.resultats_texte_frame, self.resultats_boutons_frame):
+            for widget in frame.winfo_children():
+                widget.destroy()
+        # la sensibilité et le profil affichés correspondent à l'analyse précédente
+        if self.tache_sensibilite is not None:
+            self.tache_sensibilite.annuler()
+        self.sensibilite_frame.pack_forget()
+        self.profil_frame.pack_forget()
 
     # --- elements des etapes 1 et 2 (logo, titre, boutons, input fields de texte...) ---
     def setup_etape(self, title, subtitle, widgets_callback):
@@ -137,7 +320,7 @@ class CostGraph:
             params_frame.pack(pady=20)
 
             ttk.Label(params_frame, text="Nombre de mois:").grid(row=0, column=0, padx=5, pady=10, sticky=tk.W)
-            nb_mois_spinbox = ttk.Spinbox(params_frame, from_=1, to=120, increment=1, textvariable=self.nb_mois, width=8)
+            nb_mois_spinbox = ttk.Spinbox(params_frame, from_=1, to=MAX_MOIS, increment=1, textvariable=self.nb_mois, width=8)
             nb_mois_spinbox.grid(row=0, column=1, padx=5, pady=10)
 
             ttk.Label(params_frame, text="Frais fixes d'approvisionnement (€):").grid(row=1, column=0, padx=5, pady=10, sticky=tk.W)
@@ -147,6 +330,9 @@ class CostGraph:
             cout_stockage_spinbox = ttk.Spinbox(params_frame, from_=0.0, to=1000.0, increment=1.0, textvariable=self.cout_stockage, width=8, format="%.2f")
             cout_stockage_spinbox.grid(row=2, column=1, padx=5, pady=10)
 
+            ttk.Checkbutton(params_frame, text="Mode explication (graphe + Dijkstra, plus lent)", variable=self.mode_explication).grid(row=3, column=0, columnspan=2, padx=5, pady=10, sticky=tk.W)
+            ttk.Checkbutton(params_frame, text="Afficher le profil de l'analyse (temps par étape)", variable=self.afficher_profil).grid(row=4, column=0, columnspan=2, padx=5, pady=(0, 10), sticky=tk.W)
+
             button_frame = ttk.Frame(center_wrapper)
             button_frame.pack(pady=20)
             ttk.Button(button_frame, text="Suivant", command=self.afficher_etape2).pack()
@@ -159,43 +345,42 @@ class CostGraph:
 
     def afficher_etape2(self):
         def widgets(center_wrapper):
-            installations_outer_frame = ttk.Frame(center_wrapper)
-            installations_outer_frame.pack(pady=10)
-            installations_frame = ttk.Frame(installations_outer_frame)
-            installations_frame.pack()
-
-            self.installation_entries = []
-
             nb_mois = self.nb_mois.get()
-            if not isinstance(nb_mois, int) or nb_mois <= 0:
-                messagebox.showerror("Erreur", "Le nombre de mois doit être un entier positif.")
+            if not isinstance(nb_mois, int) or not 0 < nb_mois <= MAX_MOIS:
+                messagebox.showerror("Erreur", f"Le nombre de mois doit être un entier entre 1 et {MAX_MOIS}.")
                 self.nb_mois.set(6)
                 nb_mois = 6
 
-            if nb_mois > 48:
-                messagebox.showwarning("Attention", f"Nombre de mois ({nb_mois}) élevé. L'interface et l'analyse peuvent être longues.")
+            # valeurs déjà saisies conservées, complétées par les valeurs par défaut
+            self.valeurs_saisies[:] = valeurs_par_defaut(nb_mois, self.valeurs_saisies)
 
-            # Valeurs par défaut
-            default_values = [200, 200, 300, 700, 1000, 200] * ((nb_mois // 6) + 1)
+            self.resume_saisie = ttk.Label(center_wrapper, text="")
+            self.resume_saisie.pack()
+            self.grille = GrilleBesoins(center_wrapper, self.valeurs_saisies, sur_taille=self.changer_nb_mois)
+            self.grille.pack(pady=10)
+            self.changer_nb_mois(nb_mois)
 
-            cols = 3
-            for i in range(nb_mois):
-                row = i // cols
-                col = i % cols
-                frame = ttk.Frame(installations_frame)
-                frame.grid(row=row, column=col, padx=15, pady=10, sticky=tk.W)
-                ttk.Label(frame, text=f"Mois {i+1}:").pack(side=tk.LEFT, padx=(0, 5))
-                entry = ttk.Entry(frame, width=8)
-                entry.pack(side=tk.LEFT)
-                entry.insert(0, str(default_values[i] if i < len(default_values) else 200))
-                self.installation_entries.append(entry)
+            import_frame = ttk.Frame(center_wrapper)
+            import_frame.pack()
+            ttk.Button(import_frame, text="Coller une colonne", command=self.coller_colonne).pack(side=tk.LEFT, padx=5)
+            ttk.Button(import_frame, text="Importer un fichier...", command=self.importer_besoins).pack(side=tk.LEFT, padx=5)
 
             button_frame = ttk.Frame(center_wrapper)
             button_frame.pack(pady=20)
             center_buttons_subframe = ttk.Frame(button_frame)
             center_buttons_subframe.pack(anchor="center")
-            ttk.Button(center_buttons_subframe, text="Retour", command=self.afficher_etape1).pack(side=tk.LEFT, padx=10)
-            ttk.Button(center_buttons_subframe, text="Lancer l'analyse", command=self.lancer_analyse).pack(side=tk.RIGHT, padx=10)
+            self.bouton_retour = ttk.Button(center_buttons_subframe, text="Retour", command=self.afficher_etape1)
+            self.bouton_retour.pack(side=tk.LEFT, padx=10)
+            self.bouton_analyse = ttk.Button(center_buttons_subframe, text="Lancer l'analyse", command=self.lancer_analyse)
+            self.bouton_analyse.pack(side=tk.RIGHT, padx=10)
+
+            # progression de l'analyse (cachée tant qu'aucune analyse ne tourne)
+            self.progression_frame = ttk.Frame(center_wrapper)
+            self.progression_texte = ttk.Label(self.progression_frame, text="")
+            self.progression_texte.pack(pady=(0, 5))
+            self.progression_barre = ttk.Progressbar(self.progression_frame, length=300, mode="determinate", maximum=100)
+            self.progression_barre.pack(side=tk.LEFT, padx=10)
+            ttk.Button(self.progression_frame, text="Annuler", command=self.annuler_analyse).pack(side=tk.LEFT, padx=10)
 
         self.setup_etape(
             title="Étape 2: Besoins mensuels d'installations",
@@ -203,23 +388,61 @@ class CostGraph:
             widgets_callback=widgets
         )
 
+    def changer_nb_mois(self, nb_mois):
+        self.nb_mois.set(nb_mois)
+        self.resume_saisie.config(text=f"{nb_mois} mois (molette ou flèches pour défiler, Ctrl+V pour coller une colonne de tableur)")
+
+    # remplace toute la saisie par la colonne du presse-papiers
+    def coller_colonne(self):
+        try:
+            valeurs = lire_valeurs(self.root.clipboard_get())
+        except tk.TclError:
+            valeurs = []
+        self.remplacer_saisie(valeurs, "Le presse-papiers ne contient aucune valeur.")
+
+    def importer_besoins(self):
+        chemin = filedialog.askopenfilename(
+            title="Importer les besoins",
+            filetypes=[("Fichiers CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Texte", "*.txt"), ("Tous les fichiers", "*")]
+        )
+        if not chemin:
+            return
+        try:
+            valeurs = lire_fichier_besoins(chemin)
+        except (OSError, ValueError, KeyError, UnicodeDecodeError) as erreur:
+            messagebox.showerror("Erreur d'import", f"Impossible de lire {chemin} : {erreur}")
+            return
+        self.remplacer_saisie(valeurs, "Le fichier ne contient aucune valeur.")
+
+    def remplacer_saisie(self, valeurs, message_vide):
+        if not valeurs:
+            messagebox.showerror("Erreur", message_vide)
+            return
+        if len(valeurs) > MAX_MOIS:
+            messagebox.showwarning("Attention", f"{len(valeurs)} valeurs : seuls les {MAX_MOIS} premiers mois sont gardés.")
+            valeurs = valeurs[:MAX_MOIS]
+        self.valeurs_saisies[:] = valeurs
+        self.changer_nb_mois(len(valeurs))
+        self.grille.marquer_invalides(valider_besoins(valeurs)[1])
+
+    # validation de tous les mois en une fois ; les valeurs invalides sont marquées en rouge
     def get_installations(self):
-        installations = []
-        for i, entry in enumerate(self.installation_entries):
-            value_str = entry.get()
-            value = int(value_str)
-            if value < 0:
-                entry.config(foreground="red")
-                messagebox.showerror("Erreur de saisie", f"La valeur pour le Mois {i+1} doit être positive ou nulle.")
-                entry.focus_set()
-                return None
-            installations.append(value)
-            entry.config(foreground="")
+        installations, invalides = valider_besoins(self.valeurs_saisies)
+        self.grille.marquer_invalides(invalides)
+        if invalides:
+            mois = ", ".join(str(m + 1) for m in invalides[:10]) + (", ..." if len(invalides) > 10 else "")
+            messagebox.showerror("Erreur de saisie",
+                                 f"{len(invalides)} valeur(s) invalide(s) : chaque besoin doit être un entier positif ou nul (mois {mois}).")
+            self.grille.aller_a(invalides[0])
+            return None
         self.installations = installations
         return self.installations
 
     # --- l'analyse est lancée ici après verif des inputs ---
     def lancer_analyse(self):
+        # clics répétés : on ignore tant que l'analyse précédente n'est pas terminée
+        if self.tache is not None and self.tache.en_cours():
+            return
         if self.get_installations() is None:
              self.notebook.select(0)
              return
@@ -242,33 +465,143 @@ class CostGraph:
         print(f"Installations: {self.installations}")
         print(f"Frais appro: {frais_approvisionnement}, Cout stockage: {cout_stockage}")
 
+        explication = self.mode_explication.get()
+        if explication and len(self.installations) > MAX_MOIS_EXPLICATION:
+            messagebox.showerror("Erreur", f"Le mode explication est limité à {MAX_MOIS_EXPLICATION} mois "
+                                           f"(Dijkstra serait trop long) : décochez-le à l'étape 1.")
+            return
+        etapes = ETAPES_EXPLICATION if explication else ETAPES_RAPIDES
+        installations = list(self.installations)
+        # mesures de la résolution : remplies par le thread de la tâche, terminées dans fin_analyse
+        self.resolution = instrumentation_par_defaut.demarrer(
+            source="interface", methode="dijkstra" if explication else "dp" if len(installations) <= SEUIL_ENVELOPPE else "enveloppe"
+        )
+        resolution = self.resolution
+        self.tache = TacheDeFond(
+            lambda etape: self.calculer_analyse(etape, resolution, installations, frais_approvisionnement, cout_stockage, explication),
+            etapes
+        )
+        self.bouton_analyse.config(state="disabled")
+        self.bouton_retour.config(state="disabled")
+        self.progression_barre["value"] = 0
+        self.progression_texte.config(text="Analyse en cours...")
+        self.progression_frame.pack(pady=(0, 20))
+        self.root.after(INTERVALLE_SUIVI_MS, self.suivre_analyse)
+
+    # --- calcul complet, exécuté dans le thread de la tâche : aucun accès aux widgets ici ---
+    def calculer_analyse(self, etape, resolution, installations, frais_approvisionnement, cout_stockage, explication):
         # utilisation des fonctions d'algo.py
-        G, n_mois = init_graphe(self.installations, frais_approvisionnement, cout_stockage)
+        G = None
+        if explication:
+            etape("Construction du graphe")
+            with resolution.etape("construction_graphe"):
+                if len(installations) > SEUIL_GRAPHE_COMPACT:
+                    G, n_mois = init_graphe_compact(installations, frais_approvisionnement, cout_stockage)
+                else:
+                    G, n_mois = init_graphe(installations, frais_approvisionnement, cout_stockage, verifier=etape)
+            resolution.noter(mois=n_mois, noeuds=G.number_of_nodes(), arcs=G.number_of_edges())
         
-        if detect_cycle(G):
-            messagebox.showerror("Erreur d'algorithme", "Le graphe généré contient des cycles.")
-            return
-
-        distances, precedents = dijkstra(G, 0, n_mois)
+            etape("Détection de cycles")
+            with resolution.etape("detection_cycles"):
+                cycle = detect_cycle(G)
+            if cycle:
+                raise ErreurAnalyse("Le graphe généré contient des cycles.")
+
+            etape("Plus court chemin (Dijkstra)")
+            with resolution.etape("plus_court_chemin"):
+                # etape() sans nom à chaque sommet : "Annuler" n'attend pas la fin de Dijkstra (14 s à 3000 mois)
+                distances, precedents = dijkstra(G, 0, n_mois, verifier=etape)
+        else:
+            etape("Optimisation")
+            with resolution.etape("plus_court_chemin"):
+                if len(installations) > SEUIL_ENVELOPPE:
+                    distances, precedents, n_mois = cache_par_defaut.resoudre(
+                        installations, frais_approvisionnement, cout_stockage, methode="enveloppe"
+                    )
+                else:
+                    # en cas de miss du cache, on passe par le planificateur incrémental
+                    distances, precedents, n_mois = cache_par_defaut.resoudre(
+                        installations, frais_approvisionnement, cout_stockage,
+                        solveur=lambda: self.resoudre_incremental(installations, frais_approvisionnement, cout_stockage)
+                    )
+            # graphe implicite : mêmes noeuds et arcs, sans les stocker
+            resolution.noter(mois=n_mois, noeuds=n_mois + 1, arcs=n_mois * (n_mois + 1) // 2)
+            print(f"Cache: {cache_par_defaut.statistiques()}")
         
         if n_mois not in distances or distances[n_mois] == float('inf'):
-            messagebox.showerror("Erreur d'algorithme", "Aucun chemin valide trouvé du début à la fin ")
-            return
+            raise ErreurAnalyse("Aucun chemin valide trouvé du début à la fin ")
 
-        path = reconstruct_chemin_graphe(precedents, 0, n_mois)
+        with resolution.etape("reconstruction_chemin"):
+            path = reconstruct_chemin_graphe(precedents, 0, n_mois)
         cout_optimal = distances[n_mois]
         print(f"Chemin optimal trouvé: {path} Coût : {cout_optimal:.2f}")
 
-        autres_couts = calcul_couts_strategies(self.installations, frais_approvisionnement, cout_stockage)
+        etape("Stratégies de base")
+        with resolution.etape("strategies_base"):
+            autres_couts = calcul_couts_strategies(installations, frais_approvisionnement, cout_stockage)
         print(f"Comparaison couts: {autres_couts}")
 
-        self.afficher_resultats(G, path, cout_optimal, autres_couts, frais_approvisionnement, cout_stockage, precedents, n_mois)
-        self.notebook.select(1)
+        etape("Graphiques")
+        with resolution.etape("graphiques"):
+            donnees_graphiques = preparer_donnees(installations, frais_approvisionnement, cout_stockage, precedents, n_mois)
+        return G, path, cout_optimal, autres_couts, frais_approvisionnement, cout_stockage, precedents, n_mois, donnees_graphiques
+
+    # relève les messages de la tâche depuis le thread Tk, puis se reprogramme tant qu'elle tourne
+    def suivre_analyse(self):
+        for message in self.tache.relever():
+            if message[0] == "etape":
+                _, nom, rang, nombre_etapes = message
+                self.progression_barre["value"] = 100 * rang / nombre_etapes
+                self.progression_texte.config(text=f"Étape {rang + 1}/{nombre_etapes} : {nom}...")
+            else:
+                self.fin_analyse(message)
+        if self.tache.en_cours():
+            self.root.after(INTERVALLE_SUIVI_MS, self.suivre_analyse)
+
+    def fin_analyse(self, message):
+        # l'étape 2 a pu être quittée pendant le calcul : les widgets de progression n'existent plus
+        if self.progression_frame.winfo_exists():
+            self.progression_frame.pack_forget()
+            self.bouton_analyse.config(state="normal")
+            self.bouton_retour.config(state="normal")
+        if message[0] == "annule":
+            instrumentation_par_defaut.terminer(self.resolution, "annule")
+            print("Analyse annulée")
+        elif message[0] == "erreur":
+            instrumentation_par_defaut.terminer(self.resolution, "erreur")
+            erreur = message[1]
+            if isinstance(erreur, ErreurAnalyse):
+                messagebox.showerror("Erreur d'algorithme", str(erreur))
+            else:
+                messagebox.showerror("Erreur", f"L'analyse a échoué : {erreur}")
+        else:
+            with self.resolution.etape("affichage"):
+                self.afficher_resultats(*message[1])
+            enregistrement = instrumentation_par_defaut.terminer(self.resolution)
+            print(f"Profil:\n{resume(enregistrement)}")
+            if self.afficher_profil.get():
+                self.afficher_profil_analyse(enregistrement)
+            self.notebook.select(1)
+
+    def annuler_analyse(self):
+        if self.tache is not None:
+            self.tache.annuler()
+            self.progression_texte.config(text="Annulation...")
+
+    # ne recalcule que les mois à partir du premier besoin modifié depuis la dernière analyse
+    def resoudre_incremental(self, installations, frais_approvisionnement, cout_stockage):
+        if self.planificateur is None or self.planificateur.n_mois != len(installations):
+            self.planificateur = PlanificateurIncremental(installations, frais_approvisionnement, cout_stockage)
+        else:
+            for m, valeur in enumerate(installations):
+                self.planificateur.update_demand(m, valeur)
+            self.planificateur.update_costs(frais_approvisionnement, cout_stockage)
+        return self.planificateur.solve()
 
     # affichage des résultats
-    def afficher_resultats(self, G, path, cout_optimal, autres_couts, frais_approvisionnement, cout_stockage, precedents, n_mois):
+    def afficher_resultats(self, G, path, cout_optimal, autres_couts, frais_approvisionnement, cout_stockage, precedents, n_mois, donnees_graphiques):
         self.vider_resultats_tab()
-        main_frame = ttk.Frame(self.scrollable_results_frame)
+        main_frame = ttk.Frame(self.resultats_texte_frame)
         main_frame.pack(fill=tk.BOTH, expand=True)
 
         ttk.Label(main_frame, text="Résultats de l'analyse", font=("Helvetica", 12, "bold")).pack(anchor="center", pady=(5, 15))
@@ -307,14 +640,15 @@ class CostGraph:
             total_fixed_cost_actual = (len(path) - 1) * frais_approvisionnement
         total_stock_cost_actual = cout_optimal - total_fixed_cost_actual
 
+        prefixes = sommes_prefixes(self.installations)
         for i in range(len(path) - 1):
             mois_debut_idx = path[i]
             mois_fin_idx = path[i+1]
             month_label_start = mois_debut_idx + 1
             month_label_end = mois_fin_idx
-            quantite = sum(self.installations[mois_debut_idx:mois_fin_idx])
+            quantite = quantite_commande(prefixes, mois_debut_idx, mois_fin_idx)
 
-            batch_cost = G[mois_debut_idx][mois_fin_idx]['weight']
+            batch_cost = cout_arc(prefixes, mois_debut_idx, mois_fin_idx, frais_approvisionnement, cout_stockage)
 
             text_optimal.insert(tk.END, f"   - Début Mois {month_label_start}: Commander ", "normal")
             text_optimal.insert(tk.END, f"{quantite}", "cost")
@@ -347,55 +681,120 @@ class CostGraph:
         text_optimal.configure(state='disabled')
         text_comparison.configure(state='disabled')
 
-        self.afficher_graphiques(main_frame, n_mois, precedents, frais_approvisionnement, cout_stockage)
+        self.afficher_graphiques(donnees_graphiques)
+
+        boutons_frame = ttk.Frame(self.resultats_boutons_frame)
+        boutons_frame.pack(fill=tk.X)
+        self.bouton_sensibilite = ttk.Button(boutons_frame, text=TEXTE_SENSIBILITE,
+                                             command=lambda: self.afficher_sensibilite(frais_approvisionnement, cout_stockage))
+        self.bouton_sensibilite.pack(pady=(10, 0))
 
-        ttk.Button(main_frame, text="Retour à la configuration",
+        ttk.Button(boutons_frame, text="Retour à la configuration",
                   command=lambda: self.notebook.select(0)).pack(pady=20)
 
+        # seulement sur les widgets recréés : les zones persistantes sont liées une seule fois
+        for frame in (main_frame, boutons_frame):
+            self.lier_scroll(frame)
+
+    def lier_scroll(self, widget):
         if hasattr(self.scrollable_results_frame, '_scroll_command'):
-            gestionnaire_scroll(main_frame, self.scrollable_results_frame._scroll_command)
+            gestionnaire_scroll(widget, self.scrollable_results_frame._scroll_command)
 
 # --- Visualisation des résultats de deux façons : évoltion des coûts par mois par strat et achats optimaux à faire ---
-    def afficher_graphiques(self, parent, n_mois, precedents, frais_approvisionnement, cout_stockage):
-        chart_container_frame = ttk.LabelFrame(parent, text="Graphiques")
-        chart_container_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=5)
-
-        fig, axes = tracer_graphique(
-            self.installations,
-            frais_approvisionnement,
-            cout_stockage,
-            precedents,
-            n_mois
+    # la figure et son canvas sont créés à la première analyse, puis seules les données changent
+    def afficher_graphiques(self, donnees_graphiques):
+        if self.graphiques is None:
+            self.graphiques = GraphiquesResultats(Figure(figsize=(12, 12), layout="constrained"), blit=True)
+            canvas = FigureCanvasTkAgg(self.graphiques.fig, master=self.graphiques_frame)
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+            self.graphiques_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=5, before=self.resultats_boutons_frame)
+            self.lier_scroll(self.graphiques_frame)
+        self.graphiques.afficher(donnees_graphiques)
+
+    # --- superposition du profil : temps, CPU (et pic mémoire si tracemalloc est actif) de chaque étape ---
+    def afficher_profil_analyse(self, enregistrement):
+        if self.profil_texte is None:
+            self.profil_texte = tk.Text(self.profil_frame, wrap=tk.NONE, height=10, font=("Consolas", 9),
+                                        relief=tk.FLAT, borderwidth=0, highlightthickness=0, bg=self.default_bg)
+            self.profil_texte.pack(fill=tk.X, padx=5, pady=5)
+            export_frame = ttk.Frame(self.profil_frame)
+            export_frame.pack(pady=(0, 5))
+            ttk.Button(export_frame, text="Exporter les métriques...", command=self.exporter_metriques).pack()
+            self.lier_scroll(self.profil_frame)
+        self.profil_texte.configure(state="normal")
+        self.profil_texte.delete("1.0", tk.END)
+        self.profil_texte.insert(tk.END, resume(enregistrement))
+        self.profil_texte.configure(state="disabled")
+        self.profil_frame.pack(fill=tk.X, pady=10, padx=5, before=self.resultats_boutons_frame)
+
+    # .json : historique détaillé et totaux ; .prom / .txt : format texte de Prometheus
+    def exporter_metriques(self):
+        chemin = filedialog.asksaveasfilename(
+            title="Exporter les métriques", defaultextension=".json",
+            filetypes=[("JSON", "*.json"), ("Prometheus (texte)", "*.prom"), ("Texte", "*.txt")]
         )
-        ax1, ax2 = axes  # axes[0] et axes[1]
-
-        # --- couleurs cohérentes ---
-        ax1.lines[0].set_color('#c9c1bc')    # achats mensuels
-        ax1.lines[1].set_color('#c9c1bc')    # achat unique
-        ax1.lines[2].set_color('#ef7645')    # stratégie optimale
-        for bar in ax2.containers[0]:
-            bar.set_color('#ef7645')  # colorier la légende aussi
-
-        # couleurs des légendes aussi
-        for axe_tmp in fig.axes:
-            if axe_tmp.get_legend():
-                axe_tmp.get_legend().remove()
-        ax1.legend()
-
-        twin_axes = [a for a in fig.axes if a not in (ax1, ax2)]
-        if twin_axes:
-            twin_ax = twin_axes[0]
-            h_bars, l_bars   = ax2.get_legend_handles_labels()
-            h_needs, l_needs = twin_ax.get_legend_handles_labels()
-            ax2.legend(h_bars + h_needs, l_bars + l_needs, loc='upper right')
-        else:
-            ax2.legend([ax2.containers[0]], ['Commandes optimales'], loc='upper right')
-
-        # --- insertion dans l'interface --
-        fig.tight_layout(pad=2.0)
-        canvas = FigureCanvasTkAgg(fig, master=chart_container_frame)
-        canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
-        canvas.draw()
+        if not chemin:
+            return
+        contenu = instrumentation_par_defaut.exporter_json(indent=2) if chemin.endswith(".json") else instrumentation_par_defaut.exporter_prometheus()
+        try:
+            with open(chemin, "w") as f:
+                f.write(contenu)
+        except OSError as erreur:
+            messagebox.showerror("Erreur", f"Impossible d'écrire {chemin} : {erreur}")
+
+    # --- coût optimal en fonction des frais et du stockage, avec les points de changement de politique ---
+    # les tables (n_mois passages en O(n_mois²), environ 3,5 s à 1000 mois) sont calculées dans un thread ;
+    # le bouton sert alors à annuler, et le tracé se fait depuis le thread Tk une fois les tables prêtes
+    def afficher_sensibilite(self, frais_approvisionnement, cout_stockage):
+        if self.tache_sensibilite is not None and self.tache_sensibilite.en_cours():
+            self.tache_sensibilite.annuler()
+            self.bouton_sensibilite.config(text="Annulation...")
+            return
+        if len(self.installations) > MAX_MOIS_SENSIBILITE:
+            messagebox.showerror("Erreur", f"L'analyse de sensibilité est limitée à {MAX_MOIS_SENSIBILITE} mois.")
+            return
+        installations = list(self.installations)
+        tache = TacheDeFond(lambda etape: self.calculer_tables_sensibilite(etape, installations), [ETAPE_SENSIBILITE])
+        self.tache_sensibilite = tache
+        self.bouton_sensibilite.config(text="Annuler l'analyse de sensibilité")
+        suivi = (tache, self.bouton_sensibilite, installations, frais_approvisionnement, cout_stockage)
+        self.root.after(INTERVALLE_SUIVI_MS, lambda: self.suivre_sensibilite(*suivi))
+
+    # exécuté dans le thread de la tâche : etape() sans nom à chaque nombre de commandes sert de point d'annulation
+    def calculer_tables_sensibilite(self, etape, installations):
+        etape(ETAPE_SENSIBILITE)
+        return tables_par_nombre_commandes(installations, verifier=etape)
+
+    def suivre_sensibilite(self, tache, bouton, installations, frais_approvisionnement, cout_stockage):
+        for message in tache.relever():
+            if message[0] != "etape":
+                self.fin_sensibilite(message, bouton, installations, frais_approvisionnement, cout_stockage)
+        if tache.en_cours():
+            self.root.after(INTERVALLE_SUIVI_MS,
+                            lambda: self.suivre_sensibilite(tache, bouton, installations, frais_approvisionnement, cout_stockage))
+
+    def fin_sensibilite(self, message, bouton, installations, frais_approvisionnement, cout_stockage):
+        # une nouvelle analyse a pu reconstruire l'onglet Résultats pendant le calcul : tables abandonnées
+        if bouton is not self.bouton_sensibilite or not bouton.winfo_exists():
+            return
+        bouton.config(text=TEXTE_SENSIBILITE)
+        if message[0] == "annule":
+            print("Analyse de sensibilité annulée")
+            return
+        if message[0] == "erreur":
+            messagebox.showerror("Erreur", f"L'analyse de sensibilité a échoué : {message[1]}")
+            return
+        if self.figure_sensibilite is None:
+            self.figure_sensibilite = Figure(figsize=(12, 5))
+            self.figure_sensibilite.subplots(1, 2)
+            canvas = FigureCanvasTkAgg(self.figure_sensibilite, master=self.sensibilite_frame)
+            canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, pady=5, padx=5)
+            self.lier_scroll(self.sensibilite_frame)
+        # tracer_sensibilite vide et redessine les axes existants (les tables sont déjà calculées : seul le tracé est mesuré)
+        with instrumentation_par_defaut.etape("sensibilite"):
+            tracer_sensibilite(installations, frais_approvisionnement, cout_stockage, fig=self.figure_sensibilite, tables=message[1])
+        self.sensibilite_frame.pack(fill=tk.BOTH, expand=True, pady=10, padx=5, before=self.resultats_boutons_frame)
+        self.figure_sensibilite.canvas.draw_idle()
 
 
 def main():
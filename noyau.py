@@ -0,0 +1,884 @@
+import heapq
+import numbers
+from array import array
+from bisect import bisect_right
+from collections import deque
+
+# --- noyau du solveur ---
+# uniquement la bibliothèque standard : s'importe en quelques millisecondes, pour les processus
+# de calcul et les scripts courts. networkx n'est chargé que par init_graphe (mode explication),
+# matplotlib que par les fonctions de tracé de algos.py.
+
+def load_data():
+    installations = [200, 200, 300, 700, 1000, 200]
+    frais_approvisionnement = 2000 
+    cout_stockage = 2
+    
+    return installations, frais_approvisionnement, cout_stockage
+
+# à incrémenter quand les résultats des solveurs changent (utilisé par cache.py pour invalider les entrées)
+VERSION_SOLVEUR = 1
+
+# --- moteur de coûts par sommes préfixes ---
+# cumul[t] = besoins des mois 0..t-1, cumul_pondere[t] = somme des k * besoins[k] pour k < t
+# => chaque arc (i, j) se calcule en O(1) au lieu de re-sommer les tranches
+def sommes_prefixes(installations):
+    n_mois = len(installations)
+    cumul = [0] * (n_mois + 1)
+    cumul_pondere = [0] * (n_mois + 1)
+    for k in range(n_mois):
+        cumul[k + 1] = cumul[k] + installations[k]
+        cumul_pondere[k + 1] = cumul_pondere[k] + k * installations[k]
+    return cumul, cumul_pondere
+
+# nombre de cabines commandées au début du mois i pour couvrir les mois i à j-1
+def quantite_commande(prefixes, i, j):
+    cumul, _ = prefixes
+    return cumul[j] - cumul[i]
+
+# poids de l'arc (i, j) : frais fixes + cabines + stockage
+# une cabine installée au mois k (i <= k < j) reste (k - i) mois en stock
+def cout_arc(prefixes, i, j, frais_approvisionnement, cout_stockage):
+    cumul, cumul_pondere = prefixes
+    cout_cabines = cumul[j] - cumul[i]
+    cabines_mois_en_attente = (cumul_pondere[j] - cumul_pondere[i]) - i * cout_cabines
+    cout_stockage_total = cabines_mois_en_attente * cout_stockage
+    return frais_approvisionnement + cout_cabines + cout_stockage_total
+
+# --- initialisation graphe ---
+def init_graphe(installations, frais_approvisionnement, cout_stockage, verifier=None):
+    # grace a la bibliotheque networkx (importée ici seulement : le reste du noyau n'en a pas besoin)
+    import networkx as nx
+    G = nx.DiGraph(avant=True)  # arcs i -> j avec i < j uniquement (cf. est_graphe_avant)
+    # ajouter noeud par mois
+    n_mois = len(installations) 
+    for i in range(n_mois + 1):
+        G.add_node(i)
+    # arcs avec les couts d'approvisionnement + stockage (O(1) par arc grâce aux préfixes)
+    prefixes = sommes_prefixes(installations)
+    for i in range(n_mois):
+        if verifier is not None:
+            verifier()  # point d'annulation, une fois par mois de départ
+        for j in range(i + 1, n_mois + 1):
+            cout_total = cout_arc(prefixes, i, j, frais_approvisionnement, cout_stockage)
+            G.add_edge(i, j, weight=cout_total)
+    
+    return G, n_mois
+
+# --- graphe "avant" implicite : arcs i -> j pour tous i < j <= n_mois, sans rien stocker ---
+class GrapheAvant:
+    avant = True  # acyclique par construction
+
+    def __init__(self, n_mois):
+        self.n_mois = n_mois
+
+    def __iter__(self):
+        return iter(range(self.n_mois + 1))
+
+    def __len__(self):
+        return self.n_mois + 1
+
+    def __getitem__(self, i):
+        return range(i + 1, self.n_mois + 1)
+
+# un graphe n'ayant que des arcs i -> j avec i < j (init_graphe, GrapheAvant) n'a pas besoin d'être vérifié
+def est_graphe_avant(graphe):
+    if getattr(graphe, "avant", False):
+        return True
+    attributs = getattr(graphe, "graph", None)
+    return isinstance(attributs, dict) and attributs.get("avant", False)
+
+# --- ordre topologique (algorithme de Kahn, itératif) ---
+# marche sur un graphe networkx, un dict {sommet: [voisins]} ou un GrapheAvant
+# renvoie la liste des sommets dans un ordre topologique, ou None s'il y a un cycle
+def ordre_topologique(graphe):
+    if est_graphe_avant(graphe):
+        # chemin rapide : l'ordre naturel des mois est déjà topologique
+        return sorted(graphe)
+
+    degres_entrants = {}
+    for v in graphe:
+        degres_entrants.setdefault(v, 0)
+        for voisin in graphe[v]:
+            degres_entrants[voisin] = degres_entrants.get(voisin, 0) + 1
+
+    a_traiter = deque(v for v, degre in degres_entrants.items() if degre == 0)
+    ordre = []
+    while a_traiter:
+        v = a_traiter.popleft()
+        ordre.append(v)
+        # les sommets qui ne sont que des voisins (pas des clés du dict) n'ont pas de successeurs
+        if v in graphe:
+            for voisin in graphe[v]:
+                degres_entrants[voisin] -= 1
+                if degres_entrants[voisin] == 0:
+                    a_traiter.append(voisin)
+
+    if len(ordre) < len(degres_entrants):
+        return None  # les sommets restants sont sur un cycle (ou en aval d'un cycle)
+    return ordre
+
+# --- détection des cycles  ---
+# version itérative : pas de limite de récursion, O(sommets + arcs)
+def detect_cycle(graphe):
+    return ordre_topologique(graphe) is None
+
+# --- Dijkstra pour trouver le chemin optimal ---
+# fin=None : pas d'arrêt anticipé, distances et précédents de tous les sommets atteignables
+# verifier : appelée à chaque sommet exploré, peut lever une exception pour interrompre (cf. taches.TacheDeFond)
+def dijkstra(graphe, deb, fin=None, verifier=None):
+    # couts pour tous les sommets
+    # on utilise un tas binaire minimal pour la gestion des sommets à explorer
+    tas_bin_min = [(0, deb)]  # (coût, sommet)
+    distances = {deb: 0}
+    precedents = {deb: None}  
+    # prédécesseurs dans un dictionnaire (car faudra reconstruire le chemin après)
+
+    while tas_bin_min:
+        dist_actuelle, noeud_actuel = heapq.heappop(tas_bin_min)
+        # arret si on est a la fin
+        if noeud_actuel == fin:
+            break
+
+        # Si sommet déjà exploré avec coût plus bas on le saute
+        if dist_actuelle > distances.get(noeud_actuel, float('inf')):
+            continue
+        if verifier is not None:
+            verifier()
+        
+        # voir les voisins
+        for voisin in graphe[noeud_actuel]:
+            cout_arete = graphe[noeud_actuel][voisin]['weight']
+            distance = dist_actuelle + cout_arete
+            if distance < distances.get(voisin, float('inf')):
+                distances[voisin] = distance
+                precedents[voisin] = noeud_actuel  # suivre ce chemin
+                heapq.heappush(tas_bin_min, (distance, voisin))
+
+    return distances, precedents
+
+
+# --- plus court chemin sur un graphe acyclique : un seul passage dans l'ordre topologique ---
+# renvoie (distances, precedents) comme dijkstra ; ordre peut être fourni par ordre_topologique
+def plus_court_chemin_dag(graphe, deb, fin, ordre=None):
+    if ordre is None:
+        ordre = ordre_topologique(graphe)
+        if ordre is None:
+            raise ValueError("Le graphe contient des cycles, ce qui ne devrait pas être le cas.")
+    distances = {deb: 0}
+    precedents = {deb: None}
+
+    for noeud_actuel in ordre:
+        if noeud_actuel not in distances:
+            continue  # pas atteignable depuis deb
+        if noeud_actuel == fin:
+            break
+        dist_actuelle = distances[noeud_actuel]
+        for voisin in graphe[noeud_actuel]:
+            distance = dist_actuelle + graphe[noeud_actuel][voisin]['weight']
+            if distance < distances.get(voisin, float('inf')):
+                distances[voisin] = distance
+                precedents[voisin] = noeud_actuel
+
+    return distances, precedents
+
+# --- Wagner-Whitin : programmation dynamique directe, sans graphe ---
+# le graphe est acyclique par construction (arcs i -> j avec i < j) : les mois sont
+# déjà un ordre topologique, donc on relâche les arcs dans l'ordre sans tas ni networkx
+
+# remplit meilleurs[j] et meilleurs_i[j] pour j >= debut (les cases avant debut doivent être à jour)
+def _completer_dp(meilleurs, meilleurs_i, prefixes, frais_approvisionnement, cout_stockage, debut=1):
+    cumul, cumul_pondere = prefixes
+    for j in range(debut, len(cumul)):
+        cumul_j = cumul[j]
+        pondere_j = cumul_pondere[j]
+        meilleur = float('inf')
+        meilleur_i = None
+        # même calcul que cout_arc, recopié ici pour éviter un appel par arc
+        for i in range(j):
+            cout_cabines = cumul_j - cumul[i]
+            attente = (pondere_j - cumul_pondere[i]) - i * cout_cabines
+            distance = meilleurs[i] + (frais_approvisionnement + cout_cabines + attente * cout_stockage)
+            if distance < meilleur:
+                meilleur = distance
+                meilleur_i = i
+        meilleurs[j] = meilleur
+        meilleurs_i[j] = meilleur_i
+
+# renvoie (distances, precedents) comme dijkstra
+def wagner_whitin(installations, frais_approvisionnement, cout_stockage):
+    n_mois = len(installations)
+    meilleurs = [0] * (n_mois + 1)
+    meilleurs_i = [None] * (n_mois + 1)
+    _completer_dp(meilleurs, meilleurs_i, sommes_prefixes(installations), frais_approvisionnement, cout_stockage)
+    return dict(enumerate(meilleurs)), dict(enumerate(meilleurs_i))
+
+# --- re-résolution incrémentale ---
+# garde les sommes préfixes et les tables de la programmation dynamique du dernier calcul :
+# distance[j] ne dépend que des besoins des mois 0..j-1, donc modifier le mois m ne touche
+# que les préfixes et les distances à partir de m+1 (les frais ou le stockage touchent tout)
+class PlanificateurIncremental:
+    def __init__(self, installations, frais_approvisionnement, cout_stockage):
+        self.installations = list(installations)
+        self.frais_approvisionnement = frais_approvisionnement
+        self.cout_stockage = cout_stockage
+        self.n_mois = len(self.installations)
+        self.cumul = [0] * (self.n_mois + 1)
+        self.cumul_pondere = [0] * (self.n_mois + 1)
+        self.meilleurs = [0] * (self.n_mois + 1)
+        self.meilleurs_i = [None] * (self.n_mois + 1)
+        self._a_recalculer = 1  # premier indice périmé des tables
+
+    def update_demand(self, m, valeur):
+        if not 0 <= m < self.n_mois:
+            raise IndexError(f"Mois {m} hors de l'horizon (0 à {self.n_mois - 1})")
+        if self.installations[m] != valeur:
+            self.installations[m] = valeur
+            self._a_recalculer = min(self._a_recalculer, m + 1)
+
+    def update_costs(self, frais_approvisionnement=None, cout_stockage=None):
+        if frais_approvisionnement is not None and frais_approvisionnement != self.frais_approvisionnement:
+            self.frais_approvisionnement = frais_approvisionnement
+            self._a_recalculer = 1
+        if cout_stockage is not None and cout_stockage != self.cout_stockage:
+            self.cout_stockage = cout_stockage
+            self._a_recalculer = 1
+
+    # renvoie (distances, precedents, n_mois) comme resoudre
+    def solve(self):
+        debut = self._a_recalculer
+        if debut <= self.n_mois:
+            # préfixes à partir de debut (cumul[debut] est le premier qui contient le mois modifié)
+            for k in range(debut - 1, self.n_mois):
+                self.cumul[k + 1] = self.cumul[k] + self.installations[k]
+                self.cumul_pondere[k + 1] = self.cumul_pondere[k] + k * self.installations[k]
+            _completer_dp(self.meilleurs, self.meilleurs_i, (self.cumul, self.cumul_pondere),
+                          self.frais_approvisionnement, self.cout_stockage, debut)
+        self._a_recalculer = self.n_mois + 1
+        return dict(enumerate(self.meilleurs)), dict(enumerate(self.meilleurs_i)), self.n_mois
+
+# --- planification glissante : les besoins arrivent mois par mois ---
+# théorème de l'horizon de planification (Wagner-Whitin) : si la dernière commande optimale
+# pour l'horizon t a lieu au mois a, toute solution optimale pour un horizon plus long
+# commande en dernier à un mois >= a. Donc :
+#   - le calcul du mois t ne teste que les mois i >= a (a = dernière commande pour t-1)
+#   - tout plan futur passe par un noeud de [a, t] : leur ancêtre commun dans l'arbre des
+#     précédents est définitif, les commandes avant lui peuvent être émises tout de suite
+# la mémoire est bornée par la fenêtre non décidée, pas par l'historique
+# le théorème suppose besoins >= 0 et stockage >= 0 (comme wagner_whitin_enveloppe) ; sans repli possible sur un
+# flux (des commandes sont déjà émises), un besoin négatif lève ValueError au mois où il arrive
+# générateur : émet des dicts {mois_debut, mois_fin, quantite, cout} (mois_fin exclu, comme le chemin)
+def planification_glissante(flux_besoins, frais_approvisionnement, cout_stockage):
+    if cout_stockage < 0:
+        raise ValueError("planification_glissante demande un coût de stockage positif ou nul")
+    # tables indexées par mois absolu, purgées au fur et à mesure des décisions
+    cumul = {0: 0}
+    cumul_pondere = {0: 0}
+    meilleurs = {0: 0}
+    precedents = {0: None}
+    decide = 0      # dernier noeud définitif
+    derniere = 0    # dernière commande optimale pour l'horizon courant
+    t = 0
+
+    for besoin in flux_besoins:
+        if besoin < 0:
+            raise ValueError(f"planification_glissante demande des besoins positifs ou nuls (mois {t} : {besoin})")
+        cumul[t + 1] = cumul[t] + besoin
+        cumul_pondere[t + 1] = cumul_pondere[t] + t * besoin
+        t += 1
+
+        cumul_t = cumul[t]
+        pondere_t = cumul_pondere[t]
+        meilleur = float('inf')
+        meilleur_i = None
+        for i in range(derniere, t):
+            cout_cabines = cumul_t - cumul[i]
+            attente = (pondere_t - cumul_pondere[i]) - i * cout_cabines
+            distance = meilleurs[i] + (frais_approvisionnement + cout_cabines + attente * cout_stockage)
+            if distance < meilleur:
+                meilleur = distance
+                meilleur_i = i
+        meilleurs[t] = meilleur
+        precedents[t] = meilleur_i
+
+        if meilleur_i == derniere:
+            # t a pour parent derniere, déjà dans la fenêtre : l'ancêtre commun ne bouge pas
+            continue
+        derniere = meilleur_i
+
+        # ancêtre commun des noeuds [derniere, t-1] (t a pour parent derniere) :
+        # on remplace le plus grand noeud par son parent jusqu'à n'en garder qu'un
+        noeuds = set(range(derniere, t))
+        tas = [-k for k in noeuds]
+        heapq.heapify(tas)
+        while len(noeuds) > 1:
+            k = -heapq.heappop(tas)
+            noeuds.discard(k)
+            parent = precedents[k]
+            if parent not in noeuds:
+                noeuds.add(parent)
+                heapq.heappush(tas, -parent)
+        ancetre = noeuds.pop()
+
+        if ancetre > decide:
+            yield from _emettre_commandes(precedents, cumul, cumul_pondere, decide, ancetre, frais_approvisionnement, cout_stockage)
+            for k in range(decide, ancetre):
+                del cumul[k], cumul_pondere[k], meilleurs[k], precedents[k]
+            decide = ancetre
+
+    # fin du flux : le reste du chemin optimal jusqu'au dernier mois
+    if t > decide:
+        yield from _emettre_commandes(precedents, cumul, cumul_pondere, decide, t, frais_approvisionnement, cout_stockage)
+
+# commandes du chemin entre deux noeuds (debut doit être un ancêtre de fin)
+def _emettre_commandes(precedents, cumul, cumul_pondere, debut, fin, frais_approvisionnement, cout_stockage):
+    chemin = [fin]
+    while chemin[-1] != debut:
+        chemin.append(precedents[chemin[-1]])
+    chemin.reverse()
+    prefixes = (cumul, cumul_pondere)
+    for mois_debut, mois_fin in zip(chemin, chemin[1:]):
+        yield {
+            "mois_debut": mois_debut,
+            "mois_fin": mois_fin,
+            "quantite": quantite_commande(prefixes, mois_debut, mois_fin),
+            "cout": cout_arc(prefixes, mois_debut, mois_fin, frais_approvisionnement, cout_stockage),
+        }
+
+# --- Wagner-Whitin en temps linéaire (enveloppe convexe, façon Wagelmans / Aggarwal-Park) ---
+# distance[j] = min_i distance[i] + cout_arc(i, j) se réécrit :
+#   distance[j] = frais + cumul[j] + h * cumul_pondere[j] + min_i (b_i - h * i * cumul[j])
+#   avec b_i = distance[i] - cumul[i] - h * cumul_pondere[i] + h * i * cumul[i]
+# => chaque mois i est une droite de pente -h*i, interrogée en x = cumul[j]
+# les pentes décroissent avec i et x croît (besoins >= 0) : on garde l'enveloppe
+# inférieure dans une file et chaque droite y entre et en sort au plus une fois -> O(n)
+def wagner_whitin_enveloppe(installations, frais_approvisionnement, cout_stockage):
+    if cout_stockage < 0 or any(q < 0 for q in installations):
+        # hypothèses de monotonie fausses : on repasse par la version quadratique
+        return wagner_whitin(installations, frais_approvisionnement, cout_stockage)
+
+    n_mois = len(installations)
+    cumul, cumul_pondere = sommes_prefixes(installations)
+    h = cout_stockage
+    meilleurs = [0] * (n_mois + 1)
+    distances = {0: 0}
+    precedents = {0: None}
+
+    # enveloppe : pentes, ordonnées à l'origine et mois correspondants, tete = début de la file
+    pentes = [0]
+    ordonnees = [0]
+    mois = [0]
+    tete = 0
+
+    for j in range(1, n_mois + 1):
+        x = cumul[j]
+        # les droites de tête ne redeviendront jamais minimales car x ne fait que croître
+        while tete + 1 < len(pentes) and ordonnees[tete + 1] + pentes[tete + 1] * x <= ordonnees[tete] + pentes[tete] * x:
+            tete += 1
+        i = mois[tete]
+
+        # coût recalculé exactement comme dans wagner_whitin (mêmes arrondis)
+        cout_cabines = x - cumul[i]
+        attente = (cumul_pondere[j] - cumul_pondere[i]) - i * cout_cabines
+        meilleur = meilleurs[i] + (frais_approvisionnement + cout_cabines + attente * h)
+        meilleurs[j] = meilleur
+        distances[j] = meilleur
+        precedents[j] = i
+
+        # ajout de la droite du mois j
+        pente = -h * j
+        ordonnee = meilleur - cumul[j] - h * cumul_pondere[j] + h * j * cumul[j]
+        if pentes[-1] == pente:
+            # même pente (h = 0) : on garde la plus basse, à égalité le mois le plus ancien
+            if ordonnee >= ordonnees[-1]:
+                continue
+            pentes.pop()
+            ordonnees.pop()
+            mois.pop()
+        # la dernière droite est inutile si la nouvelle passe sous elle avant qu'elle ne passe sous l'avant-dernière
+        while len(pentes) - tete >= 2:
+            p1, b1 = pentes[-2], ordonnees[-2]
+            p2, b2 = pentes[-1], ordonnees[-1]
+            if (ordonnee - b1) * (p1 - p2) <= (b2 - b1) * (p1 - pente):
+                pentes.pop()
+                ordonnees.pop()
+                mois.pop()
+            else:
+                break
+        pentes.append(pente)
+        ordonnees.append(ordonnee)
+        mois.append(j)
+
+    return distances, precedents
+
+# --- coût restant (cost-to-go) : coût optimal depuis chaque mois de début jusqu'à la fin de l'horizon ---
+# restants[i] = min_j cout_arc(i, j) + restants[j] se réécrit comme dans wagner_whitin_enveloppe :
+#   restants[i] = frais - cumul[i] - h * cumul_pondere[i] + h * i * cumul[i] + min_j (c_j + h * cumul[j] * x)
+#   avec c_j = restants[j] + cumul[j] + h * cumul_pondere[j] et x = -i
+# parcourus à rebours, x croît et les pentes h * cumul[j] décroissent : même enveloppe, en O(n)
+# renvoie (restants, suivants) : suivants[i] = mois de la commande suivante du plan optimal depuis i
+def couts_restants(installations, frais_approvisionnement, cout_stockage):
+    n_mois = len(installations)
+    prefixes = sommes_prefixes(installations)
+    cumul, cumul_pondere = prefixes
+    restants = [0] * (n_mois + 1)
+    suivants = [None] * (n_mois + 1)
+
+    if cout_stockage < 0 or any(q < 0 for q in installations):
+        # hypothèses de monotonie fausses : version quadratique
+        for i in range(n_mois - 1, -1, -1):
+            meilleur = float('inf')
+            for j in range(i + 1, n_mois + 1):
+                distance = cout_arc(prefixes, i, j, frais_approvisionnement, cout_stockage) + restants[j]
+                if distance < meilleur:
+                    meilleur = distance
+                    suivants[i] = j
+            restants[i] = meilleur
+        return restants, suivants
+
+    h = cout_stockage
+    pentes = [h * cumul[n_mois]]
+    ordonnees = [cumul[n_mois] + h * cumul_pondere[n_mois]]
+    mois = [n_mois]
+    tete = 0
+
+    for i in range(n_mois - 1, -1, -1):
+        x = -i
+        while tete + 1 < len(pentes) and ordonnees[tete + 1] + pentes[tete + 1] * x <= ordonnees[tete] + pentes[tete] * x:
+            tete += 1
+        j = mois[tete]
+        restants[i] = cout_arc(prefixes, i, j, frais_approvisionnement, cout_stockage) + restants[j]
+        suivants[i] = j
+
+        pente = h * cumul[i]
+        ordonnee = restants[i] + cumul[i] + h * cumul_pondere[i]
+        if pentes[-1] == pente:
+            if ordonnee >= ordonnees[-1]:
+                continue
+            pentes.pop()
+            ordonnees.pop()
+            mois.pop()
+        while len(pentes) - tete >= 2:
+            p1, b1 = pentes[-2], ordonnees[-2]
+            p2, b2 = pentes[-1], ordonnees[-1]
+            if (ordonnee - b1) * (p1 - p2) <= (b2 - b1) * (p1 - pente):
+                pentes.pop()
+                ordonnees.pop()
+                mois.pop()
+            else:
+                break
+        pentes.append(pente)
+        ordonnees.append(ordonnee)
+        mois.append(i)
+
+    return restants, suivants
+
+# --- tous les horizons à partir d'une seule résolution ---
+# "et si le contrat s'arrêtait au mois m ?" : distances / precedents donnent le coût optimal et le plan
+# pour chaque mois de fin (début au mois 0), restants / suivants pour chaque mois de début (fin au
+# dernier mois), sans autre résolution. Les autres couples (debut, fin) lisent la ligne "depuis debut" :
+# la première requête pour un mois de début coûte une résolution (wagner_whitin_enveloppe sur
+# installations[debut:], O(n)), ensuite gardée dans deux tableaux compacts (array, 16 octets par mois de fin)
+# plutôt qu'en dicts (environ 10 fois moins de mémoire). precalculer() résout tous les mois de début,
+# en O(n²) temps et mémoire : limité à MAX_MOIS_PRECALCUL mois (72 Mo de lignes à 3000 mois).
+MAX_MOIS_PRECALCUL = 3000
+
+
+class TableHorizons:
+    def __init__(self, installations, frais_approvisionnement, cout_stockage):
+        self.installations = list(installations)
+        self.frais_approvisionnement = frais_approvisionnement
+        self.cout_stockage = cout_stockage
+        self.n_mois = len(self.installations)
+        self.prefixes = sommes_prefixes(self.installations)
+        self.distances, self.precedents = wagner_whitin_enveloppe(self.installations, frais_approvisionnement, cout_stockage)
+        self.restants, self.suivants = couts_restants(self.installations, frais_approvisionnement, cout_stockage)
+        self._lignes = {}  # début -> ligne compacte, cf. _ligne (le début 0 lit distances / precedents)
+
+    # ligne "depuis debut" : distances[fin - debut] et precedents[fin - debut] (mois absolu, -1 pour debut)
+    def _ligne(self, debut):
+        if debut not in self._lignes:
+            distances, precedents = wagner_whitin_enveloppe(self.installations[debut:], self.frais_approvisionnement, self.cout_stockage)
+            n = self.n_mois - debut
+            self._lignes[debut] = (
+                array("d", (distances[k] for k in range(n + 1))),
+                array("q", (-1 if precedents[k] is None else debut + precedents[k] for k in range(n + 1))),
+            )
+        return self._lignes[debut]
+
+    def precalculer(self):
+        if self.n_mois > MAX_MOIS_PRECALCUL:
+            raise ValueError(f"precalculer est limité à {MAX_MOIS_PRECALCUL} mois (O(n²) en mémoire) : "
+                             f"les lignes sont calculées à la demande au-delà")
+        for debut in range(1, self.n_mois):
+            self._ligne(debut)
+
+    def _horizon(self, debut, fin):
+        if fin is None:
+            fin = self.n_mois
+        if not 0 <= debut <= fin <= self.n_mois:
+            raise IndexError(f"Horizon ({debut}, {fin}) invalide (mois 0 à {self.n_mois})")
+        return debut, fin
+
+    def cout(self, debut=0, fin=None):
+        debut, fin = self._horizon(debut, fin)
+        if fin == self.n_mois:
+            return self.restants[debut]
+        if debut == 0:
+            return self.distances[fin]
+        return self._ligne(debut)[0][fin - debut]
+
+    # chemin [debut, ..., fin] comme reconstruct_chemin_graphe
+    def plan(self, debut=0, fin=None):
+        debut, fin = self._horizon(debut, fin)
+        if fin == self.n_mois:
+            chemin = [debut]
+            while chemin[-1] != fin:
+                chemin.append(self.suivants[chemin[-1]])
+            return chemin
+        if debut == 0:
+            return reconstruct_chemin_graphe(self.precedents, 0, fin)
+        precedents = self._ligne(debut)[1]
+        chemin = [fin]
+        while chemin[-1] != debut:
+            chemin.append(precedents[chemin[-1] - debut])
+        chemin.reverse()
+        return chemin
+
+    # commandes du plan, au format de planification_glissante
+    def commandes(self, debut=0, fin=None):
+        chemin = self.plan(debut, fin)
+        return [
+            {
+                "mois_debut": mois_debut,
+                "mois_fin": mois_fin,
+                "quantite": quantite_commande(self.prefixes, mois_debut, mois_fin),
+                "cout": cout_arc(self.prefixes, mois_debut, mois_fin, self.frais_approvisionnement, self.cout_stockage),
+            }
+            for mois_debut, mois_fin in zip(chemin, chemin[1:])
+        ]
+
+# --- k meilleurs plans : énumération paresseuse des chemins par coût croissant ---
+# algorithme d'énumération récursive (Jiménez et Marzal) spécialisé au graphe "avant" : le k-ième
+# chemin vers le mois v est le (j-ième chemin vers un mois u < v) + l'arc (u, v). Chaque mois garde
+# ses chemins déjà trouvés (coût, u, j) et un tas de candidats, rempli seulement quand on lui demande
+# un 2e chemin ; le chemin suivant de v ne demande qu'un chemin de plus à un seul mois u.
+# les chemins sont gardés sous forme de pointeurs (u, j) : reconstruire un plan coûte sa longueur.
+class EnumerateurPlans:
+    def __init__(self, installations, frais_approvisionnement, cout_stockage):
+        self.n_mois = len(installations)
+        self.frais_approvisionnement = frais_approvisionnement
+        self.cout_stockage = cout_stockage
+        self.prefixes = sommes_prefixes(installations)
+        distances, precedents = wagner_whitin_enveloppe(installations, frais_approvisionnement, cout_stockage)
+        self.distances = distances
+        # chemins[v][k] = (coût, u, j) : le (k+1)-ième chemin vers v finit par l'arc (u, v) après le (j+1)-ième vers u
+        self.chemins = [[(distances[v], precedents[v], 0)] for v in range(self.n_mois + 1)]
+        self.candidats = [None] * (self.n_mois + 1)
+        self.epuise = [False] * (self.n_mois + 1)
+        self.epuise[0] = True  # un seul chemin (vide) vers le mois 0
+
+    def _cout_arc(self, i, j):
+        return cout_arc(self.prefixes, i, j, self.frais_approvisionnement, self.cout_stockage)
+
+    # calcule le chemin numéro len(chemins[v]) vers v ; renvoie False s'il n'existe pas
+    # pile explicite à la place de la récursion de l'algorithme (horizons de plusieurs milliers de mois)
+    def _chemin_suivant(self, v):
+        pile = [v]
+        while pile:
+            w = pile[-1]
+            if self.epuise[w]:
+                pile.pop()
+                continue
+            _, u, j = self.chemins[w][-1]
+            if len(self.chemins[u]) <= j + 1 and not self.epuise[u]:
+                pile.append(u)  # il faut d'abord le chemin suivant vers u
+                continue
+            pile.pop()
+            if self.candidats[w] is None:
+                # 2e chemin demandé : tous les premiers chemins via les autres prédécesseurs
+                self.candidats[w] = [(self.distances[x] + self._cout_arc(x, w), x, 0) for x in range(w) if x != u]
+                heapq.heapify(self.candidats[w])
+            if len(self.chemins[u]) > j + 1:
+                heapq.heappush(self.candidats[w], (self.chemins[u][j + 1][0] + self._cout_arc(u, w), u, j + 1))
+            if self.candidats[w]:
+                self.chemins[w].append(heapq.heappop(self.candidats[w]))
+            else:
+                self.epuise[w] = True
+        return not self.epuise[v]
+
+    def _reconstruire(self, v, k):
+        chemin = [v]
+        while v != 0:
+            _, v, k = self.chemins[v][k]
+            chemin.append(v)
+        chemin.reverse()
+        return chemin
+
+    # (coût, chemin) par coût croissant, chemin au format de reconstruct_chemin_graphe
+    def __iter__(self):
+        fin = self.n_mois
+        k = 0
+        while True:
+            if k == len(self.chemins[fin]) and not self._chemin_suivant(fin):
+                return
+            yield self.chemins[fin][k][0], self._reconstruire(fin, k)
+            k += 1
+
+def k_meilleurs_plans(installations, frais_approvisionnement, cout_stockage, k):
+    plans = []
+    for plan in EnumerateurPlans(installations, frais_approvisionnement, cout_stockage):
+        if len(plans) == k:
+            break
+        plans.append(plan)
+    return plans
+
+# --- coûts variables dans le temps et remises sur quantité ---
+# frais[i] : frais fixes d'une commande passée au mois i ; stockage[m] : coût pour garder une cabine du mois m
+# au mois m+1 ; remises : paliers [(quantité minimale, prix unitaire), ...] "tout unités" (le prix du palier
+# atteint s'applique à toute la commande). Sans remises une cabine coûte 1, comme dans cout_arc.
+# les plans restent ceux du modèle : chaque commande couvre exactement des mois entiers consécutifs.
+
+# vrai si les coûts ne rentrent pas dans le modèle scalaire (frais et stockage constants, prix unitaire 1)
+def couts_variables(frais_approvisionnement, cout_stockage, remises=None):
+    return remises is not None or not isinstance(frais_approvisionnement, numbers.Real) or not isinstance(cout_stockage, numbers.Real)
+
+# un scalaire vaut pour tous les mois
+def vecteur_par_mois(valeur, n_mois, nom):
+    if isinstance(valeur, numbers.Real):
+        return [valeur] * n_mois
+    valeurs = list(valeur)
+    if len(valeurs) != n_mois:
+        raise ValueError(f"{nom} : {len(valeurs)} valeurs pour {n_mois} mois")
+    return valeurs
+
+# renvoie (seuils, prix) triés par seuil croissant
+def paliers_remises(remises):
+    if remises is None:
+        return [0], [1]
+    paliers = sorted((seuil, prix) for seuil, prix in remises)
+    if not paliers or paliers[0][0] > 0:
+        raise ValueError("Remises : le premier palier doit commencer à une quantité de 0")
+    seuils = [seuil for seuil, _ in paliers]
+    if len(set(seuils)) != len(seuils):
+        raise ValueError("Remises : deux paliers ont le même seuil")
+    return seuils, [prix for _, prix in paliers]
+
+# sommes préfixes du modèle variable :
+# cumul[t] = besoins des mois 0..t-1, cumul_stockage[t] = coût pour garder une cabine du mois 0 au mois t,
+# cumul_attente[t] = somme des besoins[k] * cumul_stockage[k] pour k < t
+# une cabine commandée au mois i et installée au mois k coûte cumul_stockage[k] - cumul_stockage[i] de stockage,
+# d'où pour l'arc (i, j) : (cumul_attente[j] - cumul_attente[i]) - cumul_stockage[i] * (cumul[j] - cumul[i])
+class CoutsVariables:
+    def __init__(self, installations, frais_approvisionnement, cout_stockage, remises=None):
+        n_mois = len(installations)
+        self.n_mois = n_mois
+        self.frais = vecteur_par_mois(frais_approvisionnement, n_mois, "frais_approvisionnement")
+        self.stockage = vecteur_par_mois(cout_stockage, n_mois, "cout_stockage")
+        self.seuils, self.prix = paliers_remises(remises)
+        self.cumul = [0] * (n_mois + 1)
+        self.cumul_stockage = [0] * (n_mois + 1)
+        self.cumul_attente = [0] * (n_mois + 1)
+        for k in range(n_mois):
+            self.cumul[k + 1] = self.cumul[k] + installations[k]
+            self.cumul_attente[k + 1] = self.cumul_attente[k] + installations[k] * self.cumul_stockage[k]
+            self.cumul_stockage[k + 1] = self.cumul_stockage[k] + self.stockage[k]
+
+    # O(log paliers) pour un accès isolé ; les solveurs avancent un pointeur à la place
+    def prix_unitaire(self, quantite):
+        return self.prix[max(bisect_right(self.seuils, quantite) - 1, 0)]
+
+    def quantite(self, i, j):
+        return self.cumul[j] - self.cumul[i]
+
+    def cout_arc(self, i, j):
+        quantite = self.cumul[j] - self.cumul[i]
+        attente = (self.cumul_attente[j] - self.cumul_attente[i]) - self.cumul_stockage[i] * quantite
+        return self.frais[i] + self.prix_unitaire(quantite) * quantite + attente
+
+    # chemin au format de reconstruct_chemin_graphe
+    def cout_plan(self, chemin):
+        return sum(self.cout_arc(a, b) for a, b in zip(chemin, chemin[1:]))
+
+# même récurrence que wagner_whitin ; pour j fixé, i décroît donc la quantité commandée croît (besoins >= 0) :
+# le palier n'avance que vers le haut, chaque arc coûte O(1) amorti -> O(n² + n * paliers)
+def _dp_variable(couts):
+    n_mois = couts.n_mois
+    cumul, cumul_stockage, cumul_attente = couts.cumul, couts.cumul_stockage, couts.cumul_attente
+    frais, seuils, prix = couts.frais, couts.seuils, couts.prix
+    dernier_palier = len(seuils) - 1
+    meilleurs = [0] * (n_mois + 1)
+    meilleurs_i = [None] * (n_mois + 1)
+    for j in range(1, n_mois + 1):
+        cumul_j = cumul[j]
+        attente_j = cumul_attente[j]
+        meilleur = float('inf')
+        meilleur_i = None
+        palier = 0
+        for i in range(j - 1, -1, -1):
+            quantite = cumul_j - cumul[i]
+            while palier < dernier_palier and quantite >= seuils[palier + 1]:
+                palier += 1
+            while palier > 0 and quantite < seuils[palier]:
+                palier -= 1  # besoins négatifs seulement
+            distance = meilleurs[i] + (frais[i] + prix[palier] * quantite + ((attente_j - cumul_attente[i]) - cumul_stockage[i] * quantite))
+            if distance <= meilleur:  # <= : à égalité le mois le plus ancien, comme wagner_whitin
+                meilleur = distance
+                meilleur_i = i
+        meilleurs[j] = meilleur
+        meilleurs_i[j] = meilleur_i
+    return dict(enumerate(meilleurs)), dict(enumerate(meilleurs_i))
+
+# un seul prix unitaire p : même enveloppe que wagner_whitin_enveloppe, la droite du mois i a pour pente
+# p - cumul_stockage[i] (décroissante si stockage >= 0) et pour ordonnée
+# distance[i] + frais[i] - p * cumul[i] - cumul_attente[i] + cumul_stockage[i] * cumul[i], interrogée en x = cumul[j]
+def _enveloppe_variable(couts):
+    n_mois = couts.n_mois
+    cumul, cumul_stockage, cumul_attente, frais = couts.cumul, couts.cumul_stockage, couts.cumul_attente, couts.frais
+    p = couts.prix[0]
+    meilleurs = [0] * (n_mois + 1)
+    distances = {0: 0}
+    precedents = {0: None}
+    pentes = [p]
+    ordonnees = [frais[0] if n_mois else 0]
+    mois = [0]
+    tete = 0
+    for j in range(1, n_mois + 1):
+        x = cumul[j]
+        while tete + 1 < len(pentes) and ordonnees[tete + 1] + pentes[tete + 1] * x <= ordonnees[tete] + pentes[tete] * x:
+            tete += 1
+        i = mois[tete]
+
+        # coût recalculé exactement comme dans _dp_variable (mêmes arrondis)
+        quantite = x - cumul[i]
+        meilleur = meilleurs[i] + (frais[i] + p * quantite + ((cumul_attente[j] - cumul_attente[i]) - cumul_stockage[i] * quantite))
+        meilleurs[j] = meilleur
+        distances[j] = meilleur
+        precedents[j] = i
+        if j == n_mois:
+            break
+
+        pente = p - cumul_stockage[j]
+        ordonnee = meilleur + frais[j] - p * cumul[j] - cumul_attente[j] + cumul_stockage[j] * cumul[j]
+        if pentes[-1] == pente:
+            # même pente (stockage nul) : on garde la plus basse, à égalité le mois le plus ancien
+            if ordonnee >= ordonnees[-1]:
+                continue
+            pentes.pop()
+            ordonnees.pop()
+            mois.pop()
+        while len(pentes) - tete >= 2:
+            p1, b1 = pentes[-2], ordonnees[-2]
+            p2, b2 = pentes[-1], ordonnees[-1]
+            if (ordonnee - b1) * (p1 - p2) <= (b2 - b1) * (p1 - pente):
+                pentes.pop()
+                ordonnees.pop()
+                mois.pop()
+            else:
+                break
+        pentes.append(pente)
+        ordonnees.append(ordonnee)
+        mois.append(j)
+
+    return distances, precedents
+
+# renvoie (distances, precedents) comme wagner_whitin ; frais et stockage scalaires ou par mois
+# sans remises (un seul prix) avec besoins et stockage >= 0 : O(n) par l'enveloppe ; sinon O(n² + n * paliers)
+def wagner_whitin_variable(installations, frais_approvisionnement, cout_stockage, remises=None):
+    couts = CoutsVariables(installations, frais_approvisionnement, cout_stockage, remises)
+    if len(couts.prix) == 1 and all(h >= 0 for h in couts.stockage) and all(q >= 0 for q in installations):
+        return _enveloppe_variable(couts)
+    return _dp_variable(couts)
+
+# --- point d'entrée commun des solveurs ---
+# "dp" : programmation dynamique (par défaut)
+# "enveloppe" : programmation dynamique en temps linéaire, pour les très longs horizons
+# "dag" : graphe networkx + un passage dans l'ordre topologique
+# "dijkstra" : graphe networkx + detect_cycle + dijkstra, pour expliquer/visualiser le graphe
+METHODES = ("dp", "enveloppe", "dag", "dijkstra")
+
+# frais / stockage par mois ou remises : wagner_whitin_variable (méthodes "dp" et "enveloppe" seulement)
+def resoudre(installations, frais_approvisionnement, cout_stockage, methode="dp", remises=None):
+    n_mois = len(installations)
+    if couts_variables(frais_approvisionnement, cout_stockage, remises):
+        if methode not in ("dp", "enveloppe"):
+            raise ValueError(f"Coûts par mois ou remises : méthode dp ou enveloppe uniquement (reçu : {methode})")
+        distances, precedents = wagner_whitin_variable(installations, frais_approvisionnement, cout_stockage, remises)
+    elif methode == "dp":
+        distances, precedents = wagner_whitin(installations, frais_approvisionnement, cout_stockage)
+    elif methode == "enveloppe":
+        distances, precedents = wagner_whitin_enveloppe(installations, frais_approvisionnement, cout_stockage)
+    elif methode == "dag":
+        G, n_mois = init_graphe(installations, frais_approvisionnement, cout_stockage)
+        distances, precedents = plus_court_chemin_dag(G, 0, n_mois)
+    elif methode == "dijkstra":
+        G, n_mois = init_graphe(installations, frais_approvisionnement, cout_stockage)
+        if detect_cycle(G):
+            raise ValueError("Le graphe contient des cycles, ce qui ne devrait pas être le cas.")
+        distances, precedents = dijkstra(G, 0, n_mois)
+    else:
+        raise ValueError(f"Méthode inconnue : {methode} (attendu : {', '.join(METHODES)})")
+    return distances, precedents, n_mois
+
+
+# --- reconstruction du chemin optimal ---
+def reconstruct_chemin_graphe(precedents, deb, fin):
+    if fin not in precedents and fin != deb:
+        return []  # pas de chemin trouvé
+        
+    chemin = []
+    noeud_actuel = fin
+    while noeud_actuel is not None:
+        chemin.append(noeud_actuel)
+        noeud_actuel = precedents.get(noeud_actuel)
+    chemin.reverse()  # on inverse le chemin pour qu'il soit bien du début à la fin
+    return chemin
+
+# --- Calcul des coûts pour les différentes stratégies ---
+
+# fonction auxiliere définie ici car ce calcul est refait ailleurs 
+# (fonction et non variables globales car appelée aussi d'interface.py)
+# donne la liste de tous les couts suivant le nb de mois
+def calcul_couts_de_base(installations, frais_approvisionnement, cout_stockage):
+    n_mois = len(installations)
+    total_cabines = sum(installations)
+
+    # strat 1 : tout au début
+    cout_une_fois = [0] * (n_mois + 1)
+    cout_total = frais_approvisionnement + total_cabines
+    cout_une_fois[1] = cout_total
+    stock = total_cabines
+    for i in range(n_mois):
+        stock -= installations[i]
+        cout_total += stock * cout_stockage
+        cout_une_fois[i + 1] = cout_total
+
+    # strat 2 : achats mensuels (tout est installé dans le mois : jamais de stock)
+    cout_mensuel = [0] * (n_mois + 1)
+    cout_total = 0
+    for i in range(n_mois):
+        cout_total += frais_approvisionnement + installations[i]
+        cout_mensuel[i + 1] = cout_total
+
+    return cout_une_fois, cout_mensuel
+
+# --- fonction principale ---
+# donne uniquement les couts finaux
+def calcul_couts_strategies(installations, frais_approvisionnement, cout_stockage, remises=None):
+    if couts_variables(frais_approvisionnement, cout_stockage, remises):
+        couts = CoutsVariables(installations, frais_approvisionnement, cout_stockage, remises)
+        n_mois = len(installations)
+        return {
+            "directeur_achats": couts.cout_plan([0, n_mois] if n_mois else [0]),
+            "directeur_financier": couts.cout_plan(list(range(n_mois + 1))),
+        }
+
+    cout_une_fois, cout_mensuel = calcul_couts_de_base( installations, frais_approvisionnement, cout_stockage)
+
+    total_directeur_achats = cout_une_fois[-1]  # achat au mois 1
+    cout_directeur_financier = cout_mensuel[-1]  # achat chaque mois
+
+    return {
+        "directeur_achats": total_directeur_achats,
+        "directeur_financier": cout_directeur_financier,
+    }
@@ -0,0 +1,170 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from noyau import resoudre, reconstruct_chemin_graphe, calcul_couts_strategies
+from batch import resoudre_batch
+
+
+# --- côté processus fils : la matrice des besoins est attachée une seule fois par processus ---
+_memoire = None
+_besoins = None
+
+
+def _attacher(nom, forme):
+    global _memoire, _besoins
+    # les processus du pool partagent le resource_tracker du principal, qui libère le segment à la fin
+    _memoire = shared_memory.SharedMemory(name=nom)
+    _besoins = np.ndarray(forme, dtype=np.float64, buffer=_memoire.buf)
+
+
+# résolution article par article avec resoudre (mêmes tableaux de sortie que resoudre_batch)
+def _resoudre_articles(besoins, frais, stockage, longueurs, methode):
+    n_articles, n_mois = besoins.shape
+    resultats = {
+        "cout_optimal": np.empty(n_articles),
+        "commandes": np.zeros((n_articles, n_mois), dtype=bool),
+        "directeur_achats": np.empty(n_articles),
+        "directeur_financier": np.empty(n_articles),
+    }
+    for k in range(n_articles):
+        installations = besoins[k, :longueurs[k]].tolist()
+        distances, precedents, n_mois_article = resoudre(installations, frais[k], stockage[k], methode)
+        chemin = reconstruct_chemin_graphe(precedents, 0, n_mois_article)
+        autres_couts = calcul_couts_strategies(installations, frais[k], stockage[k])
+        resultats["cout_optimal"][k] = distances[n_mois_article]
+        resultats["commandes"][k, chemin[:-1]] = True
+        resultats["directeur_achats"][k] = autres_couts["directeur_achats"]
+        resultats["directeur_financier"][k] = autres_couts["directeur_financier"]
+    return resultats
+
+
+def _resoudre_shard(debut, fin, frais, stockage, longueurs, methode):
+    debut_mur = time.perf_counter()
+    debut_cpu = time.process_time()
+    besoins = _besoins[debut:fin]
+    if methode == "batch":
+        resultats = resoudre_batch(besoins, frais, stockage, longueurs)
+    else:
+        resultats = _resoudre_articles(besoins, frais, stockage, longueurs, methode)
+    resultats["debut"] = debut
+    resultats["fin"] = fin
+    resultats["duree"] = time.perf_counter() - debut_mur
+    resultats["duree_cpu"] = time.process_time() - debut_cpu
+    resultats["pid"] = os.getpid()
+    return resultats
+
+
+# --- côté processus principal ---
+# découpe la matrice articles x mois en shards de taille_shard articles, les résout sur n_processus
+# processus et renvoie les résultats shard par shard, dans l'ordre des articles (générateur)
+# methode : "batch" (resoudre_batch, vectorisé) ou une méthode de noyau.resoudre ("dp", "enveloppe", ...)
+# annulation : threading.Event optionnel ; s'il est levé, les shards pas encore lancés sont abandonnés
+# (fermer le générateur a le même effet)
+def planifier_en_parallele(besoins, frais_approvisionnement, cout_stockage, longueurs=None,
+                           n_processus=None, taille_shard=2048, methode="batch", annulation=None):
+    besoins = np.asarray(besoins, dtype=np.float64)
+    if besoins.ndim != 2:
+        raise ValueError("besoins doit être une matrice articles x mois")
+    if taille_shard < 1:
+        raise ValueError("taille_shard doit être strictement positive")
+    n_articles, n_mois = besoins.shape
+    frais = np.broadcast_to(np.asarray(frais_approvisionnement, dtype=np.float64), (n_articles,))
+    stockage = np.broadcast_to(np.asarray(cout_stockage, dtype=np.float64), (n_articles,))
+    if longueurs is None:
+        longueurs = np.full(n_articles, n_mois, dtype=np.int64)
+    longueurs = np.asarray(longueurs, dtype=np.int64)
+    n_processus = n_processus or os.cpu_count() or 1
+    if annulation is None:
+        annulation = threading.Event()
+    if n_articles == 0:
+        return
+
+    # copie unique de la matrice dans un segment partagé : les shards ne transportent que des indices
+    memoire = shared_memory.SharedMemory(create=True, size=besoins.nbytes)
+    try:
+        np.ndarray(besoins.shape, dtype=np.float64, buffer=memoire.buf)[:] = besoins
+        bornes = deque((debut, min(debut + taille_shard, n_articles)) for debut in range(0, n_articles, taille_shard))
+        with ProcessPoolExecutor(max_workers=n_processus, initializer=_attacher,
+                                 initargs=(memoire.name, besoins.shape)) as executeur:
+            # au plus deux shards en attente par processus : la mémoire des résultats reste bornée
+            en_cours = deque()
+            try:
+                while bornes or en_cours:
+                    while bornes and len(en_cours) < 2 * n_processus and not annulation.is_set():
+                        debut, fin = bornes.popleft()
+                        en_cours.append(executeur.submit(_resoudre_shard, debut, fin, frais[debut:fin],
+                                                         stockage[debut:fin], longueurs[debut:fin], methode))
+                    if annulation.is_set():
+                        break
+                    yield en_cours.popleft().result()
+            finally:
+                for futur in en_cours:
+                    futur.cancel()
+    finally:
+        memoire.close()
+        memoire.unlink()
+
+
+# --- tout résoudre et rassembler les shards dans des tableaux uniques ---
+def resoudre_en_parallele(besoins, frais_approvisionnement, cout_stockage, longueurs=None, **options):
+    besoins = np.asarray(besoins, dtype=np.float64)
+    n_articles, n_mois = besoins.shape
+    resultats = {
+        "cout_optimal": np.empty(n_articles),
+        "commandes": np.zeros((n_articles, n_mois), dtype=bool),
+        "directeur_achats": np.empty(n_articles),
+        "directeur_financier": np.empty(n_articles),
+        "durees": [],
+    }
+    for shard in planifier_en_parallele(besoins, frais_approvisionnement, cout_stockage, longueurs, **options):
+        debut, fin = shard["debut"], shard["fin"]
+        for cle in ("cout_optimal", "commandes", "directeur_achats", "directeur_financier"):
+            resultats[cle][debut:fin] = shard[cle]
+        resultats["durees"].append((debut, fin, shard["duree"], shard["duree_cpu"]))
+    return resultats
+
+
+def tests_parallele():
+    print("=== Tests du planificateur parallèle ===")
+
+    generateur = np.random.default_rng(0)
+    besoins = generateur.integers(0, 1000, (500, 24)).astype(float)
+    longueurs = generateur.integers(1, 25, 500)
+    frais = generateur.integers(0, 5000, 500).astype(float)
+    attendus = resoudre_batch(besoins, frais, 2, longueurs)
+
+    print("Test de resoudre_en_parallele (comparaison avec resoudre_batch):")
+    for methode in ("batch", "dp"):
+        debut = time.perf_counter()
+        obtenus = resoudre_en_parallele(besoins, frais, 2, longueurs, n_processus=2, taille_shard=64, methode=methode)
+        duree = time.perf_counter() - debut
+        identiques = all(np.array_equal(obtenus[cle], attendus[cle]) for cle in attendus)
+        ordre = [d[0] for d in obtenus["durees"]] == list(range(0, 500, 64))
+        print(f"- methode={methode} : résultats identiques {identiques}, shards dans l'ordre {ordre}, {duree:.2f} s")
+        if identiques and ordre:
+            print("Fonction resoudre_en_parallele bien implémentée")
+        else:
+            print("Fonction resoudre_en_parallele incorrectement implémentée")
+
+    print("\nTest de l'annulation:")
+    annulation = threading.Event()
+    recus = 0
+    for _ in planifier_en_parallele(besoins, frais, 2, longueurs, n_processus=2, taille_shard=10, annulation=annulation):
+        recus += 1
+        if recus == 3:
+            annulation.set()
+    print(f"Devrait afficher : 3 shards reçus sur 50\nAffiche : {recus} shards reçus sur 50")
+    if recus == 3:
+        print("Annulation bien implémentée")
+    else:
+        print("Annulation incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_parallele()
@@ -0,0 +1,396 @@
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import noyau
+from graphiques import GraphiquesResultats, preparer_donnees
+
+
+# --- rendu de graphiques en masse, sans affichage ---
+# chaque processus crée un seul modèle de figure (Figure + FigureCanvasAgg : ni pyplot, ni fenêtre, ni backend
+# global) et ne fait ensuite que changer les données de ses artistes (GraphiquesResultats.mettre_a_jour).
+# le modèle est fermé et recréé tous les RECYCLER_APRES graphiques : ce que matplotlib garde d'un rendu
+# à l'autre (caches de textes, de polices...) ne peut pas s'accumuler sur des milliers d'articles.
+# PNG seul : le modèle est en mode blit (cf. GraphiquesResultats). Tant que les limites arrondies des axes ne
+# changent pas (articles de même horizon et d'ordres de grandeur voisins), le fond (axes, graduations, légendes)
+# est restauré tel quel et seuls les courbes, les commandes et le titre sont redessinés ; le tampon Agg est
+# ensuite écrit directement en PNG, sans second dessin. SVG et PDF sont vectoriels : dessin complet.
+FORMATS = ("png", "svg")
+RECYCLER_APRES = 500
+FONDS_MAX = 8  # fonds mémorisés par modèle (un par jeu de limites) : 5,5 Mio chacun en 1200 x 1200
+NIVEAU_COMPRESSION_PNG = 1  # zlib : fichiers environ 40 % plus gros qu'au niveau 6, écriture plus rapide
+# un article invalide (série vide, coûts par mois, remises, valeurs non numériques) est compté dans
+# rapport["erreurs"] et signalé au journal, sans arrêter le lot ni les autres processus (cf. cli.ERREURS_SERIE)
+ERREURS_ARTICLE = (ValueError, TypeError, KeyError)
+
+
+def _rss():
+    try:  # mémoire résidente courante (Linux)
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+class ModeleRapport:
+    def __init__(self, taille=(12, 12), dpi=100, blit=False):
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        self.fig = Figure(figsize=taille, dpi=dpi)
+        FigureCanvasAgg(self.fig)
+        self.blit = blit
+        self.graphiques = GraphiquesResultats(self.fig, blit=blit, fonds_max=FONDS_MAX)
+        self.titre = self.graphiques.ajouter_artiste(self.fig.suptitle("", fontsize=14))
+        # marges fixes plutôt qu'un tight_layout par graphique : la mise en page ne se recalcule jamais
+        self.fig.subplots_adjust(left=0.08, right=0.97, bottom=0.05, top=0.93, hspace=0.25)
+        self.rendus = 0
+        self.dessins_complets = 0
+
+    # sans dessin : pour les formats vectoriels, savefig dessine lui-même
+    def mettre_a_jour(self, identifiant, donnees):
+        self.titre.set_text(f"Article {identifiant}")
+        self.graphiques.mettre_a_jour(donnees)
+        self.rendus += 1
+
+    # mise à jour + dessin dans le tampon Agg (blit si possible) ; renvoie "complet" ou "blit"
+    def afficher(self, identifiant, donnees):
+        self.titre.set_text(f"Article {identifiant}")
+        mode = self.graphiques.afficher(donnees)
+        self.rendus += 1
+        self.dessins_complets += mode == "complet"
+        return mode
+
+    # écrit le tampon dessiné par afficher
+    def ecrire_png(self, chemin):
+        from matplotlib.image import imsave
+        imsave(chemin, self.fig.canvas.buffer_rgba(), format="png", dpi=self.fig.dpi,
+               pil_kwargs={"compress_level": NIVEAU_COMPRESSION_PNG})
+
+    # cible : chemin de fichier ou PdfPages (une page de plus) ; pas en mode blit (artistes animés non dessinés)
+    def enregistrer(self, cible, format=None):
+        if hasattr(cible, "savefig"):
+            cible.savefig(self.fig)
+        else:
+            self.fig.savefig(cible, format=format)
+
+    def fermer(self):
+        self.fig.clear()
+        self.fig = self.graphiques = self.titre = None
+
+
+# renvoie un modèle neuf si modele est absent ou a assez servi
+def recycler(modele, taille, dpi, blit=False, recycler_apres=RECYCLER_APRES):
+    if modele is not None and modele.rendus < recycler_apres and modele.blit == blit:
+        return modele
+    if modele is not None:
+        modele.fermer()
+    return ModeleRapport(taille, dpi, blit)
+
+
+# nom unique même si deux articles ont le même id : position dans l'entrée + id nettoyé
+def nom_fichier(position, identifiant):
+    nettoye = re.sub(r"[^\w.-]+", "_", str(identifiant)).strip("._")[:80]
+    return f"{position:06d}_{nettoye}" if nettoye else f"{position:06d}"
+
+
+# séries au format de cli.lire_series : {id, installations, frais_approvisionnement, cout_stockage}
+def preparer_article(serie, frais_defaut, stockage_defaut, methode):
+    if "erreur" in serie:  # ligne illisible, déjà signalée par cli.lire_series
+        raise ValueError(serie["erreur"])
+    frais = serie.get("frais_approvisionnement")
+    frais = frais_defaut if frais is None else frais
+    stockage = serie.get("cout_stockage")
+    stockage = stockage_defaut if stockage is None else stockage
+    if not serie["installations"]:
+        raise ValueError("aucun mois")
+    if noyau.couts_variables(frais, stockage, serie.get("remises")):
+        raise ValueError("les graphiques demandent des frais et un stockage scalaires, sans remises")
+    _, precedents, n_mois = noyau.resoudre(serie["installations"], frais, stockage, methode)
+    return preparer_donnees(serie["installations"], frais, stockage, precedents, n_mois)
+
+
+# --- côté processus fils ---
+_modele = None
+_taille = (12, 12)
+_dpi = 100
+
+
+def _initialiser(taille, dpi):
+    global _taille, _dpi
+    _taille, _dpi = taille, dpi
+
+
+# (donnees, None) ou (None, message d'erreur) : un article invalide ne fait pas échouer le lot
+def _preparer_ou_erreur(position, serie, frais_defaut, stockage_defaut, methode):
+    try:
+        return preparer_article(serie, frais_defaut, stockage_defaut, methode), None
+    except ERREURS_ARTICLE as erreur:
+        return None, f"Article {position + 1} ({serie.get('id') if isinstance(serie, dict) else '?'}) : {erreur}"
+
+
+# un fichier par article et par format, dans dossier
+def _rendre_lot(premier, series, dossier, formats, frais_defaut, stockage_defaut, methode):
+    global _modele
+    debut = time.perf_counter()
+    dessins_complets = 0
+    erreurs = []
+    for k, serie in enumerate(series):
+        donnees, erreur = _preparer_ou_erreur(premier + k, serie, frais_defaut, stockage_defaut, methode)
+        if erreur is not None:
+            erreurs.append(erreur)
+            continue
+        _modele = recycler(_modele, _taille, _dpi, blit="svg" not in formats)
+        base = os.path.join(dossier, nom_fichier(premier + k, serie["id"]))
+        if "png" in formats:
+            dessins_complets += _modele.afficher(serie["id"], donnees) == "complet"
+            _modele.ecrire_png(f"{base}.png")
+        else:
+            _modele.mettre_a_jour(serie["id"], donnees)
+        for format in formats:
+            if format != "png":
+                _modele.enregistrer(f"{base}.{format}", format)
+    rendus = len(series) - len(erreurs)
+    return {"graphiques": rendus, "fichiers": rendus * len(formats), "dessins_complets": dessins_complets, "erreurs": erreurs,
+            "duree": time.perf_counter() - debut, "pid": os.getpid(), "rss": _rss()}
+
+
+# PDF unique : les fils résolvent et préparent les données (petites : courbes sous-échantillonnées),
+# le processus principal écrit les pages dans l'ordre
+def _preparer_lot(premier, series, frais_defaut, stockage_defaut, methode):
+    donnees, erreurs = [], []
+    for k, serie in enumerate(series):
+        article, erreur = _preparer_ou_erreur(premier + k, serie, frais_defaut, stockage_defaut, methode)
+        if erreur is None:
+            donnees.append((serie["id"], article))
+        else:
+            erreurs.append(erreur)
+    return {"donnees": donnees, "erreurs": erreurs, "pid": os.getpid(), "rss": _rss()}
+
+
+# --- côté processus principal ---
+# sortie : dossier (un fichier par article et par format de formats) ou fichier .pdf (une page par article)
+# les séries sont lues par lots de taille_lot, au plus deux lots en attente par processus : la mémoire reste
+# bornée quel que soit le nombre d'articles. Renvoie le nombre de graphiques, le débit, la mémoire maximale
+# et les messages des articles en erreur (non rendus).
+def generer_rapports(series, sortie, formats=("png",), n_processus=None, taille_lot=50, methode="dp",
+                     frais_defaut=2000, stockage_defaut=2, taille=(12, 12), dpi=100,
+                     journal=None, intervalle_journal=5.0):
+    pdf = sortie.lower().endswith(".pdf")
+    if not pdf:
+        inconnus = [f for f in formats if f not in FORMATS]
+        if inconnus or not formats:
+            raise ValueError(f"Formats non reconnus : {inconnus or formats} (attendu : {', '.join(FORMATS)} ou une sortie .pdf)")
+        os.makedirs(sortie, exist_ok=True)
+    if taille_lot < 1:
+        raise ValueError("taille_lot doit être strictement positive")
+    series = iter(series)
+    n_processus = n_processus or os.cpu_count() or 1
+
+    rapport = {"graphiques": 0, "fichiers": 0, "dessins_complets": 0, "erreurs": [], "processus": set(), "rss_max": 0}
+    modele = pages = None
+    if pdf:
+        from matplotlib.backends.backend_pdf import PdfPages
+        pages = PdfPages(sortie)
+    debut = time.perf_counter()
+    dernier_journal = debut
+    try:
+        with ProcessPoolExecutor(max_workers=n_processus, initializer=_initialiser, initargs=(taille, dpi)) as executeur:
+            en_cours = deque()
+            premier = 0
+            while True:
+                while len(en_cours) < 2 * n_processus:
+                    lot = list(islice(series, taille_lot))
+                    if not lot:
+                        break
+                    if pdf:
+                        en_cours.append(executeur.submit(_preparer_lot, premier, lot, frais_defaut, stockage_defaut, methode))
+                    else:
+                        en_cours.append(executeur.submit(_rendre_lot, premier, lot, sortie, formats,
+                                                         frais_defaut, stockage_defaut, methode))
+                    premier += len(lot)
+                if not en_cours:
+                    break
+                resultat = en_cours.popleft().result()
+                if pdf:
+                    for identifiant, donnees in resultat["donnees"]:
+                        modele = recycler(modele, taille, dpi)
+                        modele.mettre_a_jour(identifiant, donnees)
+                        modele.enregistrer(pages)
+                    rapport["graphiques"] += len(resultat["donnees"])
+                    rapport["dessins_complets"] += len(resultat["donnees"])
+                    rapport["rss_max"] = max(rapport["rss_max"], _rss())
+                else:
+                    rapport["graphiques"] += resultat["graphiques"]
+                    rapport["fichiers"] += resultat["fichiers"]
+                    rapport["dessins_complets"] += resultat["dessins_complets"]
+                rapport["erreurs"].extend(resultat["erreurs"])
+                if journal is not None:
+                    for erreur in resultat["erreurs"]:
+                        print(f"Erreur : {erreur}", file=journal)
+                rapport["processus"].add(resultat["pid"])
+                rapport["rss_max"] = max(rapport["rss_max"], resultat["rss"])
+
+                maintenant = time.perf_counter()
+                if journal is not None and maintenant - dernier_journal >= intervalle_journal:
+                    print(f"{rapport['graphiques']} graphiques, {rapport['graphiques'] / (maintenant - debut):,.1f} graphiques/s", file=journal)
+                    dernier_journal = maintenant
+    finally:
+        if pages is not None:
+            pages.close()
+        if modele is not None:
+            modele.fermer()
+
+    duree = time.perf_counter() - debut
+    if pdf:
+        rapport["fichiers"] = 1
+    rapport["processus"] = len(rapport["processus"])
+    rapport["duree"] = duree
+    rapport["debit"] = rapport["graphiques"] / duree if duree > 0 else 0.0
+    return rapport
+
+
+def resume_rapports(rapport):
+    return (f"{rapport['graphiques']} graphiques en {rapport['duree']:.2f} s ({rapport['debit']:,.1f} graphiques/s), "
+            f"{rapport['fichiers']} fichier(s), {rapport['dessins_complets']} dessin(s) complet(s), {len(rapport['erreurs'])} en erreur, "
+            f"{rapport['processus']} processus, "
+            f"mémoire max par processus {rapport['rss_max'] / 2**20:.0f} Mio")
+
+
+def tests_rapports():
+    import random
+    print("=== Tests du rendu de rapports en masse ===")
+    generateur = random.Random(0)
+    series = [{"id": f"SKU-{k % 25}/a", "installations": [generateur.randint(0, 1000) for _ in range(generateur.randint(1, 120))],
+               "frais_approvisionnement": generateur.choice([None, 500, 3000]), "cout_stockage": None}
+              for k in range(40)]
+
+    with tempfile.TemporaryDirectory() as dossier:
+        print("Test des fichiers PNG et SVG (noms uniques malgré des id en double, images valides):")
+        rapport = generer_rapports(series, dossier, formats=("png", "svg"), n_processus=2, taille_lot=8)
+        fichiers = sorted(os.listdir(dossier))
+        pngs = [f for f in fichiers if f.endswith(".png")]
+        with open(os.path.join(dossier, pngs[0]), "rb") as f:
+            entete = f.read(24)
+        dimensions = (int.from_bytes(entete[16:20], "big"), int.from_bytes(entete[20:24], "big"))
+        with open(os.path.join(dossier, fichiers[-1])) as f:
+            svg = f.read()
+        resultat = [len(fichiers), len(pngs), entete[:8] == b"\x89PNG\r\n\x1a\n", dimensions, "<svg" in svg and "Article SKU-14/a" in svg]
+        attendu = [80, 40, True, (1200, 1200), True]
+        print(f"Devrait afficher : {attendu}\nAffiche : {resultat}")
+        if resultat == attendu and rapport["graphiques"] == 40 and rapport["fichiers"] == 80:
+            print("Rendu par fichiers bien implémenté")
+        else:
+            print("Rendu par fichiers incorrectement implémenté")
+
+        print("\nTest du PDF unique (une page par article, dans l'ordre de l'entrée):")
+        chemin = os.path.join(dossier, "rapport.pdf")
+        rapport = generer_rapports(series, chemin, n_processus=2, taille_lot=8)
+        with open(chemin, "rb") as f:
+            contenu = f.read()
+        n_pages = len(re.findall(rb"/Type\s*/Page\b", contenu))
+        print(f"Devrait afficher : 40 pages, 1 fichier\nAffiche : {n_pages} pages, {rapport['fichiers']} fichier")
+        if n_pages == 40 and rapport["fichiers"] == 1 and rapport["graphiques"] == 40:
+            print("Rendu PDF bien implémenté")
+        else:
+            print("Rendu PDF incorrectement implémenté")
+
+        print("\nTest des articles invalides (série vide, coûts par mois, remises, valeur non numérique, ligne illisible):")
+        invalides = [{"id": "vide", "installations": []},
+                     {"id": "par_mois", "installations": [10, 20], "frais_approvisionnement": [100, 200], "cout_stockage": None},
+                     {"id": "remises", "installations": [10, 20], "remises": [[0, 1.0], [15, 0.5]]},
+                     {"id": "texte", "installations": [10, "abc"]},
+                     {"id": 7, "installations": [], "erreur": "Ligne 7 : JSON invalide"}]
+        melange = series[:10] + invalides + series[10:20]
+        resultats = {}
+        for cible in ("invalides", "invalides.pdf"):
+            rapport = generer_rapports(melange, os.path.join(dossier, cible), n_processus=2, taille_lot=4)
+            resultats[cible] = [rapport["graphiques"], [erreur.split(" : ")[0] for erreur in rapport["erreurs"]]]
+        n_fichiers = len(os.listdir(os.path.join(dossier, "invalides")))
+        attendu = [20, ["Article 11 (vide)", "Article 12 (par_mois)", "Article 13 (remises)", "Article 14 (texte)", "Article 15 (7)"]]
+        print(f"Devrait afficher : {attendu}, {attendu}, 20 fichiers\nAffiche : {resultats['invalides']}, {resultats['invalides.pdf']}, {n_fichiers} fichiers")
+        if resultats["invalides"] == attendu and resultats["invalides.pdf"] == attendu and n_fichiers == 20:
+            print("Gestion des articles invalides bien implémentée")
+        else:
+            print("Gestion des articles invalides incorrectement implémentée")
+
+        print("\nTest du modèle de figure (blit identique au dessin complet, artistes réutilisés, mémoire stable, recyclage):")
+        import numpy as np
+        from graphiques import _limite_ronde
+        grandes = [{"id": k, "installations": [generateur.randint(0, 1000) for _ in range(120)]} for k in range(400)]
+        donnees = [preparer_article(serie, 2000, 2, "dp") for serie in grandes[:100]]
+        limites = [(d["n_mois"], _limite_ronde(d["cout_max"]), _limite_ronde(float(d["quantites"].max()) * 1.1)) for d in donnees]
+        premier, second = next((a, b) for a in range(100) for b in range(a + 1, 100) if limites[a] == limites[b])
+        modele = recycler(None, (12, 12), 100, blit=True)
+        modes = [modele.afficher("A", donnees[premier]), modele.afficher("B", donnees[second])]
+        complet = ModeleRapport(blit=False)
+        complet.afficher("B", donnees[second])
+        # en blit, les artistes sont dessinés par-dessus le cadre et la légende : quelques pixels peuvent différer
+        ecart = np.mean(np.any(np.asarray(modele.fig.canvas.buffer_rgba()) != np.asarray(complet.fig.canvas.buffer_rgba()), axis=2))
+        complet.fermer()
+
+        sortie = os.path.join(dossier, "modele.png")
+        tracemalloc.start()
+        for k in range(150):
+            modele.afficher(k, donnees[k % len(donnees)])
+            modele.ecrire_png(sortie)
+            if k == 49:
+                memoire_debut = tracemalloc.get_traced_memory()[0]
+                n_artistes = len(modele.fig.get_children()) + sum(len(ax.get_children()) for ax in modele.fig.axes)
+        croissance = tracemalloc.get_traced_memory()[0] - memoire_debut
+        tracemalloc.stop()
+        n_artistes_apres = len(modele.fig.get_children()) + sum(len(ax.get_children()) for ax in modele.fig.axes)
+        ancien = modele
+        modele = recycler(modele, (12, 12), 100, blit=True, recycler_apres=150)
+        resultat = [modes, bool(ecart < 0.01), n_artistes_apres <= n_artistes, croissance < 0.5 * 2**20, modele is not ancien and ancien.fig is None]
+        print(f"Devrait afficher : [['complet', 'blit'], True, True, True, True]\nAffiche : {resultat} "
+              f"({ecart:.2%} de pixels différents, croissance mémoire {croissance / 2**20:.2f} Mio sur 100 graphiques)")
+        if resultat == [["complet", "blit"], True, True, True, True]:
+            print("Classe ModeleRapport bien implémentée")
+        else:
+            print("Classe ModeleRapport incorrectement implémentée")
+
+        print("\nTest de débit (400 graphiques PNG, 2 processus):")
+        rapport = generer_rapports(grandes, os.path.join(dossier, "debit"), n_processus=2)
+        print(f"Devrait afficher : 400 graphiques, plus de 8 graphiques/s, moins de 300 Mio par processus\nAffiche : {resume_rapports(rapport)}")
+        if rapport["graphiques"] == 400 and rapport["debit"] > 8 and rapport["rss_max"] < 300 * 2**20:
+            print("Fonction generer_rapports bien implémentée")
+        else:
+            print("Fonction generer_rapports incorrectement implémentée")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Graphiques des résultats en masse, sans affichage (Agg, plusieurs processus)")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    rendre = commandes.add_parser("rendre", help="un graphique par série d'un fichier de besoins")
+    rendre.add_argument("entree", help="fichier .csv, .jsonl ou .parquet (une série par ligne, cf. cli.py)")
+    rendre.add_argument("sortie", help="dossier (un fichier par série) ou fichier .pdf (une page par série)")
+    rendre.add_argument("--formats", nargs="+", default=["png"], choices=FORMATS)
+    rendre.add_argument("--processus", type=int, default=None)
+    rendre.add_argument("--taille-lot", type=int, default=50, help="séries envoyées à la fois à un processus")
+    rendre.add_argument("--frais", type=float, default=2000, help="frais d'approvisionnement si la colonne est absente")
+    rendre.add_argument("--stockage", type=float, default=2, help="coût de stockage si la colonne est absente")
+    rendre.add_argument("--methode", default="dp", choices=noyau.METHODES)
+    rendre.add_argument("--dpi", type=int, default=100)
+    commandes.add_parser("tests", help="lance les tests du module")
+    args = parser.parse_args(arguments)
+
+    if args.commande == "tests":
+        tests_rapports()
+        return 0
+    from cli import lire_series
+    rapport = generer_rapports(lire_series(args.entree, args.taille_lot), args.sortie, tuple(args.formats),
+                               args.processus, args.taille_lot, args.methode, args.frais, args.stockage,
+                               dpi=args.dpi, journal=sys.stderr)
+    print(resume_rapports(rapport), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
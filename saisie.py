@@ -0,0 +1,164 @@
+import csv
+import os
+import re
+import tempfile
+import time
+
+from cli import COLONNES_PARAMETRES, lire_csv, lire_jsonl
+
+
+# --- lecture des besoins collés depuis un tableur ou importés depuis un fichier ---
+# les valeurs restent des chaînes (comme le texte des champs de saisie) : la conversion se fait
+# en une seule fois dans valider_besoins
+
+SEPARATEURS = re.compile(r"[\t;,]")
+ESPACES = re.compile(r"\s")  # \s couvre aussi les espaces insécables des séparateurs de milliers
+
+
+def _nettoyer(valeur):
+    return ESPACES.sub("", str(valeur))
+
+
+def _est_nombre(valeur):
+    try:
+        float(_nettoyer(valeur))
+        return True
+    except ValueError:
+        return False
+
+
+# une colonne copiée (une valeur par ligne) ou une ligne copiée (valeurs séparées par des tabulations) ;
+# une première cellule non numérique est prise pour un en-tête et ignorée
+def lire_valeurs(texte):
+    lignes = [ligne for ligne in texte.splitlines() if ligne.strip()]
+    if not lignes:
+        return []
+    if len(lignes) == 1:
+        valeurs = SEPARATEURS.split(lignes[0])
+    else:
+        valeurs = [SEPARATEURS.split(ligne)[0] for ligne in lignes]
+    valeurs = [_nettoyer(v) for v in valeurs]
+    if not _est_nombre(valeurs[0]):
+        valeurs = valeurs[1:]
+    # cellules vides en fin de ligne (tabulations finales du tableur)
+    while valeurs and valeurs[-1] == "":
+        valeurs.pop()
+    return valeurs
+
+
+# fichier d'une seule série : une colonne de besoins (en-tête facultatif), ou le format de cli.py
+# (.csv "large" avec une colonne id, ou .jsonl) dont seule la première série est reprise
+def lire_fichier_besoins(chemin):
+    extension = os.path.splitext(chemin)[1].lower()
+    if extension in (".jsonl", ".ndjson"):
+        serie = next(lire_jsonl(chemin), None)
+        if serie is not None and "erreur" in serie:
+            raise ValueError(serie["erreur"])
+        return [] if serie is None else [str(v) for v in serie["installations"]]
+    with open(chemin, newline="") as f:
+        premiere_ligne = next(csv.reader(f), [])
+    if premiere_ligne and premiere_ligne[0].strip() in COLONNES_PARAMETRES:
+        serie = next(lire_csv(chemin), None)
+        if serie is not None and "erreur" in serie:
+            raise ValueError(serie["erreur"])
+        return [] if serie is None else [str(v) for v in serie["installations"]]
+    with open(chemin) as f:
+        return lire_valeurs(f.read())
+
+
+# validation en bloc : renvoie (besoins, invalides) ; invalides = indices des mois qui ne sont pas
+# des entiers positifs ou nuls (besoins vaut alors None)
+def valider_besoins(valeurs):
+    besoins = []
+    invalides = []
+    for m, valeur in enumerate(valeurs):
+        texte = _nettoyer(valeur)
+        try:
+            besoin = int(texte)
+        except ValueError:
+            try:
+                nombre = float(texte)
+            except ValueError:
+                invalides.append(m)
+                continue
+            if not nombre.is_integer():
+                invalides.append(m)
+                continue
+            besoin = int(nombre)
+        if besoin < 0:
+            invalides.append(m)
+        besoins.append(besoin)
+    if invalides:
+        return None, invalides
+    return besoins, []
+
+
+# valeurs proposées pour un horizon donné : celles déjà saisies, complétées par le motif de l'énoncé
+def valeurs_par_defaut(n_mois, valeurs=()):
+    motif = [200, 200, 300, 700, 1000, 200]
+    valeurs = list(valeurs[:n_mois])
+    valeurs += [str(motif[m % len(motif)]) for m in range(len(valeurs), n_mois)]
+    return valeurs
+
+
+def tests_saisie():
+    print("=== Tests de la saisie des besoins ===")
+
+    print("Test de lire_valeurs (colonne, ligne, en-tête, séparateurs de milliers):")
+    cas = [
+        ("200\n300\r\n\n700\n", ["200", "300", "700"]),
+        ("Besoins\n200\n1 000\n", ["200", "1000"]),
+        ("200\t300\t700\t\t\n", ["200", "300", "700"]),
+        ("Article A\t200\t300\n", ["200", "300"]),
+        ("200\tcommentaire\n300\tx\n", ["200", "300"]),
+        ("1 000\n-5\nabc\n", ["1000", "-5", "abc"]),
+    ]
+    erreurs = [(texte, lire_valeurs(texte), attendu) for texte, attendu in cas if lire_valeurs(texte) != attendu]
+    print(f"Devrait afficher : 0 écart\nAffiche : {len(erreurs)} écart(s) {erreurs}")
+    if not erreurs:
+        print("Fonction lire_valeurs bien implémentée")
+    else:
+        print("Fonction lire_valeurs incorrectement implémentée")
+
+    print("\nTest de lire_fichier_besoins (colonne, format de cli.py en .csv et .jsonl):")
+    with tempfile.TemporaryDirectory() as dossier:
+        colonne = os.path.join(dossier, "colonne.csv")
+        with open(colonne, "w") as f:
+            f.write("installations\n200\n300\n700\n")
+        large = os.path.join(dossier, "large.csv")
+        with open(large, "w") as f:
+            f.write("id,frais_approvisionnement,m1,m2,m3\nA,2000,200,300,\nB,,1,2,3\n")
+        jsonl = os.path.join(dossier, "series.jsonl")
+        with open(jsonl, "w") as f:
+            f.write('{"id": "A", "installations": [200, 300, 700]}\n')
+        lus = [lire_fichier_besoins(colonne), lire_fichier_besoins(large), lire_fichier_besoins(jsonl)]
+    attendu = [["200", "300", "700"], ["200", "300"], ["200", "300", "700"]]
+    print(f"Devrait afficher : {attendu}\nAffiche : {lus}")
+    if lus == attendu:
+        print("Fonction lire_fichier_besoins bien implémentée")
+    else:
+        print("Fonction lire_fichier_besoins incorrectement implémentée")
+
+    print("\nTest de valider_besoins:")
+    resultats = [valider_besoins(["200", " 300 ", "700.0"]), valider_besoins(["200", "-1", "abc", "2.5", ""])]
+    attendu = [([200, 300, 700], []), (None, [1, 2, 3, 4])]
+    print(f"Devrait afficher : {attendu}\nAffiche : {resultats}")
+    if resultats == attendu:
+        print("Fonction valider_besoins bien implémentée")
+    else:
+        print("Fonction valider_besoins incorrectement implémentée")
+
+    print("\nTest de rapidité sur 10 000 mois (collage + validation):")
+    texte = "\n".join(str(m % 1000) for m in range(10_000))
+    debut = time.perf_counter()
+    besoins, invalides = valider_besoins(lire_valeurs(texte))
+    duree = time.perf_counter() - debut
+    print(f"Devrait afficher : 10000 besoins en moins de 0.1 s\nAffiche : {len(besoins)} besoins en {duree:.3f} s")
+    if len(besoins) == 10_000 and duree < 0.1:
+        print("Validation en bloc bien implémentée")
+    else:
+        print("Validation en bloc incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_saisie()
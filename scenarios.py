@@ -0,0 +1,232 @@
+import time
+
+import numpy as np
+
+from noyau import resoudre, reconstruct_chemin_graphe, calcul_couts_strategies
+from batch import resoudre_batch, courbes_couts
+
+
+# --- génération de scénarios de besoins autour d'une prévision ---
+# chaque distribution reçoit (generateur, prevision, n_scenarios, dispersion) et renvoie une matrice
+# scénarios x mois ; les besoins sont arrondis à des cabines entières, jamais négatifs
+def besoins_normaux(generateur, prevision, n_scenarios, dispersion):
+    return prevision * (1 + dispersion * generateur.standard_normal((n_scenarios, len(prevision))))
+
+def besoins_lognormaux(generateur, prevision, n_scenarios, dispersion):
+    # moyenne = prévision, coefficient de variation = dispersion
+    sigma = np.sqrt(np.log1p(dispersion ** 2))
+    return prevision * generateur.lognormal(-sigma ** 2 / 2, sigma, (n_scenarios, len(prevision)))
+
+def besoins_uniformes(generateur, prevision, n_scenarios, dispersion):
+    return prevision * generateur.uniform(1 - dispersion, 1 + dispersion, (n_scenarios, len(prevision)))
+
+def besoins_poisson(generateur, prevision, n_scenarios, dispersion):
+    # la dispersion est fixée par la loi elle-même (variance = moyenne)
+    return generateur.poisson(prevision, (n_scenarios, len(prevision)))
+
+DISTRIBUTIONS = {
+    "normale": besoins_normaux,
+    "lognormale": besoins_lognormaux,
+    "uniforme": besoins_uniformes,
+    "poisson": besoins_poisson,
+}
+
+
+# distribution : un nom de DISTRIBUTIONS ou une fonction de même signature
+def generer_scenarios(prevision, n_scenarios, distribution="normale", dispersion=0.2, graine=0):
+    if not callable(distribution):
+        if distribution not in DISTRIBUTIONS:
+            raise ValueError(f"Distribution inconnue : {distribution} (choix : {', '.join(DISTRIBUTIONS)})")
+        distribution = DISTRIBUTIONS[distribution]
+    prevision = np.asarray(prevision, dtype=np.float64)
+    generateur = np.random.default_rng(graine)
+    scenarios = np.asarray(distribution(generateur, prevision, n_scenarios, dispersion), dtype=np.float64)
+    return np.maximum(np.rint(scenarios), 0.0)
+
+
+# --- évaluation de plans fixés sur tous les scénarios à la fois ---
+# un plan fixe les mois de commande ; chaque commande couvre les besoins réalisés jusqu'à la suivante
+# (cf. courbes_couts). Le coût d'un plan est alors linéaire en les besoins :
+#   frais * nombre_commandes + somme des besoins[k] * (1 + cout_stockage * (k - mois de la commande qui couvre k))
+# => tous les plans sur tous les scénarios en un seul produit matriciel
+def poids_plan(commandes, cout_stockage):
+    commandes = np.asarray(commandes, dtype=bool)
+    if len(commandes) and not commandes[0]:
+        raise ValueError("Un plan doit commander au premier mois (sinon les premiers besoins ne sont pas couverts)")
+    mois = np.arange(len(commandes))
+    debut_commande = np.maximum.accumulate(np.where(commandes, mois, 0))
+    return 1 + cout_stockage * (mois - debut_commande)
+
+
+# plans : {nom: masque des mois de commande} ; renvoie {nom: vecteur des coûts par scénario}
+def evaluer_plans(scenarios, frais_approvisionnement, cout_stockage, plans):
+    scenarios = np.asarray(scenarios, dtype=np.float64)
+    noms = list(plans)
+    poids = np.column_stack([poids_plan(plans[nom], cout_stockage) for nom in noms])
+    frais = frais_approvisionnement * np.array([np.count_nonzero(plans[nom]) for nom in noms])
+    couts = scenarios @ poids + frais
+    return {nom: couts[:, k] for k, nom in enumerate(noms)}
+
+
+# plans de référence pour une prévision : l'optimal (plus court chemin) et les deux stratégies de base
+def plans_de_reference(prevision, frais_approvisionnement, cout_stockage, methode="dp"):
+    _, precedents, n_mois = resoudre(list(prevision), frais_approvisionnement, cout_stockage, methode)
+    optimal = np.zeros(n_mois, dtype=bool)
+    optimal[reconstruct_chemin_graphe(precedents, 0, n_mois)[:-1]] = True
+    directeur_achats = np.zeros(n_mois, dtype=bool)
+    directeur_achats[:1] = True
+    return {
+        "optimale": optimal,
+        "directeur_achats": directeur_achats,
+        "directeur_financier": np.ones(n_mois, dtype=bool),
+    }
+
+
+# coût optimal de chaque scénario (information parfaite), par le solveur par lots ;
+# n_processus > 1 : réparti sur plusieurs processus (parallele.py)
+def reoptimiser(scenarios, frais_approvisionnement, cout_stockage, n_processus=None):
+    if n_processus is not None and n_processus > 1:
+        from parallele import resoudre_en_parallele
+        return resoudre_en_parallele(scenarios, frais_approvisionnement, cout_stockage, n_processus=n_processus)["cout_optimal"]
+    return resoudre_batch(scenarios, frais_approvisionnement, cout_stockage)["cout_optimal"]
+
+
+def _statistiques(couts, centiles):
+    valeurs = np.percentile(couts, centiles)
+    return {
+        "moyenne": float(couts.mean()),
+        "ecart_type": float(couts.std()),
+        "centiles": {c: float(v) for c, v in zip(centiles, valeurs)},
+    }
+
+
+# --- analyse complète : scénarios, évaluation des plans, distributions de coûts et regret ---
+# regret d'un plan dans un scénario = son coût - coût de référence du scénario :
+# l'optimum re-calculé pour ce scénario si reoptimise=True, sinon le meilleur des plans évalués
+def analyse_monte_carlo(installations, frais_approvisionnement, cout_stockage, n_scenarios=10_000,
+                        distribution="normale", dispersion=0.2, graine=0, plans=None, reoptimise=False,
+                        n_processus=None, centiles=(5, 50, 95)):
+    durees = {}
+    debut = time.perf_counter()
+    scenarios = generer_scenarios(installations, n_scenarios, distribution, dispersion, graine)
+    durees["generation"] = time.perf_counter() - debut
+
+    if plans is None:
+        plans = plans_de_reference(installations, frais_approvisionnement, cout_stockage)
+    debut = time.perf_counter()
+    couts = evaluer_plans(scenarios, frais_approvisionnement, cout_stockage, plans)
+    durees["evaluation"] = time.perf_counter() - debut
+
+    noms = list(plans)
+    matrice = np.column_stack([couts[nom] for nom in noms])
+    if reoptimise:
+        debut = time.perf_counter()
+        reference = reoptimiser(scenarios, frais_approvisionnement, cout_stockage, n_processus)
+        durees["reoptimisation"] = time.perf_counter() - debut
+        couts["reoptimise"] = reference
+    else:
+        reference = matrice.min(axis=1)
+    meilleurs = matrice.argmin(axis=1)
+
+    statistiques = {}
+    for k, nom in enumerate(noms):
+        regret = couts[nom] - reference
+        statistiques[nom] = _statistiques(couts[nom], centiles)
+        statistiques[nom]["regret"] = _statistiques(regret, centiles)
+        statistiques[nom]["regret"]["maximum"] = float(regret.max())
+        statistiques[nom]["part_meilleur"] = float(np.mean(meilleurs == k))
+    if reoptimise:
+        statistiques["reoptimise"] = _statistiques(reference, centiles)
+
+    return {
+        "n_scenarios": n_scenarios,
+        "reference": "reoptimise" if reoptimise else "meilleur_plan",
+        "plans": plans,
+        "couts": couts,
+        "statistiques": statistiques,
+        "durees": durees,
+    }
+
+
+# tableau texte des résultats (même présentation que les rapports de algos.py)
+def resume_monte_carlo(resultats):
+    reference = "l'optimum de chaque scénario" if resultats["reference"] == "reoptimise" else "le meilleur des plans"
+    lignes = [f"{resultats['n_scenarios']} scénarios, regret par rapport à : {reference}"]
+    for nom, stats in resultats["statistiques"].items():
+        centiles = ", ".join(f"p{c}={v:.0f}" for c, v in stats["centiles"].items())
+        ligne = f"- {nom:<20} moyenne {stats['moyenne']:12.2f} €  écart-type {stats['ecart_type']:10.2f}  {centiles}"
+        if "regret" in stats:
+            ligne += (f"\n  {'':<20} regret moyen {stats['regret']['moyenne']:10.2f} €  max {stats['regret']['maximum']:10.2f} €"
+                      f"  meilleur plan dans {100 * stats['part_meilleur']:.1f} % des scénarios")
+        lignes.append(ligne)
+    lignes.append("Durées : " + ", ".join(f"{etape} {duree:.2f} s" for etape, duree in resultats["durees"].items()))
+    return "\n".join(lignes)
+
+
+def tests_scenarios():
+    from noyau import load_data
+    print("=== Tests des scénarios de besoins ===")
+    installations, frais_approvisionnement, cout_stockage = load_data()
+
+    print("Test de generer_scenarios (graine, forme, besoins entiers positifs, moyenne):")
+    resultat = []
+    for nom in DISTRIBUTIONS:
+        scenarios = generer_scenarios(installations, 20_000, nom, 0.2, graine=1)
+        moyenne = scenarios.mean(axis=0)
+        resultat.append(bool(np.array_equal(scenarios, generer_scenarios(installations, 20_000, nom, 0.2, graine=1))
+                             and scenarios.shape == (20_000, 6) and (scenarios >= 0).all()
+                             and np.array_equal(scenarios, np.rint(scenarios))
+                             and np.allclose(moyenne, installations, rtol=0.02)))
+    print(f"Devrait afficher : {[True] * len(DISTRIBUTIONS)}\nAffiche : {resultat}")
+    if all(resultat):
+        print("Fonction generer_scenarios bien implémentée")
+    else:
+        print("Fonction generer_scenarios incorrectement implémentée")
+
+    print("\nTest de evaluer_plans (comparaison avec courbes_couts et calcul_couts_strategies):")
+    scenarios = generer_scenarios(installations, 200, "lognormale", 0.5, graine=2)
+    plans = plans_de_reference(installations, frais_approvisionnement, cout_stockage)
+    couts = evaluer_plans(scenarios, frais_approvisionnement, cout_stockage, plans)
+    ecarts = 0
+    for k, scenario in enumerate(scenarios):
+        de_base = calcul_couts_strategies(list(scenario), frais_approvisionnement, cout_stockage)
+        optimale = courbes_couts(scenario, frais_approvisionnement, cout_stockage, plans["optimale"])["optimale"][-1]
+        if (couts["optimale"][k] != optimale or couts["directeur_achats"][k] != de_base["directeur_achats"]
+                or couts["directeur_financier"][k] != de_base["directeur_financier"]):
+            ecarts += 1
+    print(f"Devrait afficher : 0 écart sur 200 scénarios\nAffiche : {ecarts} écart(s)")
+    if ecarts == 0:
+        print("Fonction evaluer_plans bien implémentée")
+    else:
+        print("Fonction evaluer_plans incorrectement implémentée")
+
+    print("\nTest de analyse_monte_carlo (sans bruit : regret nul du plan optimal ; avec bruit : regret >= 0):")
+    distances, _, n_mois = resoudre(installations, frais_approvisionnement, cout_stockage)
+    sans_bruit = analyse_monte_carlo(installations, frais_approvisionnement, cout_stockage, 100, dispersion=0.0, reoptimise=True)
+    avec_bruit = analyse_monte_carlo(installations, frais_approvisionnement, cout_stockage, 2000, dispersion=0.4, reoptimise=True)
+    optimum = [resoudre(list(s), frais_approvisionnement, cout_stockage)[0] for s in generer_scenarios(installations, 50, "normale", 0.4, 0)]
+    resultat = [
+        sans_bruit["statistiques"]["optimale"]["regret"]["maximum"] == 0 and sans_bruit["statistiques"]["optimale"]["moyenne"] == distances[n_mois],
+        all((avec_bruit["couts"][nom] >= avec_bruit["couts"]["reoptimise"]).all() for nom in avec_bruit["plans"]),
+        bool(np.array_equal(avec_bruit["couts"]["reoptimise"][:50], [d[n_mois] for d in optimum])),
+    ]
+    print(f"Devrait afficher : [True, True, True]\nAffiche : {resultat}")
+    if all(resultat):
+        print("Fonction analyse_monte_carlo bien implémentée")
+    else:
+        print("Fonction analyse_monte_carlo incorrectement implémentée")
+    print(resume_monte_carlo(avec_bruit))
+
+    print("\nTest de rapidité sur 100 000 scénarios x 120 mois (génération + évaluation des 3 plans):")
+    prevision = [installations[m % len(installations)] for m in range(120)]
+    resultats = analyse_monte_carlo(prevision, frais_approvisionnement, cout_stockage, 100_000)
+    duree = resultats["durees"]["generation"] + resultats["durees"]["evaluation"]
+    print(f"Devrait afficher : moins de 2 s\nAffiche : {duree:.2f} s (évaluation {resultats['durees']['evaluation']:.3f} s)")
+    if duree < 2:
+        print("Évaluation vectorisée bien implémentée")
+    else:
+        print("Évaluation vectorisée incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_scenarios()
@@ -0,0 +1,208 @@
+import numpy as np
+
+import noyau
+
+
+# --- analyse de sensibilité paramétrique ---
+# le coût d'un plan à k commandes s'écrit : frais * k + total_cabines + stockage * attente
+# (attente = nombre de cabines-mois passées en stock). Pour chaque k, le plan qui minimise
+# l'attente ne dépend ni des frais ni du stockage : un seul passage de programmation dynamique
+# (indexée par le nombre de commandes) donne toutes les droites candidates, et le coût optimal
+# en fonction d'un paramètre est leur enveloppe inférieure, linéaire par morceaux.
+
+# attente_min[k] = attente minimale avec exactement k commandes, precedents[k, j] = mois de la
+# k-ième commande dans le meilleur plan à k commandes couvrant les mois 0..j-1
+# verifier : appelée à chaque valeur de k (n_mois passages en O(n_mois²)), peut lever une exception pour interrompre
+def tables_par_nombre_commandes(installations, verifier=None):
+    n_mois = len(installations)
+    cumul, cumul_pondere = (np.array(p, dtype=np.float64) for p in noyau.sommes_prefixes(installations))
+    i = np.arange(n_mois + 1)[:, None]
+    j = np.arange(n_mois + 1)[None, :]
+    # attente[i, j] : même formule que cout_arc, pour tous les arcs à la fois
+    attente = (cumul_pondere[j] - cumul_pondere[i]) - i * (cumul[j] - cumul[i])
+    attente = np.where(i < j, attente, np.inf)
+
+    attente_min = np.full(n_mois + 1, np.inf)
+    precedents = np.zeros((n_mois + 1, n_mois + 1), dtype=np.int64)
+    meilleurs = np.full(n_mois + 1, np.inf)
+    meilleurs[0] = 0.0
+    for k in range(1, n_mois + 1):
+        if verifier is not None:
+            verifier()
+        candidats = meilleurs[:, None] + attente
+        precedents[k] = np.argmin(candidats, axis=0)
+        meilleurs = candidats[precedents[k], np.arange(n_mois + 1)]
+        attente_min[k] = meilleurs[n_mois]
+    return attente_min, precedents
+
+
+def chemin_k_commandes(precedents, k, n_mois):
+    chemin = [n_mois]
+    for rang in range(k, 0, -1):
+        chemin.append(int(precedents[rang, chemin[-1]]))
+    chemin.reverse()
+    return chemin
+
+
+# enveloppe inférieure de droites (pente, ordonnee, cle) sur x >= 0
+# renvoie [(x_debut, x_fin, droite), ...] ; à égalité on garde la plus petite pente, qui reste optimale après
+def _enveloppe_inferieure(droites):
+    x = 0.0
+    courante = min(droites, key=lambda d: (d[1], d[0]))
+    segments = []
+    while True:
+        suivante, x_suivant = None, float("inf")
+        for droite in droites:
+            if droite[0] < courante[0]:
+                x_croisement = max(x, (droite[1] - courante[1]) / (courante[0] - droite[0]))
+                if x_croisement < x_suivant or (x_croisement == x_suivant and droite[0] < suivante[0]):
+                    suivante, x_suivant = droite, x_croisement
+        if suivante is None:
+            segments.append((x, float("inf"), courante))
+            return segments
+        if x_suivant > x:
+            segments.append((x, x_suivant, courante))
+        x, courante = x_suivant, suivante
+
+
+# parametre = "frais" : coût optimal en fonction des frais d'approvisionnement (cout_stockage fixé)
+# parametre = "stockage" : coût optimal en fonction du coût de stockage (frais_approvisionnement fixés)
+# renvoie une liste de segments {debut, fin, pente, ordonnee, n_commandes, attente, chemin} :
+# sur [debut, fin], le coût optimal vaut ordonnee + pente * x et le plan optimal est chemin
+def analyse_sensibilite(installations, frais_approvisionnement, cout_stockage, parametre="frais", tables=None):
+    n_mois = len(installations)
+    if n_mois == 0:
+        raise ValueError("Aucun mois à planifier")
+    attente_min, precedents = tables if tables is not None else tables_par_nombre_commandes(installations)
+    total_cabines = sum(installations)
+
+    droites = []
+    for k in range(1, n_mois + 1):
+        if parametre == "frais":
+            droites.append((k, total_cabines + cout_stockage * attente_min[k], k))
+        elif parametre == "stockage":
+            droites.append((attente_min[k], frais_approvisionnement * k + total_cabines, k))
+        else:
+            raise ValueError(f"Paramètre inconnu : {parametre} (attendu : frais ou stockage)")
+
+    segments = []
+    for debut, fin, (pente, ordonnee, k) in _enveloppe_inferieure(droites):
+        segments.append({
+            "debut": debut,
+            "fin": fin,
+            "pente": float(pente),
+            "ordonnee": float(ordonnee),
+            "n_commandes": k,
+            "attente": float(attente_min[k]),
+            "chemin": chemin_k_commandes(precedents, k, n_mois),
+        })
+    return segments
+
+
+def cout_optimal_parametrique(segments, x):
+    for segment in segments:
+        if segment["debut"] <= x <= segment["fin"]:
+            return segment["ordonnee"] + segment["pente"] * x
+    raise ValueError("x doit être positif ou nul")
+
+
+# points de la courbe (abscisses des points de rupture + bornes) pour tracer sur [0, x_max]
+def courbe_cout_optimal(segments, x_max):
+    abscisses = [0.0] + [s["fin"] for s in segments if s["fin"] < x_max] + [x_max]
+    return abscisses, [cout_optimal_parametrique(segments, x) for x in abscisses]
+
+
+# --- graphique des deux courbes (frais et stockage), avec la valeur actuelle de chaque paramètre ---
+# tables : résultat de tables_par_nombre_commandes, s'il a déjà été calculé (ex. dans une tâche de fond)
+def tracer_sensibilite(installations, frais_approvisionnement, cout_stockage, fig=None, tables=None):
+    import matplotlib.pyplot as plt
+
+    if tables is None:
+        tables = tables_par_nombre_commandes(installations)
+    if fig is None:
+        fig, _ = plt.subplots(1, 2, figsize=(12, 5))
+    axes = fig.axes
+    for ax, parametre, valeur, titre in (
+        (axes[0], "frais", frais_approvisionnement, "Frais fixes d'approvisionnement (€)"),
+        (axes[1], "stockage", cout_stockage, "Coût de stockage par unité par mois (€)"),
+    ):
+        segments = analyse_sensibilite(installations, frais_approvisionnement, cout_stockage, parametre, tables)
+        ruptures = [s["fin"] for s in segments if s["fin"] != float("inf")]
+        x_max = max([2 * valeur, 1.0] + [1.2 * r for r in ruptures[-3:]])
+        abscisses, couts = courbe_cout_optimal(segments, x_max)
+        ax.clear()
+        ax.plot(abscisses, couts, color='#ef7645', marker='o', markersize=3)
+        ax.axvline(valeur, color='#c9c1bc', linestyle='--', label="Valeur actuelle")
+        for segment in segments:
+            if segment["debut"] < x_max:
+                milieu = (segment["debut"] + min(segment["fin"], x_max)) / 2
+                ax.annotate(f"{segment['n_commandes']} cmd", (milieu, cout_optimal_parametrique(segments, milieu)),
+                            textcoords="offset points", xytext=(0, 6), ha='center', fontsize=7)
+        ax.set_xlabel(titre)
+        ax.set_ylabel('Coût optimal (€)')
+        ax.set_title(f"Sensibilité : {len(segments)} politique(s)")
+        ax.legend()
+        ax.grid(True)
+    fig.tight_layout()
+    return fig, axes
+
+
+def tests_sensibilite():
+    print("=== Tests de l'analyse de sensibilité ===")
+    installations, frais_approvisionnement, cout_stockage = noyau.load_data()
+
+    print("Test de analyse_sensibilite (comparaison avec wagner_whitin sur une grille de paramètres):")
+    generateur = np.random.default_rng(0)
+    erreurs = 0
+    instances = [(installations, frais_approvisionnement, cout_stockage)]
+    instances += [(list(generateur.integers(0, 1000, generateur.integers(1, 30))), 2000, 2) for _ in range(20)]
+    for besoins, frais, stockage in instances:
+        tables = tables_par_nombre_commandes(besoins)
+        for parametre, grille in (("frais", np.linspace(0, 20000, 41)), ("stockage", np.linspace(0, 20, 41))):
+            segments = analyse_sensibilite(besoins, frais, stockage, parametre, tables)
+            for x in grille:
+                f, h = (x, stockage) if parametre == "frais" else (frais, x)
+                distances, precedents = noyau.wagner_whitin(besoins, f, h)
+                attendu = distances[len(besoins)]
+                if not np.isclose(cout_optimal_parametrique(segments, x), attendu, rtol=1e-9, atol=1e-6):
+                    erreurs += 1
+            # le plan de chaque segment coûte bien ce qu'annonce la droite
+            prefixes = noyau.sommes_prefixes(besoins)
+            for segment in segments:
+                x = segment["debut"]
+                f, h = (x, stockage) if parametre == "frais" else (frais, x)
+                chemin = segment["chemin"]
+                cout_chemin = sum(noyau.cout_arc(prefixes, chemin[k], chemin[k + 1], f, h) for k in range(len(chemin) - 1))
+                if not np.isclose(cout_chemin, segment["ordonnee"] + segment["pente"] * x, rtol=1e-9, atol=1e-6):
+                    erreurs += 1
+    print(f"Devrait afficher : 0 écart\nAffiche : {erreurs} écart(s)")
+    if erreurs == 0:
+        print("Fonction analyse_sensibilite bien implémentée")
+    else:
+        print("Fonction analyse_sensibilite incorrectement implémentée")
+
+    print("\nTest de l'interruption de tables_par_nombre_commandes (verifier lève une exception au 3e appel):")
+    appels = []
+    def verifier():
+        appels.append(None)
+        if len(appels) == 3:
+            raise InterruptedError()
+    try:
+        tables_par_nombre_commandes(list(generateur.integers(0, 1000, 200)), verifier)
+        interrompue = False
+    except InterruptedError:
+        interrompue = True
+    print(f"Devrait afficher : interrompue après 3 appels\nAffiche : {'interrompue' if interrompue else 'terminée'} après {len(appels)} appels")
+    if interrompue and len(appels) == 3:
+        print("Interruption de tables_par_nombre_commandes bien implémentée")
+    else:
+        print("Interruption de tables_par_nombre_commandes incorrectement implémentée")
+
+    segments = analyse_sensibilite(installations, frais_approvisionnement, cout_stockage, "frais")
+    print("\nPolitiques optimales en fonction des frais d'approvisionnement (load_data()):")
+    for segment in segments:
+        print(f"- frais entre {segment['debut']:.2f} et {segment['fin']:.2f} € : {segment['n_commandes']} commande(s), chemin {segment['chemin']}")
+
+
+if __name__ == "__main__":
+    tests_sensibilite()
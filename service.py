@@ -0,0 +1,522 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from cli import resoudre_bloc, ligne_sortie
+
+
+# --- service local de planification ---
+# les requêtes concurrentes sont regroupées en lots résolus par resoudre_batch dans un pool de workers
+# (hors de la boucle asyncio) ; les requêtes identiques en cours de calcul partagent le même résultat ;
+# au-delà de file_max requêtes en attente, le service répond 503 au lieu de laisser la file grossir.
+#   POST /resoudre  {"installations": [...], "frais_approvisionnement": 2000, "cout_stockage": 2}
+#   GET  /metriques (JSON), /metrics (Prometheus), /sante
+
+FRAIS_DEFAUT = 2000
+STOCKAGE_DEFAUT = 2
+# au-delà, une série est résolue seule en temps linéaire (le lot vectorisé est quadratique en mois)
+SEUIL_LONG = 1000
+FENETRE_LATENCES = 10_000
+
+
+class ServiceSature(Exception):
+    pass
+
+
+class ErreurRequete(ValueError):
+    pass
+
+
+def valider_requete(contenu):
+    if not isinstance(contenu, dict):
+        raise ErreurRequete("Le corps doit être un objet JSON")
+    installations = contenu.get("installations")
+    if not isinstance(installations, list) or not installations:
+        raise ErreurRequete("installations doit être une liste non vide")
+    if not all(isinstance(b, (int, float)) and not isinstance(b, bool) and b >= 0 for b in installations):
+        raise ErreurRequete("installations ne doit contenir que des nombres positifs ou nuls")
+    serie = {"installations": installations}
+    for cle, defaut in (("frais_approvisionnement", FRAIS_DEFAUT), ("cout_stockage", STOCKAGE_DEFAUT)):
+        valeur = contenu.get(cle, defaut)
+        if not isinstance(valeur, (int, float)) or isinstance(valeur, bool) or valeur < 0:
+            raise ErreurRequete(f"{cle} doit être un nombre positif ou nul")
+        serie[cle] = valeur
+    return serie
+
+
+# --- résolution d'un lot (dans un worker) ---
+# les séries sont regroupées par ordre de grandeur d'horizon pour ne pas compléter une série de 6 mois
+# jusqu'à 1000 mois ; les séries longues passent par le solveur en temps linéaire
+def resoudre_lot(series, seuil_long=SEUIL_LONG):
+    groupes = {}
+    for k, serie in enumerate(series):
+        n_mois = len(serie["installations"])
+        groupes.setdefault("long" if n_mois > seuil_long else n_mois.bit_length(), []).append(k)
+    resultats = [None] * len(series)
+    for groupe, indices in groupes.items():
+        bloc = [dict(series[k], id=k) for k in indices]
+        for k, *valeurs in resoudre_bloc(bloc, FRAIS_DEFAUT, STOCKAGE_DEFAUT, "enveloppe" if groupe == "long" else "batch"):
+            resultats[k] = ligne_sortie(k, *valeurs)
+            del resultats[k]["id"]
+    return resultats
+
+
+def _centile(valeurs_triees, p):
+    if not valeurs_triees:
+        return 0.0
+    return valeurs_triees[min(len(valeurs_triees) - 1, int(p / 100 * len(valeurs_triees)))]
+
+
+class ServicePlanification:
+    # taille_lot : séries au plus par lot ; delai_lot : attente (s) pour remplir un lot peu chargé
+    # n_workers : lots résolus en même temps ; processus=False : threads (tests, petites machines)
+    def __init__(self, taille_lot=256, delai_lot=0.002, file_max=10_000, n_workers=None, processus=True):
+        self.taille_lot = taille_lot
+        self.delai_lot = delai_lot
+        self.file_max = file_max
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.processus = processus
+        self.executeur = None
+        self.file = None
+        self.places = None
+        self.en_vol = {}  # clé -> futur partagé par les requêtes identiques
+        self.taches = set()
+        self.connexions = set()
+        self.regroupeur = None
+        self.stats = {"requetes": 0, "coalescees": 0, "rejetees": 0, "invalides": 0, "erreurs": 0, "lots": 0, "series_resolues": 0}
+        self.latences = deque(maxlen=FENETRE_LATENCES)  # (instant de fin, durée)
+        self.debut = time.perf_counter()
+
+    async def demarrer(self):
+        if self.processus:
+            self.executeur = ProcessPoolExecutor(self.n_workers)
+        else:
+            self.executeur = ThreadPoolExecutor(self.n_workers)
+        self.file = asyncio.Queue()
+        self.places = asyncio.Semaphore(self.n_workers)
+        self.regroupeur = asyncio.create_task(self._regrouper())
+        self.debut = time.perf_counter()
+
+    async def arreter(self):
+        if self.regroupeur is not None:
+            self.regroupeur.cancel()
+            try:
+                await self.regroupeur
+            except asyncio.CancelledError:
+                pass
+        if self.taches:
+            await asyncio.gather(*self.taches, return_exceptions=True)
+        # requêtes encore dans la file : elles ne seront jamais résolues
+        while self.file is not None and not self.file.empty():
+            cle, _ = self.file.get_nowait()
+            self.en_vol.pop(cle).set_exception(ServiceSature("Service arrêté"))
+        # connexions encore ouvertes (clients en attente entre deux requêtes)
+        for connexion in list(self.connexions):
+            connexion.cancel()
+        if self.connexions:
+            await asyncio.gather(*self.connexions, return_exceptions=True)
+        if self.executeur is not None:
+            self.executeur.shutdown(wait=True, cancel_futures=True)
+
+    async def __aenter__(self):
+        await self.demarrer()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.arreter()
+
+    # point d'entrée commun (HTTP ou appel direct) : renvoie la même ligne de résultats que cli.py, sans id
+    async def resoudre(self, contenu):
+        try:
+            serie = valider_requete(contenu)
+        except ErreurRequete:
+            self.stats["invalides"] += 1
+            raise
+        cle = (tuple(serie["installations"]), serie["frais_approvisionnement"], serie["cout_stockage"])
+        self.stats["requetes"] += 1
+        debut = time.perf_counter()
+        futur = self.en_vol.get(cle)
+        if futur is not None:
+            self.stats["coalescees"] += 1
+        else:
+            if self.file.qsize() >= self.file_max:
+                self.stats["rejetees"] += 1
+                raise ServiceSature(f"{self.file.qsize()} requêtes en attente")
+            futur = asyncio.get_running_loop().create_future()
+            self.en_vol[cle] = futur
+            self.file.put_nowait((cle, serie))
+        # shield : un client qui abandonne n'annule pas un calcul partagé avec d'autres
+        resultat = await asyncio.shield(futur)
+        fin = time.perf_counter()
+        self.latences.append((fin, fin - debut))
+        return dict(resultat)
+
+    # un lot part dès qu'un worker est libre : plus le service est chargé, plus les lots sont gros
+    # arrêt pendant l'attente d'un worker ou du délai : les requêtes déjà sorties de la file ne sont plus
+    # vues par arreter, leurs futurs sont mis en erreur ici (sinon les appelants attendraient indéfiniment)
+    async def _regrouper(self):
+        while True:
+            lot = []
+            try:
+                lot.append(await self.file.get())
+                await self.places.acquire()
+                if self.file.qsize() < self.taille_lot - 1 and self.delai_lot > 0:
+                    await asyncio.sleep(self.delai_lot)
+            except asyncio.CancelledError:
+                for cle, _ in lot:
+                    self.en_vol.pop(cle).set_exception(ServiceSature("Service arrêté"))
+                raise
+            while len(lot) < self.taille_lot and not self.file.empty():
+                lot.append(self.file.get_nowait())
+            tache = asyncio.create_task(self._executer(lot))
+            self.taches.add(tache)
+            tache.add_done_callback(self.taches.discard)
+
+    async def _executer(self, lot):
+        try:
+            resultats = await asyncio.get_running_loop().run_in_executor(
+                self.executeur, resoudre_lot, [serie for _, serie in lot]
+            )
+        except Exception as erreur:
+            self.stats["erreurs"] += len(lot)
+            for cle, _ in lot:
+                self.en_vol.pop(cle).set_exception(erreur)
+        else:
+            self.stats["lots"] += 1
+            self.stats["series_resolues"] += len(lot)
+            for (cle, _), resultat in zip(lot, resultats):
+                self.en_vol.pop(cle).set_result(resultat)
+        finally:
+            self.places.release()
+
+    def metriques(self):
+        latences = sorted(duree for _, duree in self.latences)
+        instants = [instant for instant, _ in self.latences]
+        debit = (len(instants) - 1) / (instants[-1] - instants[0]) if len(instants) > 1 and instants[-1] > instants[0] else 0.0
+        metriques = dict(self.stats)
+        metriques.update({
+            "taille_lot_moyenne": self.stats["series_resolues"] / self.stats["lots"] if self.stats["lots"] else 0.0,
+            "file_attente": self.file.qsize() if self.file is not None else 0,
+            "en_vol": len(self.en_vol),
+            "latence_p50_ms": 1000 * _centile(latences, 50),
+            "latence_p99_ms": 1000 * _centile(latences, 99),
+            "debit_requetes_s": debit,
+            "duree_s": time.perf_counter() - self.debut,
+        })
+        return metriques
+
+    def metriques_prometheus(self, prefixe="costgraph_service"):
+        metriques = self.metriques()
+        lignes = []
+        for nom in self.stats:
+            lignes += [f"# TYPE {prefixe}_{nom}_total counter", f"{prefixe}_{nom}_total {metriques[nom]}"]
+        for nom in ("taille_lot_moyenne", "file_attente", "en_vol", "latence_p50_ms", "latence_p99_ms", "debit_requetes_s"):
+            lignes += [f"# TYPE {prefixe}_{nom} gauge", f"{prefixe}_{nom} {metriques[nom]:.6g}"]
+        return "\n".join(lignes) + "\n"
+
+    # --- HTTP/1.1 minimal (connexions persistantes), sur TCP ou socket Unix ---
+    async def _router(self, methode, chemin, corps):
+        if chemin == "/resoudre":
+            if methode != "POST":
+                return 405, {"erreur": "POST attendu"}
+            try:
+                return 200, await self.resoudre(json.loads(corps or b"null"))
+            except (ErreurRequete, json.JSONDecodeError) as erreur:
+                return 400, {"erreur": str(erreur)}
+            except ServiceSature as erreur:
+                return 503, {"erreur": f"Service saturé : {erreur}"}
+            except Exception as erreur:
+                return 500, {"erreur": str(erreur)}
+        if chemin == "/metriques":
+            return 200, self.metriques()
+        if chemin == "/metrics":
+            return 200, self.metriques_prometheus()
+        if chemin == "/sante":
+            return 200, {"statut": "ok"}
+        return 404, {"erreur": f"Chemin inconnu : {chemin}"}
+
+    async def _connexion(self, lecteur, ecrivain):
+        tache = asyncio.current_task()
+        self.connexions.add(tache)
+        try:
+            while True:
+                ligne = await lecteur.readline()
+                if not ligne:
+                    break
+                methode, chemin, _ = ligne.decode("latin-1").split(" ", 2)
+                entetes = {}
+                while True:
+                    entete = await lecteur.readline()
+                    if entete in (b"\r\n", b"\n", b""):
+                        break
+                    nom, _, valeur = entete.decode("latin-1").partition(":")
+                    entetes[nom.strip().lower()] = valeur.strip()
+                corps = await lecteur.readexactly(int(entetes.get("content-length", 0)))
+                statut, contenu = await self._router(methode, chemin.split("?")[0], corps)
+                if isinstance(contenu, str):
+                    donnees, type_contenu = contenu.encode(), "text/plain; version=0.0.4"
+                else:
+                    donnees, type_contenu = json.dumps(contenu).encode(), "application/json"
+                entetes_reponse = [f"HTTP/1.1 {statut} {MESSAGES_HTTP.get(statut, '')}",
+                                   f"Content-Type: {type_contenu}", f"Content-Length: {len(donnees)}"]
+                if statut == 503:
+                    entetes_reponse.append("Retry-After: 1")
+                ecrivain.write(("\r\n".join(entetes_reponse) + "\r\n\r\n").encode() + donnees)
+                await ecrivain.drain()
+                if entetes.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass  # client parti ou requête illisible : on ferme la connexion
+        except asyncio.CancelledError:
+            pass  # arrêt du service
+        finally:
+            self.connexions.discard(tache)
+            ecrivain.close()
+
+    async def ecouter(self, hote="127.0.0.1", port=8765, socket_unix=None):
+        if socket_unix is not None:
+            return await asyncio.start_unix_server(self._connexion, path=socket_unix)
+        return await asyncio.start_server(self._connexion, hote, port)
+
+
+MESSAGES_HTTP = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+                 500: "Internal Server Error", 503: "Service Unavailable"}
+
+
+async def servir(hote="127.0.0.1", port=8765, socket_unix=None, **options):
+    async with ServicePlanification(**options) as service:
+        serveur = await service.ecouter(hote, port, socket_unix)
+        adresse = socket_unix or f"http://{hote}:{serveur.sockets[0].getsockname()[1]}"
+        print(f"Service de planification sur {adresse} ({service.n_workers} workers)", file=sys.stderr)
+        async with serveur:
+            await serveur.serve_forever()
+
+
+# --- client de charge : concurrence connexions persistantes, latences mesurées côté client ---
+async def _requete(lecteur, ecrivain, methode, chemin, contenu=None):
+    corps = b"" if contenu is None else json.dumps(contenu).encode()
+    ecrivain.write(f"{methode} {chemin} HTTP/1.1\r\nHost: costgraph\r\nContent-Type: application/json\r\n"
+                   f"Content-Length: {len(corps)}\r\n\r\n".encode() + corps)
+    await ecrivain.drain()
+    statut = int((await lecteur.readline()).split()[1])
+    longueur = 0
+    while True:
+        entete = await lecteur.readline()
+        if entete in (b"\r\n", b"\n", b""):
+            break
+        nom, _, valeur = entete.decode("latin-1").partition(":")
+        if nom.strip().lower() == "content-length":
+            longueur = int(valeur)
+    return statut, await lecteur.readexactly(longueur)
+
+
+async def _ouvrir(hote, port, socket_unix):
+    if socket_unix is not None:
+        return await asyncio.open_unix_connection(socket_unix)
+    return await asyncio.open_connection(hote, port)
+
+
+# doublons : part des requêtes tirées parmi quelques séries "populaires" (exerce la déduplication)
+def generer_requetes(n_requetes, mois_max=120, doublons=0.2, graine=0):
+    generateur = random.Random(graine)
+    def serie():
+        return {"installations": [generateur.randint(0, 1000) for _ in range(generateur.randint(1, mois_max))],
+                "frais_approvisionnement": generateur.choice((500, 2000, 5000)), "cout_stockage": generateur.choice((1, 2, 5))}
+    populaires = [serie() for _ in range(5)]
+    return [generateur.choice(populaires) if generateur.random() < doublons else serie() for _ in range(n_requetes)]
+
+
+async def tester_charge(hote="127.0.0.1", port=8765, socket_unix=None, n_requetes=2000, concurrence=64,
+                        mois_max=120, doublons=0.2, graine=0):
+    requetes = generer_requetes(n_requetes, mois_max, doublons, graine)
+    a_envoyer = deque(requetes)
+    latences = []
+    statuts = {}
+
+    async def client():
+        lecteur, ecrivain = await _ouvrir(hote, port, socket_unix)
+        try:
+            while a_envoyer:
+                contenu = a_envoyer.popleft()
+                debut = time.perf_counter()
+                statut, _ = await _requete(lecteur, ecrivain, "POST", "/resoudre", contenu)
+                latences.append(time.perf_counter() - debut)
+                statuts[statut] = statuts.get(statut, 0) + 1
+        finally:
+            ecrivain.close()
+            await ecrivain.wait_closed()
+
+    debut = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(min(concurrence, n_requetes))))
+    duree = time.perf_counter() - debut
+
+    lecteur, ecrivain = await _ouvrir(hote, port, socket_unix)
+    _, corps = await _requete(lecteur, ecrivain, "GET", "/metriques")
+    ecrivain.close()
+    await ecrivain.wait_closed()
+    latences.sort()
+    return {
+        "requetes": n_requetes,
+        "statuts": statuts,
+        "duree_s": duree,
+        "debit_requetes_s": n_requetes / duree if duree > 0 else 0.0,
+        "latence_p50_ms": 1000 * _centile(latences, 50),
+        "latence_p99_ms": 1000 * _centile(latences, 99),
+        "latence_max_ms": 1000 * latences[-1] if latences else 0.0,
+        "serveur": json.loads(corps),
+    }
+
+
+def resume_charge(rapport):
+    serveur = rapport["serveur"]
+    return (f"{rapport['requetes']} requêtes en {rapport['duree_s']:.2f} s ({rapport['debit_requetes_s']:,.0f} requêtes/s), "
+            f"statuts {rapport['statuts']}\n"
+            f"latence client : p50 {rapport['latence_p50_ms']:.1f} ms, p99 {rapport['latence_p99_ms']:.1f} ms, "
+            f"max {rapport['latence_max_ms']:.1f} ms\n"
+            f"serveur : {serveur['lots']} lots (taille moyenne {serveur['taille_lot_moyenne']:.1f}), "
+            f"{serveur['coalescees']} requêtes dédupliquées, {serveur['rejetees']} rejetées, {serveur['invalides']} invalides")
+
+
+def tests_service():
+    import numpy as np
+    print("=== Tests du service de planification ===")
+
+    async def scenario_lots():
+        requetes = generer_requetes(300, mois_max=60, doublons=0.0, graine=1)
+        async with ServicePlanification(processus=False, n_workers=2) as service:
+            resultats = await asyncio.gather(*(service.resoudre(r) for r in requetes))
+            return requetes, resultats, service.metriques()
+
+    print("Test des lots (comparaison avec cli.resoudre_bloc, série par série):")
+    requetes, resultats, metriques = asyncio.run(scenario_lots())
+    attendus = [ligne_sortie(*r) for r in resoudre_bloc([dict(r, id=k) for k, r in enumerate(requetes)], FRAIS_DEFAUT, STOCKAGE_DEFAUT, "dp")]
+    ecarts = sum(1 for r, a in zip(resultats, attendus)
+                 if r["mois_commandes"] != a["mois_commandes"] or not np.isclose(r["cout_optimal"], a["cout_optimal"]))
+    print(f"Devrait afficher : 0 écart, moins de lots que de requêtes\nAffiche : {ecarts} écart(s), {metriques['lots']} lots pour {metriques['requetes']} requêtes")
+    if ecarts == 0 and metriques["lots"] < metriques["requetes"]:
+        print("Regroupement en lots bien implémenté")
+    else:
+        print("Regroupement en lots incorrectement implémenté")
+
+    async def scenario_doublons():
+        requete = {"installations": [200, 200, 300, 700, 1000, 200]}
+        async with ServicePlanification(processus=False) as service:
+            resultats = await asyncio.gather(*(service.resoudre(requete) for _ in range(50)))
+            return resultats, service.metriques()
+
+    print("\nTest de la déduplication (50 requêtes identiques simultanées):")
+    resultats, metriques = asyncio.run(scenario_doublons())
+    print(f"Devrait afficher : 1 série résolue, 49 dédupliquées, coût 10600.0\n"
+          f"Affiche : {metriques['series_resolues']} série résolue, {metriques['coalescees']} dédupliquées, coût {resultats[-1]['cout_optimal']}")
+    if metriques["series_resolues"] == 1 and metriques["coalescees"] == 49 and all(r == resultats[0] for r in resultats):
+        print("Déduplication bien implémentée")
+    else:
+        print("Déduplication incorrectement implémentée")
+
+    async def scenario_saturation():
+        requetes = generer_requetes(100, doublons=0.0, graine=2)
+        async with ServicePlanification(processus=False, file_max=10) as service:
+            resultats = await asyncio.gather(*(service.resoudre(r) for r in requetes), return_exceptions=True)
+            return resultats, service.metriques()
+
+    print("\nTest de la contre-pression (100 requêtes, file de 10):")
+    resultats, metriques = asyncio.run(scenario_saturation())
+    saturees = sum(isinstance(r, ServiceSature) for r in resultats)
+    print(f"Devrait afficher : 90 rejetées, 10 résolues\nAffiche : {saturees} rejetées, {metriques['series_resolues']} résolues")
+    if saturees == metriques["rejetees"] == 90 and metriques["series_resolues"] == 10:
+        print("Contre-pression bien implémentée")
+    else:
+        print("Contre-pression incorrectement implémentée")
+
+    async def scenario_arret():
+        service = ServicePlanification(processus=False, n_workers=1, delai_lot=10.0)
+        await service.demarrer()
+        appels = [asyncio.create_task(service.resoudre({"installations": [k + 1, 2, 3]})) for k in range(2)]
+        await asyncio.sleep(0.05)  # la première requête est sortie de la file, le regroupeur attend delai_lot
+        await service.arreter()
+        resultats = await asyncio.wait_for(asyncio.gather(*appels, return_exceptions=True), timeout=2)
+        return resultats, service.en_vol
+
+    print("\nTest de l'arrêt pendant la constitution d'un lot (requêtes sorties de la file et encore en file):")
+    resultats, en_vol = asyncio.run(scenario_arret())
+    print(f"Devrait afficher : ['ServiceSature', 'ServiceSature'], 0 en vol\nAffiche : {[type(r).__name__ for r in resultats]}, {len(en_vol)} en vol")
+    if all(isinstance(r, ServiceSature) for r in resultats) and not en_vol:
+        print("Arrêt du service bien implémenté")
+    else:
+        print("Arrêt du service incorrectement implémenté")
+
+    async def scenario_http(socket_unix):
+        async with ServicePlanification(n_workers=2) as service:
+            serveur = await service.ecouter(port=0, socket_unix=socket_unix)
+            port = None if socket_unix else serveur.sockets[0].getsockname()[1]
+            async with serveur:
+                rapport = await tester_charge(port=port, socket_unix=socket_unix, n_requetes=1000, concurrence=32)
+                lecteur, ecrivain = await _ouvrir("127.0.0.1", port, socket_unix)
+                erreur = await _requete(lecteur, ecrivain, "POST", "/resoudre", {"installations": [1, -2]})
+                prometheus = await _requete(lecteur, ecrivain, "GET", "/metrics")
+                ecrivain.close()
+                await ecrivain.wait_closed()
+            return rapport, erreur[0], prometheus
+
+    print("\nTest de bout en bout (HTTP sur TCP puis socket Unix, pool de processus, 1000 requêtes):")
+    resultats = []
+    with tempfile.TemporaryDirectory() as dossier:
+        for socket_unix in (None, os.path.join(dossier, "service.sock")):
+            rapport, statut_erreur, (statut_prometheus, prometheus) = asyncio.run(scenario_http(socket_unix))
+            print(resume_charge(rapport))
+            resultats.append(rapport["statuts"] == {200: 1000} and statut_erreur == 400 and statut_prometheus == 200
+                             and b"costgraph_service_requetes_total 1000" in prometheus
+                             and b"costgraph_service_invalides_total 1" in prometheus)
+    print(f"Devrait afficher : [True, True]\nAffiche : {resultats}")
+    if all(resultats):
+        print("Service HTTP bien implémenté")
+    else:
+        print("Service HTTP incorrectement implémenté")
+
+
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Service local de planification (HTTP, lots, déduplication)")
+    commandes = parser.add_subparsers(dest="commande", required=True)
+    for nom, aide in (("servir", "lance le service"), ("charge", "test de charge contre un service lancé")):
+        commande = commandes.add_parser(nom, help=aide)
+        commande.add_argument("--hote", default="127.0.0.1")
+        commande.add_argument("--port", type=int, default=8765)
+        commande.add_argument("--socket", help="socket Unix à la place de TCP")
+    commandes.choices["servir"].add_argument("--workers", type=int, default=None)
+    commandes.choices["servir"].add_argument("--taille-lot", type=int, default=256)
+    commandes.choices["servir"].add_argument("--delai-lot-ms", type=float, default=2.0)
+    commandes.choices["servir"].add_argument("--file-max", type=int, default=10_000, help="requêtes en attente avant de répondre 503")
+    commandes.choices["servir"].add_argument("--threads", action="store_true", help="pool de threads au lieu de processus")
+    commandes.choices["charge"].add_argument("--requetes", type=int, default=2000)
+    commandes.choices["charge"].add_argument("--concurrence", type=int, default=64)
+    commandes.choices["charge"].add_argument("--mois-max", type=int, default=120)
+    commandes.choices["charge"].add_argument("--doublons", type=float, default=0.2)
+    commandes.choices["charge"].add_argument("--graine", type=int, default=0)
+    commandes.add_parser("tests", help="lance les tests du module")
+    args = parser.parse_args(arguments)
+
+    if args.commande == "tests":
+        tests_service()
+    elif args.commande == "servir":
+        try:
+            asyncio.run(servir(args.hote, args.port, args.socket, taille_lot=args.taille_lot, delai_lot=args.delai_lot_ms / 1000,
+                               file_max=args.file_max, n_workers=args.workers, processus=not args.threads))
+        except KeyboardInterrupt:
+            pass
+    else:
+        rapport = asyncio.run(tester_charge(args.hote, args.port, args.socket, args.requetes, args.concurrence,
+                                            args.mois_max, args.doublons, args.graine))
+        print(resume_charge(rapport))
+        print(json.dumps(rapport, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import queue
+import threading
+import time
+
+
+# --- calcul en arrière-plan pour l'interface ---
+# le calcul tourne dans un thread et reçoit une fonction etape(nom) : chaque appel signale la progression
+# et sert de point d'annulation. Tkinter n'étant pas thread-safe, le thread ne touche jamais aux widgets :
+# l'interface relève les messages depuis le thread Tk (root.after) avec relever().
+# etape() sans nom est un simple point d'annulation, sans message : les boucles longues (Dijkstra du mode
+# explication, tables de sensibilité) la reçoivent comme fonction verifier et l'appellent à chaque itération.
+# messages : ("etape", nom, rang, nombre_etapes), puis un seul ("termine", resultat), ("erreur", exception) ou ("annule",)
+
+class CalculAnnule(Exception):
+    pass
+
+
+class TacheDeFond:
+    def __init__(self, calcul, etapes):
+        self.etapes = list(etapes)
+        self.annulation = threading.Event()
+        self.messages = queue.Queue()
+        self.finie = False  # passe à True quand le message final a été relevé
+        self.thread = threading.Thread(target=self._executer, args=(calcul,), daemon=True)
+        self.thread.start()
+
+    def etape(self, nom=None):
+        if self.annulation.is_set():
+            raise CalculAnnule()
+        if nom is not None:
+            self.messages.put(("etape", nom, self.etapes.index(nom), len(self.etapes)))
+
+    def _executer(self, calcul):
+        try:
+            resultat = calcul(self.etape)
+        except CalculAnnule:
+            self.messages.put(("annule",))
+        except Exception as erreur:
+            self.messages.put(("erreur", erreur))
+        else:
+            # annulée pendant la dernière étape : le résultat est abandonné
+            self.messages.put(("annule",) if self.annulation.is_set() else ("termine", resultat))
+
+    # l'annulation est coopérative : le calcul s'arrête au prochain appel à etape(), avec ou sans nom
+    def annuler(self):
+        self.annulation.set()
+
+    def en_cours(self):
+        return not self.finie
+
+    # messages arrivés depuis le dernier appel, sans bloquer
+    def relever(self):
+        messages = []
+        while True:
+            try:
+                message = self.messages.get_nowait()
+            except queue.Empty:
+                return messages
+            messages.append(message)
+            if message[0] != "etape":
+                self.finie = True
+
+
+def tests_taches():
+    print("=== Tests des tâches de fond ===")
+
+    def attendre(tache):
+        messages = []
+        while tache.en_cours():
+            messages += tache.relever()
+            time.sleep(0.001)
+        return messages
+
+    print("Test d'un calcul terminé:")
+    def calcul(etape):
+        etape("a")
+        etape("b")
+        return 42
+    messages = attendre(TacheDeFond(calcul, ["a", "b"]))
+    attendu = [("etape", "a", 0, 2), ("etape", "b", 1, 2), ("termine", 42)]
+    print(f"Devrait afficher : {attendu}\nAffiche : {messages}")
+    if messages == attendu:
+        print("Progression bien implémentée")
+    else:
+        print("Progression incorrectement implémentée")
+
+    print("\nTest de l'annulation:")
+    demarre = threading.Event()
+    reprise = threading.Event()
+    etapes_executees = []
+    def calcul_long(etape):
+        etape("a")
+        etapes_executees.append("a")
+        demarre.set()
+        reprise.wait()
+        etape("b")
+        etapes_executees.append("b")
+        return 42
+    tache = TacheDeFond(calcul_long, ["a", "b"])
+    demarre.wait()
+    tache.annuler()
+    reprise.set()
+    messages = attendre(tache)
+    print(f"Devrait afficher : ('annule',) en dernier, étapes exécutées ['a']\nAffiche : {messages[-1]}, étapes exécutées {etapes_executees}")
+    if messages[-1] == ("annule",) and etapes_executees == ["a"]:
+        print("Annulation bien implémentée")
+    else:
+        print("Annulation incorrectement implémentée")
+
+    print("\nTest de l'annulation au milieu d'une étape (Dijkstra sur 3000 mois, etape() comme point d'annulation):")
+    import random
+    from arcs import init_graphe_compact
+    from noyau import dijkstra
+    G, n_mois = init_graphe_compact([random.randint(0, 1000) for _ in range(3000)], 2000, 2)
+    sommets_explores = []
+    def calcul_dijkstra(etape):
+        def verifier():
+            sommets_explores.append(None)
+            etape()
+        etape("Dijkstra")
+        return dijkstra(G, 0, n_mois, verifier=verifier)
+    tache = TacheDeFond(calcul_dijkstra, ["Dijkstra"])
+    time.sleep(0.2)
+    debut = time.perf_counter()
+    tache.annuler()
+    messages = attendre(tache)
+    delai = time.perf_counter() - debut
+    # sans point d'annulation dans la boucle, il faudrait attendre la fin de Dijkstra (environ 14 s)
+    print(f"Devrait afficher : ('annule',) en moins de 0.5 s, après moins de {n_mois + 1} sommets\n"
+          f"Affiche : {messages[-1]} en {delai:.3f} s, après {len(sommets_explores)} sommets")
+    if messages[-1] == ("annule",) and delai < 0.5 and 0 < len(sommets_explores) < n_mois + 1:
+        print("Annulation pendant une étape bien implémentée")
+    else:
+        print("Annulation pendant une étape incorrectement implémentée")
+
+    print("\nTest d'une erreur dans le calcul:")
+    def calcul_faux(etape):
+        raise ValueError("Aucun chemin")
+    messages = attendre(TacheDeFond(calcul_faux, []))
+    print(f"Devrait afficher : erreur ValueError\nAffiche : {messages[-1][0]} {type(messages[-1][1]).__name__}")
+    if messages[-1][0] == "erreur" and isinstance(messages[-1][1], ValueError):
+        print("Remontée des erreurs bien implémentée")
+    else:
+        print("Remontée des erreurs incorrectement implémentée")
+
+
+if __name__ == "__main__":
+    tests_taches()